@@ -0,0 +1,239 @@
+# app/core/availability.py
+
+import bisect
+import heapq
+import sys
+import threading
+import time
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from itertools import islice
+from typing import Iterable, Iterator
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import func
+
+from app.core.config import settings
+from app.core.db.columns import as_utc
+
+
+SLOT_SECONDS = settings.APPOINTMENT_SLOT_MINUTES * 60
+CLINIC_TZ = ZoneInfo(settings.CLINIC_TIMEZONE)
+
+
+def to_epoch(value: datetime) -> int:
+    # SQLite devuelve datetimes sin zona: se guardaron en UTC
+    return int(as_utc(value).timestamp())
+
+
+def from_epoch(value: int) -> datetime:
+    return datetime.fromtimestamp(value, timezone.utc)
+
+
+def to_clinic_date(value: datetime) -> date:
+    """Fecha local de la clínica de `value` (sin zona = UTC)."""
+    return as_utc(value).astimezone(CLINIC_TZ).date()
+
+
+def clinic_day_start(day: date) -> datetime:
+    """Inicio (00:00 local de la clínica) de `day`, en UTC."""
+    return datetime.combine(day, dt_time.min, CLINIC_TZ).astimezone(timezone.utc)
+
+
+def clinic_date(column, dialect_name: str, reference: datetime):
+    """
+    Fecha local de la clínica de una columna timestamptz, calculada en SQL.
+    """
+    if dialect_name == "postgresql":
+        return func.date(func.timezone(settings.CLINIC_TIMEZONE, column))
+    # SQLite guarda UTC sin zona: se corre por el desfase vigente en
+    # `reference` (un cambio de horario dentro del rango no se refleja)
+    offset = int(reference.astimezone(CLINIC_TZ).utcoffset().total_seconds() // 60)
+    return func.date(column, f"{offset:+d} minutes")
+
+
+def first_overlap(busy: list[tuple[int, int]], start: int) -> int | None:
+    """
+    id de la primera cita de `busy` (ordenada) que se solapa con un turno
+    que empieza en `start`, o None.
+    """
+    # Primera cita que termina después de que empieza el turno
+    i = bisect.bisect_right(busy, (start - SLOT_SECONDS, sys.maxsize))
+    if i < len(busy) and busy[i][0] < start + SLOT_SECONDS:
+        return busy[i][1]
+    return None
+
+
+class BusyIndex:
+    """
+    Por doctor, los inicios (epoch) de sus citas 'scheduled', ordenados:
+    saber si un turno está libre es un bisect.
+
+    Cada doctor se carga completo la primera vez que se busca en su
+    agenda. Después se mantiene de forma incremental: las citas que crea,
+    mueve o cancela este worker se aplican al momento (update) y, cada
+    AVAILABILITY_SYNC_SECONDS, se traen las que cambiaron en los demás
+    (updated_at posterior al último sync).
+
+    Las listas son copy-on-write: quien busca turnos usa la referencia
+    sin copiarla ni tomar el lock.
+    """
+
+    def __init__(self, sync_seconds: float):
+        self.sync_seconds = sync_seconds
+        # doctor_id -> [(inicio, appointment_id)] ordenada
+        self._doctors: dict[int, list] = {}
+        # appointment_id -> (doctor_id, inicio), solo de doctores cargados
+        self._appointments: dict[int, tuple[int, int]] = {}
+        self._synced_at: float | None = None
+        self._lock = threading.Lock()
+
+    def missing(self, doctor_ids: Iterable[int]) -> list[int]:
+        return [doctor_id for doctor_id in doctor_ids if doctor_id not in self._doctors]
+
+    def changes_since(self) -> datetime | None:
+        """
+        Desde cuándo hay que pedir cambios a la base de datos, o None si
+        todavía no toca sincronizar.
+        """
+        if self._synced_at is None or time.time() - self._synced_at < self.sync_seconds:
+            return None
+        # Margen para transacciones que confirmaron después de fijar updated_at
+        return from_epoch(self._synced_at - settings.SYNC_MARGIN_SECONDS)
+
+    def load(self, doctor_ids: Iterable[int], rows, started_at: float) -> None:
+        """
+        rows: (doctor_id, appointment_id, scheduled_at) de todas las citas
+        pendientes de esos doctores, leídas a partir de started_at.
+        """
+        busy = {doctor_id: [] for doctor_id in doctor_ids}
+        for doctor_id, appointment_id, scheduled_at in rows:
+            busy[doctor_id].append((to_epoch(scheduled_at), appointment_id))
+
+        with self._lock:
+            for doctor_id, entries in busy.items():
+                self._drop(doctor_id)
+                entries.sort()
+                self._doctors[doctor_id] = entries
+                for start, appointment_id in entries:
+                    self._appointments[appointment_id] = (doctor_id, start)
+            if self._synced_at is None:
+                self._synced_at = started_at
+
+    def apply_changes(self, rows, started_at: float) -> None:
+        """
+        rows: (appointment_id, doctor_id, scheduled_at, status) de las citas
+        modificadas desde changes_since().
+        """
+        with self._lock:
+            for appointment_id, doctor_id, scheduled_at, status in rows:
+                self._apply(appointment_id, doctor_id, scheduled_at, status)
+            self._synced_at = started_at
+
+    def update(self, appointment) -> None:
+        """
+        Refleja una cita ya confirmada por este worker (alta, cambio de
+        horario / doctor o de estado).
+        """
+        with self._lock:
+            self._apply(
+                appointment.id,
+                appointment.doctor_id,
+                appointment.scheduled_at,
+                appointment.status,
+            )
+
+    def busy(self, doctor_id: int) -> list[tuple[int, int]]:
+        return self._doctors.get(doctor_id, [])
+
+    def invalidate(self, doctor_ids: Iterable[int]) -> None:
+        with self._lock:
+            for doctor_id in doctor_ids:
+                self._drop(doctor_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._doctors.clear()
+            self._appointments.clear()
+            self._synced_at = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "doctors": len(self._doctors),
+                "appointments": len(self._appointments),
+                "sync_seconds": self.sync_seconds,
+            }
+
+    def _apply(self, appointment_id: int, doctor_id: int, scheduled_at, status: str) -> None:
+        previous = self._appointments.pop(appointment_id, None)
+        if previous is not None:
+            old_doctor_id, old_start = previous
+            entries = list(self._doctors[old_doctor_id])
+            entries.remove((old_start, appointment_id))
+            self._doctors[old_doctor_id] = entries
+
+        if status == "scheduled" and doctor_id in self._doctors:
+            start = to_epoch(scheduled_at)
+            entries = list(self._doctors[doctor_id])
+            bisect.insort(entries, (start, appointment_id))
+            self._doctors[doctor_id] = entries
+            self._appointments[appointment_id] = (doctor_id, start)
+
+    def _drop(self, doctor_id: int) -> None:
+        for _, appointment_id in self._doctors.pop(doctor_id, ()):
+            self._appointments.pop(appointment_id, None)
+
+
+def free_slots(blocks, busy: list[tuple[int, int]], start: int, end: int) -> Iterator[int]:
+    """
+    Inicios (epoch) de los turnos libres dentro de [start, end), en orden.
+    blocks: [(weekday, start_time, end_time)] en hora local de la clínica;
+    los turnos se alinean al inicio de cada bloque.
+    """
+    by_weekday: dict[int, list] = {}
+    for weekday, block_start, block_end in sorted(blocks):
+        by_weekday.setdefault(weekday, []).append((block_start, block_end))
+
+    day = datetime.fromtimestamp(start, CLINIC_TZ).date()
+    last_day = datetime.fromtimestamp(end, CLINIC_TZ).date()
+    while day <= last_day:
+        for block_start, block_end in by_weekday.get(day.weekday(), ()):
+            slot = to_epoch(datetime.combine(day, block_start, CLINIC_TZ))
+            stop = to_epoch(datetime.combine(day, block_end, CLINIC_TZ))
+            while slot + SLOT_SECONDS <= stop:
+                if slot >= end:
+                    return
+                if slot >= start and first_overlap(busy, slot) is None:
+                    yield slot
+                slot += SLOT_SECONDS
+        day += timedelta(days=1)
+
+
+def _tagged(doctor_id: int, slots: Iterator[int]) -> Iterator[tuple[int, int]]:
+    for slot in slots:
+        yield slot, doctor_id
+
+
+def next_free_slots(
+    blocks_by_doctor: dict[int, list],
+    index: BusyIndex,
+    start: int,
+    end: int,
+    limit: int,
+) -> list[tuple[int, int]]:
+    """
+    Los `limit` turnos libres más próximos entre todos los doctores, como
+    (inicio, doctor_id). Cada doctor es un generador perezoso y heapq.merge
+    solo avanza los que van quedando al frente: no se recorre el rango
+    completo de nadie.
+    """
+    streams = [
+        _tagged(doctor_id, free_slots(blocks, index.busy(doctor_id), start, end))
+        for doctor_id, blocks in blocks_by_doctor.items()
+    ]
+    return list(islice(heapq.merge(*streams), limit))
+
+
+# Se carga bajo demanda en la búsqueda de turnos y se actualiza desde los
+# servicios de citas
+busy_index = BusyIndex(sync_seconds=settings.AVAILABILITY_SYNC_SECONDS)
@@ -0,0 +1,194 @@
+# app/core/compression.py
+
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.static_assets import accepted_encodings
+
+try:  # brotli y zstandard son opcionales
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# Lo que vale la pena comprimir (JSON, NDJSON, CSV, texto); el resto
+# (imágenes, archivos ya comprimidos) pasa tal cual
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+class GzipEncoder:
+    def __init__(self, level: int):
+        # wbits=31: formato gzip (cabecera + crc)
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class BrotliEncoder:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class ZstdEncoder:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class CompressionMiddleware:
+    """
+    Comprime las respuestas de la API según Accept-Encoding (zstd, br o
+    gzip, en el orden de `encodings` y si el paquete está instalado).
+
+    Se guarda el cuerpo hasta juntar `minimum_size` bytes: si la respuesta
+    termina antes, sale sin comprimir y sin gastar CPU (las respuestas
+    chicas y frecuentes no pagan nada). Si no, se comprime por partes a
+    medida que llega, así que también sirve para StreamingResponse
+    (exportaciones) sin armar el cuerpo completo en memoria.
+
+    No toca respuestas que ya traen Content-Encoding (el frontend
+    precomprimido), 204/304, tipos no comprimibles ni WebSockets.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int,
+        encodings: list[str],
+        gzip_level: int,
+        brotli_quality: int,
+        zstd_level: int,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        factories = {
+            "gzip": lambda: GzipEncoder(gzip_level),
+            "br": (lambda: BrotliEncoder(brotli_quality)) if brotli is not None else None,
+            "zstd": (lambda: ZstdEncoder(zstd_level)) if zstandard is not None else None,
+        }
+        # Preferencia del servidor, sin las que no están disponibles
+        self.encoders = [
+            (encoding, factories[encoding]) for encoding in encodings if factories.get(encoding)
+        ]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self.encoders:
+            await self.app(scope, receive, send)
+            return
+
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        chosen = next(
+            ((encoding, factory) for encoding, factory in self.encoders if encoding in accepted),
+            None,
+        )
+        if chosen is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressingResponder(send, self.minimum_size, *chosen)
+        await self.app(scope, receive, responder)
+
+
+class _CompressingResponder:
+    """Envuelve `send` de una sola respuesta."""
+
+    def __init__(self, send: Send, minimum_size: int, encoding: str, factory):
+        self.send = send
+        self.minimum_size = minimum_size
+        self.encoding = encoding
+        self.factory = factory
+        self.start: Message | None = None
+        self.pending: list[bytes] = []
+        self.pending_size = 0
+        self.encoder = None
+        # True: la respuesta pasa tal cual (ya decidida)
+        self.passthrough = False
+
+    async def __call__(self, message: Message):
+        if self.passthrough:
+            await self.send(message)
+            return
+
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            if (
+                message["status"] in (204, 304)
+                or "content-encoding" in headers
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+            ):
+                self.passthrough = True
+                await self.send(message)
+                return
+            self.start = message
+            return
+
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.encoder is None:
+            self.pending.append(body)
+            self.pending_size += len(body)
+            if self.pending_size < self.minimum_size:
+                if more_body:
+                    return
+                # Terminó antes del umbral: sale como estaba
+                self.passthrough = True
+                await self.send(self.start)
+                await self.send(
+                    {"type": "http.response.body", "body": b"".join(self.pending)}
+                )
+                return
+            self.encoder = self.factory()
+            body = b"".join(self.pending)
+            self.pending = []
+            if not more_body:
+                # Cuerpo completo (Response común): se sabe el tamaño final
+                data = self.encoder.compress(body) + self.encoder.finish()
+                await self._send_start(len(data))
+                await self.send({"type": "http.response.body", "body": data})
+                return
+            await self._send_start(None)
+
+        data = self.encoder.compress(body)
+        if not more_body:
+            data += self.encoder.finish()
+        if data or not more_body:
+            await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+    async def _send_start(self, content_length: int | None) -> None:
+        headers = MutableHeaders(raw=self.start["headers"])
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if content_length is not None:
+            headers["Content-Length"] = str(content_length)
+        elif "content-length" in headers:
+            # Por partes: el tamaño final no se conoce hasta terminar
+            del headers["Content-Length"]
+        await self.send(self.start)
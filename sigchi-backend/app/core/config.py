@@ -1,3 +1,5 @@
+from typing import List, Optional
+
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -6,6 +8,108 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
 
+    # Réplicas de lectura (JSON en el env, p.ej. '["postgresql://..."]').
+    # Tras escribir, las lecturas del mismo usuario van al primario durante
+    # READ_YOUR_WRITES_SECONDS
+    DATABASE_REPLICA_URLS: List[str] = []
+    READ_YOUR_WRITES_SECONDS: float = 5.0
+
+    # Pool de conexiones a la base de datos
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Stack async (AsyncEngine + routers async). Si ASYNC_DATABASE_URL no se
+    # define, se deriva de DATABASE_URL (asyncpg / aiosqlite). Solo cubre
+    # pacientes, doctores, citas e historias: users, auth, imports, exports
+    # y stats siguen con Session sync en el threadpool
+    DB_ASYNC: bool = False
+    ASYNC_DATABASE_URL: Optional[str] = None
+    # Hilos del threadpool de anyio para handlers sync; 0 = pool_size + max_overflow
+    THREADPOOL_TOKENS: int = 0
+    # Los syncs incrementales de cada worker (denylist, disponibilidad,
+    # recordatorios) piden los cambios desde el sync anterior menos este
+    # margen, por las transacciones que confirmaron después de fijar updated_at
+    SYNC_MARGIN_SECONDS: float = 5.0
+
+    # Cache del usuario autenticado (user + rol + ids de perfil)
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 60.0
+
+    # Tokens "scoped": rol e ids de perfil firmados en el JWT (opt-in)
+    JWT_SCOPED_CLAIMS: bool = False
+    # Cada cuánto cada worker sincroniza la denylist de tokens revocados
+    TOKEN_DENYLIST_SYNC_SECONDS: float = 5.0
+
+    # Cache de JWT ya verificados (digest -> claims, válido hasta exp)
+    TOKEN_CACHE_MAX_SIZE: int = 50000
+
+    # Hashing de contraseñas (pbkdf2_sha256) en pool de procesos
+    PASSWORD_HASH_ROUNDS: int = 29000
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 64
+
+    # Cache de resultados del autocompletado de pacientes
+    PATIENT_SEARCH_CACHE_MAX_SIZE: int = 5000
+    PATIENT_SEARCH_CACHE_TTL_SECONDS: float = 30.0
+
+    # Agenda: duración de cada cita (y de cada turno libre) y zona horaria
+    # en la que se definen los horarios de atención de los doctores
+    APPOINTMENT_SLOT_MINUTES: int = 30
+    CLINIC_TIMEZONE: str = "America/Bogota"
+    # Rango máximo de días que recorre una búsqueda de turnos libres
+    AVAILABILITY_MAX_DAYS: int = 180
+    # Rango máximo de días del calendario de un doctor
+    CALENDAR_MAX_DAYS: int = 93
+    # Cada cuánto cada worker trae las citas que cambiaron en otros workers
+    # (las propias se aplican al momento)
+    AVAILABILITY_SYNC_SECONDS: float = 5.0
+
+    # Dashboard: días antes y después de hoy que se muestran por defecto y
+    # rango máximo que se puede pedir
+    STATS_DEFAULT_DAYS: int = 30
+    STATS_MAX_DAYS: int = 366
+
+    # Eventos en vivo (WebSocket): mensajes sin enviar por conexión antes
+    # de cortarla por lenta
+    EVENTS_MAX_PENDING: int = 256
+
+    # Recordatorios de citas: minutos antes de scheduled_at en que se
+    # envía cada uno. En memoria solo se tienen los que vencen en las
+    # próximas REMINDER_LOOKAHEAD_HOURS; los que llevan más de
+    # REMINDER_GRACE_MINUTES vencidos ya no se envían
+    REMINDERS_ENABLED: bool = True
+    REMINDER_OFFSETS_MINUTES: List[int] = [1440, 60]
+    REMINDER_TICK_SECONDS: float = 1.0
+    REMINDER_LOOKAHEAD_HOURS: float = 24.0
+    REMINDER_GRACE_MINUTES: int = 30
+    # Cada cuánto cada worker trae las citas que cambiaron en otros workers
+    REMINDER_SYNC_SECONDS: float = 5.0
+    # Destino de los recordatorios ("modulo:Clase"); por defecto, un
+    # archivo JSON lines
+    REMINDER_NOTIFIER: str = "app.core.reminders:FileNotifier"
+    REMINDER_LOG_FILE: str = "reminders.log"
+
+    # Frontend estático: se precomprime al arrancar (brotli solo si el
+    # paquete está instalado)
+    STATIC_GZIP_LEVEL: int = 9
+    STATIC_BROTLI_QUALITY: int = 11
+
+    # Compresión de las respuestas de la API: por debajo de
+    # COMPRESSION_MINIMUM_SIZE bytes salen sin comprimir. Las codificaciones
+    # van en orden de preferencia; br y zstd solo si el paquete está instalado
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_ENCODINGS: List[str] = ["zstd", "br", "gzip"]
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
+
+    # Importación masiva: filas por lote (un executemany + commit por lote)
+    IMPORT_BATCH_SIZE: int = 1000
+    # Máximo de errores por fila que se devuelven en el reporte
+    IMPORT_MAX_REPORTED_ERRORS: int = 1000
+
     class Config:
         env_file = ".env"
 
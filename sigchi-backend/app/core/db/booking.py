@@ -0,0 +1,99 @@
+# app/core/db/booking.py
+
+from sqlalchemy import func, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+
+from app.core.config import settings
+from app.core.db.models import Doctor
+
+
+# Una cita ocupa [scheduled_at, scheduled_at + APPOINTMENT_SLOT_MINUTES) y
+# dos citas 'scheduled' del mismo doctor no se pueden solapar. Quién lo
+# garantiza cuando dos reservas corren a la vez depende del motor:
+#   postgresql: restricción EXCLUDE (btree_gist); la base de datos rechaza
+#               el segundo INSERT aunque las transacciones se crucen
+#   postgresql sin btree_gist (o con solapamientos previos que impiden
+#               crear la restricción): advisory lock por doctor
+#   sqlite:     el INSERT toma el lock de escritura de toda la base, así
+#               que la comprobación posterior al INSERT no puede competir
+#               con otra reserva
+#   otros:      SELECT ... FOR UPDATE sobre la fila del doctor
+
+EXCLUSION_PREFIX = "ex_appointments_doctor_overlap"
+# La duración va en el nombre: si cambia, se reemplaza la restricción
+EXCLUSION_NAME = f"{EXCLUSION_PREFIX}_{settings.APPOINTMENT_SLOT_MINUTES}m"
+
+# Primera clave de pg_advisory_xact_lock(int, int); la segunda es el doctor
+ADVISORY_LOCK_NAMESPACE = 4201
+
+# Las expresiones de un índice (y de un EXCLUDE) tienen que ser IMMUTABLE:
+# timestamptz + interval es solo STABLE (depende de la zona de la sesión),
+# así que el rango se arma sobre el timestamp en UTC, donde la suma sí lo es
+_PG_SLOT_START = "(scheduled_at AT TIME ZONE 'UTC')"
+
+_PG_EXCLUSION_DDL = f"""
+    ALTER TABLE appointments ADD CONSTRAINT {EXCLUSION_NAME} EXCLUDE USING gist (
+        doctor_id WITH =,
+        tsrange(
+            {_PG_SLOT_START},
+            {_PG_SLOT_START} + interval '{settings.APPOINTMENT_SLOT_MINUTES} minutes',
+            '[)'
+        ) WITH &&
+    ) WHERE (status = 'scheduled')
+"""
+
+# Se fija en ensure_booking_guard() al arrancar
+backend = "row_lock"
+
+
+def ensure_booking_guard(engine: Engine) -> str:
+    """
+    Crea (si falta) la restricción de no solapamiento y devuelve el
+    mecanismo elegido. Es idempotente: se llama en cada arranque.
+    """
+    global backend
+    dialect = engine.dialect.name
+
+    if dialect == "postgresql":
+        try:
+            with engine.begin() as conn:
+                conn.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gist"))
+                existing = set(
+                    conn.scalars(
+                        text("SELECT conname FROM pg_constraint WHERE conname LIKE :prefix"),
+                        {"prefix": f"{EXCLUSION_PREFIX}%"},
+                    )
+                )
+                for name in existing - {EXCLUSION_NAME}:
+                    conn.execute(text(f"ALTER TABLE appointments DROP CONSTRAINT {name}"))
+                if EXCLUSION_NAME not in existing:
+                    conn.execute(text(_PG_EXCLUSION_DDL))
+            backend = "exclusion"
+        except DBAPIError as exc:
+            # Sigue funcionando con advisory locks, pero no debe pasar
+            # desapercibido: sin la restricción no hay garantía en la base
+            print(
+                f"Advertencia: no se pudo crear {EXCLUSION_NAME}, "
+                f"se usan advisory locks para las reservas: {exc.orig}"
+            )
+            backend = "advisory"
+
+    elif dialect == "sqlite":
+        backend = "sqlite"
+
+    else:
+        backend = "row_lock"
+    return backend
+
+
+def lock_doctor_stmt(doctor_id: int):
+    """
+    Sentencia que serializa las reservas del doctor hasta el fin de la
+    transacción, o None si el motor ya lo garantiza por su cuenta.
+    """
+    if backend == "advisory":
+        return select(func.pg_advisory_xact_lock(ADVISORY_LOCK_NAMESPACE, doctor_id))
+    if backend == "row_lock":
+        return select(Doctor.id).where(Doctor.id == doctor_id).with_for_update()
+    return None
@@ -0,0 +1,62 @@
+# app/core/db/columns.py
+
+from datetime import datetime, timezone
+
+from sqlalchemy import DateTime, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateColumn, MetaData
+from sqlalchemy.types import TypeDecorator
+
+
+def as_utc(value: datetime) -> datetime:
+    """`value` en UTC (sin zona = ya está en UTC, como lo devuelve SQLite)."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+class UTCDateTime(TypeDecorator):
+    """
+    DateTime(timezone=True) que se guarda siempre en UTC. PostgreSQL ya
+    convierte; SQLite descarta el offset sin convertir, y una cita a las
+    00:30-05:00 quedaba guardada como 00:30 (que al leerla se toma por
+    UTC, otro día en la clínica).
+    """
+    impl = DateTime(timezone=True)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if isinstance(value, datetime):
+            return as_utc(value)
+        return value
+
+
+def ensure_columns(engine: Engine, metadata: MetaData) -> list[str]:
+    """
+    create_all no agrega columnas nuevas a tablas que ya existían (p. ej.
+    users.token_version en una base anterior). Las que falten se agregan
+    con ALTER TABLE ... ADD COLUMN, siempre que se puedan agregar sin
+    tocar las filas existentes: nullable o con server_default. Devuelve
+    las columnas agregadas ("tabla.columna"). Es idempotente.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+    with engine.begin() as conn:
+        for table in metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {col["name"] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                if not column.nullable and column.server_default is None:
+                    print(
+                        f"Advertencia: falta {table.name}.{column.name} y no se puede "
+                        "agregar sin server_default; hay que migrarla a mano"
+                    )
+                    continue
+                ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+                added.append(f"{table.name}.{column.name}")
+    return added
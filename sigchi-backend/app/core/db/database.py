@@ -1,19 +1,157 @@
+import asyncio
+import itertools
+from contextlib import contextmanager
+
+from fastapi import Request
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from starlette.concurrency import run_in_threadpool
 from app.core.config import settings
+from app.core.db.pool import InstrumentedQueuePool
+from app.core.db.routing import RoutingSession, WriteTracker
 
 DATABASE_URL = settings.DATABASE_URL
 
-engine = create_engine(DATABASE_URL, echo=False)
+READ_ONLY_METHODS = {"GET", "HEAD"}
+
+
+# Driver async por backend cuando ASYNC_DATABASE_URL no está definido
+ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite",
+}
+
+
+def _async_database_url(url: str) -> str:
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    driver = ASYNC_DRIVERS.get(backend)
+    if driver is None:
+        raise ValueError(f"No async driver configured for backend '{backend}'")
+    return parsed.set(drivername=f"{backend}+{driver}").render_as_string(hide_password=False)
+
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def _engine_kwargs(url: str, instrumented: bool = True) -> dict:
+    """
+    Parámetros del pool de conexiones según Settings.
+    SQLite en memoria usa su propio pool de una conexión y no los admite.
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return {}
+    kwargs = {"poolclass": InstrumentedQueuePool} if instrumented else {}
+    return {
+        **kwargs,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+engine = create_engine(DATABASE_URL, echo=False, **_engine_kwargs(DATABASE_URL))
+
+# Réplicas de solo lectura (opcionales) para los GET
+replica_engines = [
+    create_engine(url, echo=False, **_engine_kwargs(url))
+    for url in settings.DATABASE_REPLICA_URLS
+]
+write_tracker = WriteTracker(window_seconds=settings.READ_YOUR_WRITES_SECONDS)
+
+# expire_on_commit=False: tras el flush el objeto ya tiene todo lo que
+# devuelve la API (id vía INSERT ... RETURNING, o lastrowid si el motor
+# no lo soporta; defaults y onupdate se calculan en Python), así que no
+# hace falta un SELECT de refresco después de cada commit.
+# Vale para todas las sesiones sync, no solo las de escritura: después de
+# un commit los atributos y relaciones ya cargados no se recargan. Nadie
+# depende de eso: las sesiones viven una petición o un tick, y ningún
+# update cambia una FK cuya relación ya esté cargada (DoctorUpdate no
+# incluye user_id). Si hace falta el estado de la base, db.refresh(obj)
+SessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
+    bind=engine,
+    class_=RoutingSession,
+    replica_cycle=itertools.cycle(replica_engines) if replica_engines else None,
+    write_tracker=write_tracker,
+)
 
 Base = declarative_base()
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+@contextmanager
+def primary_session(db: Session):
+    """
+    Sesión que lee siempre del primario, para las consultas que no toleran
+    el lag de una réplica (p. ej. los syncs incrementales de BusyIndex).
+    Si `db` no puede ir a una réplica se reutiliza; si no, se abre otra.
+    """
+    if not replica_engines or not db.info.get("read_only"):
         yield db
+        return
+    primary = SessionLocal()
+    try:
+        yield primary
     finally:
-        db.close()
+        primary.close()
+
+
+# Como máximo una sesión abierta por conexión disponible en el pool.
+# Un handler sync retiene su conexión hasta que la respuesta se serializa
+# (en el threadpool); sin este límite, las peticiones nuevas pueden ocupar
+# todos los hilos esperando conexión mientras las que ya la tienen esperan
+# un hilo libre para terminar (deadlock hasta pool_timeout). La espera
+# ocurre aquí, en el event loop, sin bloquear hilos.
+_session_slots = asyncio.Semaphore(settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW)
+
+
+async def get_db(request: Request):
+    # Dependencia async: la espera por el semáforo no ocupa un hilo
+    async with _session_slots:
+        db = SessionLocal()
+        # GET/HEAD pueden ir a una réplica (ver RoutingSession)
+        db.info["read_only"] = request.method in READ_ONLY_METHODS
+        db.info["request"] = request
+        try:
+            yield db
+        finally:
+            # close() hace rollback y devuelve la conexión al pool (I/O
+            # bloqueante): en el threadpool, no en el event loop. No hay
+            # riesgo de deadlock: quien espera un hilo ya tiene su conexión
+            await run_in_threadpool(db.close)
+            # Abrir la ventana read-your-writes del usuario que escribió
+            principal = getattr(request.state, "principal", None)
+            if db.info.get("committed") and principal is not None:
+                write_tracker.mark(principal.id)
+
+
+# --- Stack async (se activa con DB_ASYNC) ---
+
+async_engine = None
+AsyncSessionLocal = None
+
+if settings.DB_ASYNC:
+    ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or _async_database_url(DATABASE_URL)
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        echo=False,
+        # El engine async usa su propio AsyncAdaptedQueuePool
+        **_engine_kwargs(ASYNC_DATABASE_URL, instrumented=False),
+    )
+    # expire_on_commit=False: en async no se puede hacer lazy-load al leer
+    # atributos después del commit
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        class_=AsyncSession,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
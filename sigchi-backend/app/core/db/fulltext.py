@@ -0,0 +1,207 @@
+# app/core/db/fulltext.py
+
+import re
+
+from sqlalchemy import column, func, literal, literal_column, or_, select, table, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError, OperationalError
+
+from app.core.db.models import ClinicalHistory
+
+
+# Búsqueda de texto completo sobre diagnosis / treatment / notes.
+#   postgresql: columna tsvector generada (STORED) + índice GIN
+#   sqlite:     tabla FTS5 external-content mantenida con triggers
+#   otros (o sqlite sin FTS5): ILIKE sin ranking
+# Ninguna de las dos estructuras está en el modelo ORM: las mantiene la
+# propia base de datos, así que los inserts/updates no cambian.
+#
+# En postgresql además se intenta habilitar pg_trgm para la búsqueda
+# aproximada de pacientes (nombre / documento).
+
+TS_CONFIG = "spanish"
+FTS_TABLE = "clinical_histories_fts"
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+_PG_DDL = (
+    f"""
+    ALTER TABLE clinical_histories
+    ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        to_tsvector('{TS_CONFIG}',
+            coalesce(diagnosis, '') || ' ' ||
+            coalesce(treatment, '') || ' ' ||
+            coalesce(notes, ''))
+    ) STORED
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_clinical_histories_search
+    ON clinical_histories USING GIN (search_vector)
+    """,
+)
+
+_PG_TRGM_DDL = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    CREATE INDEX IF NOT EXISTS ix_users_full_name_trgm ON users USING GIN (
+        (lower(coalesce(first_name, '') || ' ' || coalesce(last_name, ''))) gin_trgm_ops
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_patients_document_number_trgm
+    ON patients USING GIN (lower(document_number) gin_trgm_ops)
+    """,
+)
+
+# doctor_id / patient_id también se indexan: el alcance por rol se resuelve
+# dentro del MATCH (intersección de listas) en lugar de filtrar después
+_FTS_COLUMNS = "diagnosis, treatment, notes, doctor_id, patient_id"
+_FTS_NEW = "new.diagnosis, new.treatment, new.notes, new.doctor_id, new.patient_id"
+_FTS_OLD = "old.diagnosis, old.treatment, old.notes, old.doctor_id, old.patient_id"
+
+_SQLITE_DDL = (
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        {_FTS_COLUMNS},
+        content='clinical_histories', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON clinical_histories BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {_FTS_COLUMNS}) VALUES (new.id, {_FTS_NEW});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON clinical_histories BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_FTS_COLUMNS})
+        VALUES ('delete', old.id, {_FTS_OLD});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON clinical_histories BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_FTS_COLUMNS})
+        VALUES ('delete', old.id, {_FTS_OLD});
+        INSERT INTO {FTS_TABLE}(rowid, {_FTS_COLUMNS}) VALUES (new.id, {_FTS_NEW});
+    END
+    """,
+)
+
+# En SQLite, bm25 se calcula solo sobre las coincidencias más recientes:
+# con un término muy común (cientos de miles de filas) rankear todo cuesta
+# cientos de ms, y en historias clínicas lo reciente es lo más relevante
+SQLITE_RANK_CANDIDATES = 2000
+
+# Se fijan en ensure_fulltext() al arrancar
+backend = "like"
+trigram = False
+
+
+def ensure_fulltext(engine: Engine) -> str:
+    """
+    Crea (si faltan) las estructuras de búsqueda del motor y devuelve el
+    backend elegido. Es idempotente: se llama en cada arranque.
+    """
+    global backend, trigram
+    dialect = engine.dialect.name
+
+    if dialect == "postgresql":
+        with engine.begin() as conn:
+            for ddl in _PG_DDL:
+                conn.execute(text(ddl))
+        backend = "postgresql"
+        try:
+            with engine.begin() as conn:
+                for ddl in _PG_TRGM_DDL:
+                    conn.execute(text(ddl))
+            trigram = True
+        except DBAPIError:
+            # Sin permiso para crear la extensión: solo búsqueda por prefijo
+            trigram = False
+
+    elif dialect == "sqlite":
+        try:
+            with engine.begin() as conn:
+                existed = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE name = :name"),
+                    {"name": FTS_TABLE},
+                ).first()
+                for ddl in _SQLITE_DDL:
+                    conn.execute(text(ddl))
+                if not existed:
+                    # Indexar las historias que ya existían
+                    conn.execute(
+                        text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+                    )
+            backend = "sqlite"
+        except OperationalError:
+            # SQLite compilado sin FTS5
+            backend = "like"
+
+    else:
+        backend = "like"
+    return backend
+
+
+def search_tokens(query: str) -> list[str]:
+    return _TOKEN_RE.findall(query.lower())
+
+
+def search_stmt(
+    tokens: list[str],
+    doctor_id: int | None = None,
+    patient_id: int | None = None,
+):
+    """
+    select(ClinicalHistory, rank) de las historias que contienen todos los
+    tokens (como prefijo), dentro del alcance indicado. Mayor rank = más
+    relevante.
+    """
+    if backend == "postgresql":
+        vector = literal_column("clinical_histories.search_vector")
+        tsquery = func.to_tsquery(TS_CONFIG, " & ".join(f"{t}:*" for t in tokens))
+        rank = func.ts_rank_cd(vector, tsquery)
+        stmt = select(ClinicalHistory, rank.label("rank")).where(vector.op("@@")(tsquery))
+
+    elif backend == "sqlite":
+        terms = " AND ".join(f'"{t}"*' for t in tokens)
+        match = f"{{diagnosis treatment notes}} : ({terms})"
+        if doctor_id is not None:
+            match += f' AND doctor_id : "{int(doctor_id)}"'
+        if patient_id is not None:
+            match += f' AND patient_id : "{int(patient_id)}"'
+
+        fts = table(FTS_TABLE, column("rowid"))
+        fts_ref = literal_column(FTS_TABLE)
+        # bm25 devuelve valores negativos (más negativo = mejor); las
+        # columnas de ids no cuentan para la relevancia
+        rank = -func.bm25(fts_ref, 1.0, 1.0, 1.0, 0.0, 0.0)
+        candidates = (
+            select(fts.c.rowid.label("id"), rank.label("rank"))
+            .where(fts_ref.op("MATCH")(match))
+            .order_by(fts.c.rowid.desc())
+            .limit(SQLITE_RANK_CANDIDATES)
+            .subquery()
+        )
+        stmt = select(ClinicalHistory, candidates.c.rank).join(
+            candidates, candidates.c.id == ClinicalHistory.id
+        )
+
+    else:
+        stmt = select(ClinicalHistory, literal(0.0).label("rank"))
+        for token in tokens:
+            pattern = f"%{token}%"
+            stmt = stmt.where(
+                or_(
+                    ClinicalHistory.diagnosis.ilike(pattern),
+                    ClinicalHistory.treatment.ilike(pattern),
+                    ClinicalHistory.notes.ilike(pattern),
+                )
+            )
+
+    if doctor_id is not None:
+        stmt = stmt.where(ClinicalHistory.doctor_id == doctor_id)
+    if patient_id is not None:
+        stmt = stmt.where(ClinicalHistory.patient_id == patient_id)
+    return stmt
@@ -1,3 +1,3 @@
-from app.models import User, Role, Patient, Doctor, Appointment, ClinicalHistory
+from app.models import User, Role, Patient, Doctor, DoctorSchedule, Appointment, ClinicalHistory, TokenRevocation, StatCounter, ReminderDelivery
 
-__all__ = ["User", "Role", "Patient", "Doctor", "Appointment", "ClinicalHistory"]
+__all__ = ["User", "Role", "Patient", "Doctor", "DoctorSchedule", "Appointment", "ClinicalHistory", "TokenRevocation", "StatCounter", "ReminderDelivery"]
@@ -0,0 +1,102 @@
+# app/core/db/pool.py
+
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+
+# Límites (en ms) de los buckets del histograma de espera por conexión
+CHECKOUT_WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class CheckoutWaitHistogram:
+    """
+    Histograma acumulado del tiempo que tarda un checkout del pool
+    (espera en cola + creación de conexión si hace falta).
+    """
+
+    def __init__(self, buckets_ms=CHECKOUT_WAIT_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self._counts = [0] * (len(self.buckets_ms) + 1)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.timeouts = 0
+
+    def observe(self, elapsed_ms: float) -> None:
+        index = len(self.buckets_ms)
+        for i, bound in enumerate(self.buckets_ms):
+            if elapsed_ms <= bound:
+                index = i
+                break
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.total_ms += elapsed_ms
+            self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def observe_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            labels = [f"le_{b}ms" for b in self.buckets_ms] + ["le_inf"]
+            return {
+                "count": self.count,
+                "avg_ms": (self.total_ms / self.count) if self.count else 0.0,
+                "max_ms": self.max_ms,
+                "timeouts": self.timeouts,
+                "buckets": dict(zip(labels, self._counts)),
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool que mide cuánto espera cada checkout.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_histogram = CheckoutWaitHistogram()
+
+    def recreate(self):
+        # Conservar las métricas si SQLAlchemy recrea el pool (dispose)
+        pool = super().recreate()
+        pool.wait_histogram = self.wait_histogram
+        return pool
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.wait_histogram.observe_timeout()
+            raise
+        self.wait_histogram.observe((time.perf_counter() - start) * 1000)
+        return connection
+
+
+def pool_status(pool) -> dict:
+    """
+    Estado actual del pool: conexiones en uso, libres y overflow.
+    """
+    status = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "max_overflow": pool._max_overflow,
+                "timeout_seconds": pool.timeout(),
+            }
+        )
+    histogram = getattr(pool, "wait_histogram", None)
+    if histogram is not None:
+        status["checkout_wait"] = histogram.snapshot()
+    return status
@@ -0,0 +1,91 @@
+# app/core/db/routing.py
+
+import threading
+import time
+from typing import Iterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+
+class WriteTracker:
+    """
+    Recuerda cuándo escribió cada usuario por última vez, para que sus
+    lecturas vayan al primario durante la ventana read-your-writes
+    (mientras la réplica puede no tener aún sus cambios).
+
+    Es por proceso: con varios workers, la ventana debe cubrir también el
+    lag de replicación visto desde otro worker.
+    """
+
+    def __init__(self, window_seconds: float):
+        self.window_seconds = window_seconds
+        self._last_write: dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def mark(self, user_id: int) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._last_write[user_id] = now
+            # Purga perezosa para que el dict no crezca sin límite
+            if len(self._last_write) > 10000:
+                cutoff = now - self.window_seconds
+                self._last_write = {
+                    uid: ts for uid, ts in self._last_write.items() if ts > cutoff
+                }
+
+    def recently_wrote(self, user_id: int | None) -> bool:
+        if user_id is None:
+            return False
+        ts = self._last_write.get(user_id)
+        return ts is not None and time.monotonic() - ts < self.window_seconds
+
+
+class RoutingSession(Session):
+    """
+    Session que envía las lecturas a una réplica (round-robin) cuando se
+    marca como de solo lectura, y todo lo demás al primario.
+
+    info["read_only"]: la petición es un GET/HEAD.
+    info["request"]: para saber (al ejecutar la primera consulta, cuando
+    la autenticación ya corrió) si el usuario está en su ventana
+    read-your-writes.
+    """
+
+    def __init__(
+        self,
+        *args,
+        replica_cycle: Iterator[Engine] | None = None,
+        write_tracker: WriteTracker | None = None,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self._replica_cycle = replica_cycle
+        self._write_tracker = write_tracker
+        self._chosen_bind: Engine | None = None
+
+    def _use_replica(self) -> bool:
+        if self._replica_cycle is None or not self.info.get("read_only") or self._flushing:
+            return False
+        request = self.info.get("request")
+        principal = getattr(getattr(request, "state", None), "principal", None)
+        user_id = getattr(principal, "id", None)
+        if self._write_tracker is not None and self._write_tracker.recently_wrote(user_id):
+            return False
+        return True
+
+    def get_bind(self, mapper=None, **kwargs):
+        if self._chosen_bind is None:
+            # Se decide una sola vez por sesión: lecturas consistentes
+            # dentro de la misma petición
+            if self._use_replica():
+                self._chosen_bind = next(self._replica_cycle)
+            else:
+                self._chosen_bind = super().get_bind(mapper, **kwargs)
+        return self._chosen_bind
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _mark_committed(session: Session) -> None:
+    session.info["committed"] = True
@@ -0,0 +1,77 @@
+# app/core/etag.py
+
+import hashlib
+
+from fastapi import Request, Response, status
+
+
+ETAG_HEADER = "ETag"
+# El cliente puede guardar la respuesta, pero debe revalidarla siempre
+REVALIDATE = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    """
+    ETag débil a partir de los valores que determinan la respuesta (no
+    del cuerpo): se puede calcular sin armar la respuesta completa.
+    """
+    digest = hashlib.sha256(repr(parts).encode()).hexdigest()[:32]
+    return f'W/"{digest}"'
+
+
+def row_etag(obj, *extra) -> str:
+    """
+    ETag del detalle de una fila ORM: (id, updated_at) si la tabla lo
+    tiene; si no, el valor de todas sus columnas. `extra` agrega datos de
+    otras tablas que también van en la respuesta.
+    """
+    table = obj.__table__
+    if "updated_at" in table.c:
+        parts = (obj.id, obj.updated_at)
+    else:
+        parts = tuple(getattr(obj, column.key) for column in table.columns)
+    return make_etag(table.name, *parts, *extra)
+
+
+def page_etag(kind: str, limit: int, rows) -> str:
+    """
+    ETag de una página de un listado: rows son las (id, updated_at, ...)
+    de sus filas, en orden. Cambia si una fila de la página se modifica,
+    entra o sale (alta, baja, cambio de orden); limit va incluido porque
+    decide si se envía el cursor de la siguiente página.
+    """
+    return make_etag(kind, limit, *(tuple(row) for row in rows))
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Comparación débil: se ignora el prefijo W/
+    wanted = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == wanted for tag in header.split(","))
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers[ETAG_HEADER] = etag
+    response.headers["Cache-Control"] = REVALIDATE
+
+
+def not_modified(etag: str) -> Response:
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    set_etag(response, etag)
+    return response
+
+
+def conditional(request: Request, response: Response, etag: str, body):
+    """
+    body con su ETag, o 304 si el cliente ya tiene esa versión. Para
+    cuando el ETag sale de lo que ya se cargó (detalles); los listados
+    comparan antes de cargar la página.
+    """
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    return body
@@ -0,0 +1,150 @@
+# app/core/events.py
+
+import asyncio
+import json
+import threading
+from typing import Iterable
+
+from app.core.config import settings
+
+
+# Cada conexión se suscribe a un solo tema, según su rol (el mismo
+# alcance que los listados de citas / historias):
+#   admin:   ("admin",)            todos los eventos
+#   doctor:  ("doctor", doctor_id)   solo los de sus citas / historias
+#   patient: ("patient", patient_id) solo los de sus citas / historias
+ADMIN_TOPIC = ("admin",)
+
+
+def doctor_topic(doctor_id: int) -> tuple:
+    return ("doctor", doctor_id)
+
+
+def patient_topic(patient_id: int) -> tuple:
+    return ("patient", patient_id)
+
+
+class Subscription:
+    """
+    Mensajes pendientes (JSON ya serializado) de una conexión. Solo se
+    toca desde el event loop.
+    """
+
+    def __init__(self, topic: tuple, max_pending: int):
+        self.topic = topic
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self.overflowed = False
+
+    def deliver(self, message: str) -> bool:
+        if self.overflowed:
+            return False
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            # Cliente lento: en lugar de acumular sin límite (o frenar a
+            # quien publica) se corta la conexión; al reconectar vuelve a
+            # pedir los listados
+            self.overflowed = True
+            self.queue.get_nowait()
+            self.queue.put_nowait(None)
+            return False
+
+    async def get(self) -> str | None:
+        """Siguiente mensaje, o None si la conexión se debe cerrar."""
+        return await self.queue.get()
+
+
+class EventBus:
+    """
+    Bus de eventos en proceso: los servicios publican cambios de citas e
+    historias y cada conexión WebSocket recibe los de su tema.
+
+    publish() solo mira los temas del evento (admin, su doctor, su
+    paciente): el costo es proporcional a los suscriptores de esos temas,
+    no al total de conexiones. El mensaje se serializa una vez y la misma
+    cadena se entrega a todos.
+
+    Se puede publicar desde el event loop (servicios async) o desde los
+    hilos del threadpool (servicios sync): en ese caso el reparto se pasa
+    al loop con una sola llamada call_soon_threadsafe por evento.
+    """
+
+    def __init__(self, max_pending: int):
+        self.max_pending = max_pending
+        self._topics: dict[tuple, set[Subscription]] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock = threading.Lock()
+
+    def subscribe(self, topic: tuple) -> Subscription:
+        # Se llama desde el event loop: es el loop al que se entregan los mensajes
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(topic, self.max_pending)
+        with self._lock:
+            self._topics.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._topics.get(subscription.topic)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._topics[subscription.topic]
+
+    def publish(
+        self,
+        event_type: str,
+        data: dict,
+        doctor_ids: Iterable[int] = (),
+        patient_ids: Iterable[int] = (),
+    ) -> int:
+        """
+        Publica el evento a los admins y a los doctores / pacientes
+        indicados. Devuelve a cuántas conexiones se envió.
+        """
+        topics = [ADMIN_TOPIC]
+        topics.extend(doctor_topic(doctor_id) for doctor_id in set(doctor_ids))
+        topics.extend(patient_topic(patient_id) for patient_id in set(patient_ids))
+        with self._lock:
+            targets = [
+                subscription
+                for topic in topics
+                for subscription in self._topics.get(topic, ())
+            ]
+        if not targets:
+            return 0
+
+        message = json.dumps({"type": event_type, "data": data}, default=str)
+        loop = self._loop
+        try:
+            in_loop = asyncio.get_running_loop() is loop
+        except RuntimeError:
+            in_loop = False
+        if in_loop:
+            self._fan_out(targets, message)
+        else:
+            try:
+                loop.call_soon_threadsafe(self._fan_out, targets, message)
+            except RuntimeError:
+                # Loop cerrado (apagado del worker)
+                return 0
+        return len(targets)
+
+    @staticmethod
+    def _fan_out(targets: list[Subscription], message: str) -> None:
+        for subscription in targets:
+            subscription.deliver(message)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "topics": len(self._topics),
+                "subscribers": sum(len(s) for s in self._topics.values()),
+                "max_pending": self.max_pending,
+            }
+
+
+# Un bus por worker: cada conexión recibe los cambios hechos a través del
+# mismo proceso
+event_bus = EventBus(max_pending=settings.EVENTS_MAX_PENDING)
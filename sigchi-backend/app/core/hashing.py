@@ -0,0 +1,154 @@
+# app/core/hashing.py
+
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from app.core.config import settings
+
+
+# Usamos pbkdf2_sha256 en lugar de bcrypt
+pwd_context = CryptContext(
+    schemes=["pbkdf2_sha256"],
+    deprecated="auto",
+    pbkdf2_sha256__rounds=settings.PASSWORD_HASH_ROUNDS,
+)
+
+
+# --- Password hashing (sync) ---
+
+def get_password_hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def _hash_batch(passwords: list[str]) -> list[str]:
+    return [get_password_hash(p) for p in passwords]
+
+
+class PasswordHasher:
+    """
+    Ejecuta el hashing/verificación de contraseñas en un pool de procesos
+    propio, para que el pbkdf2 no compita por el GIL ni por el threadpool
+    de los handlers.
+
+    La cola es acotada: si ya hay max_pending trabajos en vuelo, se
+    responde 503 de inmediato en lugar de encolar indefinidamente.
+
+    Si un worker muere (OOM-kill, segfault) el pool queda roto para
+    siempre: se reemplaza por uno nuevo y el trabajo se reintenta una vez;
+    si vuelve a fallar, se hace en este proceso (en el threadpool).
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Executor | None = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.restarts = 0
+
+    def start(self) -> None:
+        with self._lock:
+            if self._executor is None and self.workers > 0:
+                # spawn: no heredamos hilos ni conexiones del proceso padre
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _restart(self, broken: Executor) -> None:
+        with self._lock:
+            if self._executor is not broken:
+                # Otro trabajo que falló a la vez ya lo reemplazó
+                return
+            self._executor = None
+            self.restarts += 1
+        print("Advertencia: el pool de hashing de contraseñas se rompió, se reinicia")
+        broken.shutdown(wait=False, cancel_futures=True)
+        self.start()
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Password service busy, retry shortly",
+                    headers={"Retry-After": "1"},
+                )
+            self._pending += 1
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    async def _run(self, fn, *args):
+        self._acquire()
+        try:
+            self.start()
+            loop = asyncio.get_running_loop()
+            # Con workers=0 se usa el threadpool por defecto (útil en desarrollo)
+            for _ in range(2):
+                executor = self._executor
+                try:
+                    return await loop.run_in_executor(executor, fn, *args)
+                except BrokenProcessPool:
+                    self._restart(executor)
+            # Se rompió también el pool nuevo: en este proceso
+            return await loop.run_in_executor(None, fn, *args)
+        finally:
+            self._release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    async def hash_many(self, passwords: list[str]) -> list[str]:
+        """
+        Hashea un lote repartiéndolo en una tarea por worker (importación
+        masiva), en lugar de un viaje al pool por contraseña.
+        """
+        if not passwords:
+            return []
+        size = -(-len(passwords) // max(self.workers, 1))
+        parts = await asyncio.gather(
+            *(
+                self._run(_hash_batch, passwords[i:i + size])
+                for i in range(0, len(passwords), size)
+            )
+        )
+        return [hashed for part in parts for hashed in part]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "pending": self._pending,
+                "max_pending": self.max_pending,
+                "rejected": self.rejected,
+                "restarts": self.restarts,
+            }
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
@@ -0,0 +1,83 @@
+# app/core/pagination.py
+
+import base64
+import json
+from datetime import datetime
+from typing import Sequence
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import tuple_
+
+
+# Header donde viaja el cursor de la siguiente página (los endpoints siguen
+# devolviendo una lista para no romper a los clientes actuales)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*values) -> str:
+    """
+    Cursor opaco: JSON en base64 url-safe con los valores de la clave
+    de orden de la última fila.
+    """
+    raw = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    data = json.dumps(raw, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: type) -> tuple:
+    """
+    Decodifica un cursor generado por encode_cursor; types indica el tipo
+    de cada valor (datetime o int). Lanza 400 si el cursor no es válido.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(raw, list) or len(raw) != len(types):
+            raise ValueError("cursor length")
+        return tuple(
+            datetime.fromisoformat(v) if t is datetime else t(v)
+            for t, v in zip(types, raw)
+        )
+    except (ValueError, TypeError, UnicodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+
+
+def page_start(skip: int, cursor: str | None, *types: type) -> tuple[int, tuple | None]:
+    """
+    (skip, after) de un listado: con cursor el offset ya no aplica.
+    """
+    if not cursor:
+        return skip, None
+    return 0, decode_cursor(cursor, *types)
+
+
+def apply_keyset(query, order_columns: Sequence, after: tuple | None):
+    """
+    Ordena por order_columns y, si hay cursor, filtra las filas
+    estrictamente posteriores. Sirve tanto para Query como para select().
+    """
+    if after is not None:
+        query = query.filter(tuple_(*order_columns) > tuple_(*after))
+    return query.order_by(*order_columns)
+
+
+def set_next_cursor(
+    response: Response,
+    items: Sequence,
+    limit: int,
+    order_columns: Sequence,
+) -> Sequence:
+    """
+    Si la página vino llena, expone en el header el cursor de la siguiente
+    (los valores de order_columns de la última fila). Devuelve items para
+    poder usarlo directamente en el return.
+    """
+    if items and len(items) >= limit:
+        last = items[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            *(getattr(last, column.key) for column in order_columns)
+        )
+    return items
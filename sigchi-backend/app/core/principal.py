@@ -0,0 +1,209 @@
+# app/core/principal.py
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.db.database import SessionLocal, AsyncSessionLocal
+from app.core.db.models import User, Role, Patient, Doctor
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """
+    Vista ligera del usuario autenticado.
+
+    Se arma con una sola consulta (user + rol + ids de perfil) y es
+    inmutable, de modo que se puede compartir entre requests sin tocar
+    la sesión de base de datos.
+    """
+    id: int
+    email: str
+    is_active: bool
+    role_id: int
+    role_name: Optional[str]
+    patient_id: Optional[int]
+    doctor_id: Optional[int]
+
+
+def _principal_stmt(user_id: int):
+    return (
+        select(
+            User.id,
+            User.email,
+            User.is_active,
+            User.role_id,
+            Role.name,
+            Patient.id,
+            Doctor.id,
+        )
+        .join(Role, Role.id == User.role_id, isouter=True)
+        .join(Patient, Patient.user_id == User.id, isouter=True)
+        .join(Doctor, Doctor.user_id == User.id, isouter=True)
+        .where(User.id == user_id)
+    )
+
+
+def _row_to_principal(row) -> Principal | None:
+    if row is None:
+        return None
+
+    return Principal(
+        id=row[0],
+        email=row[1],
+        is_active=bool(row[2]) if row[2] is not None else True,
+        role_id=row[3],
+        role_name=row[4],
+        patient_id=row[5],
+        doctor_id=row[6],
+    )
+
+
+def load_principal(db: Session, user_id: int) -> Principal | None:
+    """
+    Carga user, nombre de rol, patient_id y doctor_id en un único SELECT.
+    """
+    return _row_to_principal(db.execute(_principal_stmt(user_id)).first())
+
+
+async def async_load_principal(db: AsyncSession, user_id: int) -> Principal | None:
+    result = await db.execute(_principal_stmt(user_id))
+    return _row_to_principal(result.first())
+
+
+# --- Claims firmados (tokens "scoped") ---
+
+def principal_to_claims(principal: Principal) -> dict:
+    """
+    Claims que se embeben en el JWT cuando JWT_SCOPED_CLAIMS está activo,
+    para autorizar sin consultar la base de datos.
+    """
+    return {
+        "email": principal.email,
+        "rid": principal.role_id,
+        "role": principal.role_name,
+        "pid": principal.patient_id,
+        "did": principal.doctor_id,
+    }
+
+
+def principal_from_claims(claims: dict) -> Principal:
+    return Principal(
+        id=int(claims["sub"]),
+        email=claims.get("email"),
+        # Un usuario inactivo no obtiene token, y desactivarlo (o cambiarle
+        # el rol) por PATCH /api/users/{id} revoca los que ya tenía. Un
+        # cambio hecho directo en la base no revoca nada: hay que llamar
+        # también a token_denylist.revoke_user
+        is_active=True,
+        role_id=claims.get("rid"),
+        role_name=claims.get("role"),
+        patient_id=claims.get("pid"),
+        doctor_id=claims.get("did"),
+    )
+
+
+class PrincipalCache:
+    """
+    Cache LRU acotado con TTL, indexado por user id.
+
+    Es seguro entre hilos (los handlers sync corren en el threadpool).
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[int, tuple[float, Principal]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int) -> Principal | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, principal = entry
+            if expires_at <= now:
+                del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return principal
+
+    def set(self, principal: Principal) -> None:
+        if self.max_size <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._entries[principal.id] = (expires_at, principal)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int | None) -> None:
+        if user_id is None:
+            return
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / total) if total else 0.0,
+            }
+
+
+principal_cache = PrincipalCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+
+def _fetch_principal(user_id: int) -> Principal | None:
+    db = SessionLocal()
+    try:
+        return load_principal(db, user_id)
+    finally:
+        db.close()
+
+
+async def resolve_principal(user_id: int) -> Principal | None:
+    """
+    Devuelve el principal desde el cache o lo carga de la base de datos
+    sin bloquear el event loop (sesión async o threadpool según DB_ASYNC).
+    """
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            principal = await async_load_principal(db, user_id)
+    else:
+        principal = await run_in_threadpool(_fetch_principal, user_id)
+
+    if principal is not None:
+        principal_cache.set(principal)
+    return principal
@@ -0,0 +1,188 @@
+# app/core/reminders.py
+
+import importlib
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Iterable, Protocol
+
+from app.core.availability import from_epoch, to_epoch
+from app.core.config import settings
+from app.core.timing_wheel import TimingWheel
+
+
+class Notifier(Protocol):
+    """Destino de los recordatorios (correo, SMS, cola externa...)."""
+
+    def send(self, reminder: dict) -> None:
+        ...
+
+
+class FileNotifier:
+    """Notifier por defecto: una línea JSON por recordatorio."""
+
+    def __init__(self, path: str | None = None):
+        self.path = path or settings.REMINDER_LOG_FILE
+        self._lock = threading.Lock()
+
+    def send(self, reminder: dict) -> None:
+        line = json.dumps(reminder, default=str)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+def load_notifier(spec: str) -> Notifier:
+    """
+    "modulo:atributo" -> notifier. Si el atributo es una clase (o una
+    fábrica) se llama sin argumentos.
+    """
+    module_name, _, attr = spec.partition(":")
+    target = getattr(importlib.import_module(module_name), attr)
+    if isinstance(target, type) or not hasattr(target, "send"):
+        return target()
+    return target
+
+
+class ReminderScheduler:
+    """
+    Recordatorios pendientes de las citas 'scheduled', en una rueda de
+    tiempo: alta, baja y cada tick cuestan O(1) aunque haya millones.
+
+    En memoria solo está la ventana de vencimientos [.., loaded_until),
+    que se va extendiendo mientras corre el reloj; el resto queda en la
+    base de datos y se lee por rango de scheduled_at (índice
+    ix_appointments_scheduled), también al arrancar. Como en BusyIndex,
+    las citas de este worker se aplican al momento (update) y las de los
+    demás se traen por updated_at cada REMINDER_SYNC_SECONDS.
+
+    Cada worker programa todos los recordatorios: al vencer, el envío lo
+    hace el que primero lo registra en reminder_deliveries.
+    """
+
+    def __init__(
+        self,
+        offsets_minutes: Iterable[int],
+        tick_seconds: float,
+        lookahead_seconds: float,
+        grace_seconds: float,
+        sync_seconds: float,
+    ):
+        self.offsets = sorted(set(offsets_minutes))
+        self.tick_seconds = tick_seconds
+        self.lookahead_seconds = lookahead_seconds
+        self.grace_seconds = grace_seconds
+        self.sync_seconds = sync_seconds
+        self._wheel: TimingWheel | None = None
+        self._loaded_until: float | None = None
+        self._synced_at: float | None = None
+        self._lock = threading.Lock()
+
+    # --- Ventana cargada ---
+
+    def window_to_load(self, now: float) -> tuple[float, float] | None:
+        """
+        Vencimientos [start, end) que falta cargar de la base de datos, o
+        None si la ventana todavía alcanza.
+        """
+        if self._loaded_until is None:
+            return now - self.grace_seconds, now + self.lookahead_seconds
+        if self._loaded_until - now < self.lookahead_seconds / 2:
+            return self._loaded_until, now + self.lookahead_seconds
+        return None
+
+    def scheduled_range(self, start: float, end: float) -> tuple[datetime, datetime]:
+        """Citas [desde, hasta) con algún recordatorio que vence en [start, end)."""
+        return (
+            from_epoch(int(start) + self.offsets[0] * 60),
+            from_epoch(int(end) + 1 + self.offsets[-1] * 60),
+        )
+
+    def load(self, rows, start: float, end: float, started_at: float) -> None:
+        """
+        rows: (appointment_id, scheduled_at) de las citas 'scheduled' dentro
+        de scheduled_range(start, end), leídas a partir de started_at.
+        """
+        with self._lock:
+            if self._wheel is None:
+                self._wheel = TimingWheel(self.tick_seconds, started_at)
+            for appointment_id, scheduled_at in rows:
+                at = to_epoch(scheduled_at)
+                for offset in self.offsets:
+                    due = at - offset * 60
+                    if start <= due < end:
+                        self._wheel.add((appointment_id, offset), due, at)
+            self._loaded_until = end
+            if self._synced_at is None:
+                self._synced_at = started_at
+
+    # --- Cambios ---
+
+    def changes_since(self) -> datetime | None:
+        # Igual que BusyIndex.changes_since
+        if self._synced_at is None or time.time() - self._synced_at < self.sync_seconds:
+            return None
+        return from_epoch(self._synced_at - settings.SYNC_MARGIN_SECONDS)
+
+    def apply_changes(self, rows, started_at: float) -> None:
+        """rows: (appointment_id, scheduled_at, status) modificadas desde changes_since()."""
+        with self._lock:
+            for appointment_id, scheduled_at, status in rows:
+                self._apply(appointment_id, scheduled_at, status)
+            self._synced_at = started_at
+
+    def update(self, appointment) -> None:
+        """
+        Refleja una cita ya confirmada por este worker: alta o cambio de
+        horario (se reprograman) y cancelación (se descartan).
+        """
+        with self._lock:
+            self._apply(appointment.id, appointment.scheduled_at, appointment.status)
+
+    def _apply(self, appointment_id: int, scheduled_at, status: str) -> None:
+        if self._wheel is None:
+            # Todavía no se cargó: la carga inicial ya la verá
+            return
+        at = to_epoch(scheduled_at)
+        oldest = time.time() - self.grace_seconds
+        for offset in self.offsets:
+            key = (appointment_id, offset)
+            due = at - offset * 60
+            if status == "scheduled" and oldest <= due < self._loaded_until:
+                self._wheel.add(key, due, at)
+            else:
+                self._wheel.remove(key)
+
+    # --- Reloj ---
+
+    def advance(self, now: float) -> list[tuple[tuple[int, int], int]]:
+        """((appointment_id, offset_minutes), scheduled_at epoch) vencidos hasta `now`."""
+        with self._lock:
+            if self._wheel is None:
+                return []
+            return self._wheel.advance(now)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._wheel = None
+            self._loaded_until = None
+            self._synced_at = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pending": len(self._wheel) if self._wheel is not None else 0,
+                "loaded_until": from_epoch(int(self._loaded_until)) if self._loaded_until else None,
+                "offsets_minutes": self.offsets,
+            }
+
+
+# Se carga al arrancar (app.main) y se actualiza desde los servicios de citas
+reminder_scheduler = ReminderScheduler(
+    offsets_minutes=settings.REMINDER_OFFSETS_MINUTES,
+    tick_seconds=settings.REMINDER_TICK_SECONDS,
+    lookahead_seconds=settings.REMINDER_LOOKAHEAD_HOURS * 3600,
+    grace_seconds=settings.REMINDER_GRACE_MINUTES * 60,
+    sync_seconds=settings.REMINDER_SYNC_SECONDS,
+)
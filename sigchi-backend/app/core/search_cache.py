@@ -0,0 +1,105 @@
+# app/core/search_cache.py
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from app.core.config import settings
+
+
+class PrefixResultCache:
+    """
+    Cache LRU con TTL de resultados de autocompletado, indexado por la
+    consulta normalizada.
+
+    Al escribir "1", "12", "123"... cada consulta suele ser un refinamiento
+    de la anterior: si un prefijo ya está en cache y su resultado vino
+    completo (menos filas que el límite), la consulta nueva se responde
+    filtrando ese resultado en memoria, sin ir a la base de datos.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        # consulta -> (expira, límite usado, filas)
+        self._entries: OrderedDict[str, tuple[float, int, list]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.prefix_hits = 0
+        self.misses = 0
+
+    def _entry(self, key: str, now: float):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get(
+        self,
+        key: str,
+        limit: int,
+        refine: Optional[Callable[[list], list]] = None,
+    ) -> list | None:
+        """
+        refine(filas_del_prefijo) -> filas de key. Solo se usa si el
+        resultado de key es un subconjunto del de cualquier prefijo suyo.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entry(key, now)
+            # Sirve si se pidió al menos lo mismo o si ya estaba completo
+            if entry is not None and (entry[1] >= limit or len(entry[2]) < entry[1]):
+                self.hits += 1
+                return entry[2][:limit]
+
+            if refine is not None:
+                for end in range(len(key) - 1, 0, -1):
+                    parent = self._entry(key[:end], now)
+                    if parent is not None and len(parent[2]) < parent[1]:
+                        rows = refine(parent[2])
+                        self._store(key, parent[0], parent[1], rows)
+                        self.prefix_hits += 1
+                        return rows[:limit]
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, limit: int, rows: list) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._store(key, time.monotonic() + self.ttl_seconds, limit, rows)
+
+    def _store(self, key: str, expires_at: float, limit: int, rows: list) -> None:
+        self._entries[key] = (expires_at, limit, rows)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "prefix_hits": self.prefix_hits,
+                "misses": self.misses,
+            }
+
+
+# Se vacía en cada alta/edición/baja de pacientes; entre workers, el TTL
+# acota cuánto puede durar un resultado desactualizado
+patient_search_cache = PrefixResultCache(
+    max_size=settings.PATIENT_SEARCH_CACHE_MAX_SIZE,
+    ttl_seconds=settings.PATIENT_SEARCH_CACHE_TTL_SECONDS,
+)
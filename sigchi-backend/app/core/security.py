@@ -1,36 +1,18 @@
 # app/core/security.py
 
+import uuid
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Sequence, Callable
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app.core.db.database import get_db
-from app.core.db.models import User
-from passlib.context import CryptContext
-
-
-
-# Usamos pbkdf2_sha256 en lugar de bcrypt
-pwd_context = CryptContext(
-    schemes=["pbkdf2_sha256"],
-    deprecated="auto",
-)
-
-
-# --- Password hashing ---
-
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
-
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+from app.core.hashing import get_password_hash, verify_password, password_hasher
+from app.core.principal import Principal, resolve_principal, principal_from_claims
+from app.core.token_cache import token_cache
+from app.core.token_denylist import token_denylist
 
 
 # Endpoint donde se obtendrá el token
@@ -46,7 +28,8 @@ def create_access_token(
     expire = datetime.now(timezone.utc) + (
         expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     )
-    to_encode.update({"exp": expire})
+    # jti identifica el token para poder revocarlo (logout)
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(
         to_encode,
         settings.SECRET_KEY,
@@ -55,10 +38,40 @@ def create_access_token(
     return encoded_jwt
 
 
+def decode_access_token(token: str) -> tuple[int, dict]:
+    """
+    Verifica el token (con cache) y la denylist.
+    Devuelve (user_id, claims) o lanza JWTError.
+    """
+    payload = token_cache.decode(token)
+    user_id = payload.get("sub")
+    if user_id is None:
+        raise JWTError("Token sin sub")
+    try:
+        # jose devuelve normalmente str, lo convertimos a int
+        user_id = int(user_id)
+    except ValueError:
+        raise JWTError("sub invalido")
+
+    if token_denylist.is_revoked(payload):
+        raise JWTError("Token revocado")
+    return user_id, payload
+
+
+def principal_from_token_claims(payload: dict) -> Principal | None:
+    """
+    Con JWT_SCOPED_CLAIMS activo, el rol y los ids de perfil vienen
+    firmados en el token y no hace falta consultar la base de datos.
+    """
+    if settings.JWT_SCOPED_CLAIMS and "role" in payload:
+        return principal_from_claims(payload)
+    return None
+
+
 async def get_current_user(
+    request: Request,
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
-) -> User:
+) -> Principal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -66,33 +79,28 @@ async def get_current_user(
     )
 
     try:
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM],
-        )
-        user_id = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-        # jose devuelve normalmente str, lo convertimos a int
-        user_id = int(user_id)
-    except (JWTError, ValueError):
+        user_id, payload = decode_access_token(token)
+    except JWTError:
         raise credentials_exception
 
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
+    principal = principal_from_token_claims(payload)
+    if principal is None:
+        # Una sola consulta (o ninguna si está en cache) para user, rol y perfiles
+        principal = await resolve_principal(user_id)
+    if principal is None:
         raise credentials_exception
 
-    return user
+    # La sesión de BD lo usa para la ventana read-your-writes
+    request.state.principal = principal
+    return principal
 
-def get_current_active_user(
-    current_user: User = Depends(get_current_user),
-) -> User:
+async def get_current_active_user(
+    current_user: Principal = Depends(get_current_user),
+) -> Principal:
     """
     Verifica que el usuario esté marcado como activo.
     """
-    # Asumimos que User tiene is_active (lo comentaste en el modelo).
-    if not getattr(current_user, "is_active", True):
+    if not current_user.is_active:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Inactive user",
@@ -111,11 +119,8 @@ def require_roles(allowed_roles: Sequence[str]) -> Callable:
         - "doctor"
         - "patient"
     """
-    def dependency(current_user: User = Depends(get_current_active_user)) -> User:
-        role = getattr(current_user, "role", None)
-        role_name = getattr(role, "name", None)
-
-        if role_name not in allowed_roles:
+    async def dependency(current_user: Principal = Depends(get_current_active_user)) -> Principal:
+        if current_user.role_name not in allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Insufficient permissions",
@@ -125,13 +130,10 @@ def require_roles(allowed_roles: Sequence[str]) -> Callable:
     return dependency
 
 
-def get_current_admin_user(
-    current_user: User = Depends(get_current_active_user),
-) -> User:
-    role = getattr(current_user, "role", None)
-    role_name = getattr(role, "name", None)
-
-    if role_name != "admin":
+async def get_current_admin_user(
+    current_user: Principal = Depends(get_current_active_user),
+) -> Principal:
+    if current_user.role_name != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Admins only",
@@ -139,13 +141,10 @@ def get_current_admin_user(
     return current_user
 
 
-def get_current_doctor_user(
-    current_user: User = Depends(get_current_active_user),
-) -> User:
-    role = getattr(current_user, "role", None)
-    role_name = getattr(role, "name", None)
-
-    if role_name != "doctor":
+async def get_current_doctor_user(
+    current_user: Principal = Depends(get_current_active_user),
+) -> Principal:
+    if current_user.role_name != "doctor":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Doctors only",
@@ -153,13 +152,10 @@ def get_current_doctor_user(
     return current_user
 
 
-def get_current_patient_user(
-    current_user: User = Depends(get_current_active_user),
-) -> User:
-    role = getattr(current_user, "role", None)
-    role_name = getattr(role, "name", None)
-
-    if role_name != "patient":
+async def get_current_patient_user(
+    current_user: Principal = Depends(get_current_active_user),
+) -> Principal:
+    if current_user.role_name != "patient":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Patients only",
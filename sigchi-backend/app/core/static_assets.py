@@ -0,0 +1,131 @@
+# app/core/static_assets.py
+
+import gzip
+import hashlib
+import mimetypes
+import threading
+from pathlib import Path
+
+from fastapi import Request, Response, status
+
+from app.core.config import settings
+from app.core.etag import etag_matches
+
+try:  # brotli es opcional: sin él se sirve gzip
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Las vistas HTML no referencian otros archivos (scripts y estilos van
+# inline) y dependen del login: siempre se revalidan con el ETag
+REVALIDATE = "no-cache"
+
+# Orden de preferencia cuando el cliente acepta varias
+ENCODINGS = ("br", "gzip")
+
+
+class StaticAsset:
+    """
+    Un archivo del frontend ya leído y comprimido: cada variante (sin
+    comprimir, gzip, br) queda en memoria y se envía tal cual.
+    """
+
+    def __init__(self, name: str, data: bytes, gzip_level: int, brotli_quality: int):
+        self.name = name
+        self.media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        if self.media_type.startswith("text/"):
+            self.media_type += "; charset=utf-8"
+        digest = hashlib.sha256(data).hexdigest()
+        self.etag = f'W/"{digest[:32]}"'
+
+        self.variants: dict[str, bytes] = {"identity": data}
+        compressed = {"gzip": gzip.compress(data, compresslevel=gzip_level, mtime=0)}
+        if brotli is not None:
+            compressed["br"] = brotli.compress(data, quality=brotli_quality)
+        for encoding, body in compressed.items():
+            # Solo si ahorra algo (imágenes y archivos ya comprimidos no)
+            if len(body) < len(data):
+                self.variants[encoding] = body
+
+
+def accepted_encodings(header: str) -> set[str]:
+    """Codificaciones de Accept-Encoding con q > 0 ("*" cuenta para todas)."""
+    accepted = set()
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding and q > 0:
+            accepted.add(coding)
+    if "*" in accepted:
+        accepted.update(ENCODINGS)
+    return accepted
+
+
+class StaticAssets:
+    """
+    Frontend estático en memoria. Se carga al arrancar: cada archivo se
+    lee, se le calcula el ETag y se precomprime una sola vez; por request solo se elige la variante según Accept-Encoding.
+    """
+
+    def __init__(self, gzip_level: int, brotli_quality: int):
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self._assets: dict[str, StaticAsset] = {}
+        self._lock = threading.Lock()
+
+    def load(self, directory: Path) -> None:
+        assets = {}
+        for path in sorted(directory.rglob("*")):
+            if path.is_file():
+                name = path.relative_to(directory).as_posix()
+                assets[name] = StaticAsset(
+                    name, path.read_bytes(), self.gzip_level, self.brotli_quality
+                )
+        with self._lock:
+            self._assets = assets
+
+    def response(self, request: Request, name: str) -> Response:
+        asset = self._assets.get(name)
+        if asset is None:
+            return Response(status_code=status.HTTP_404_NOT_FOUND)
+
+        headers = {
+            "ETag": asset.etag,
+            "Cache-Control": REVALIDATE,
+            "Vary": "Accept-Encoding",
+        }
+        if etag_matches(request, asset.etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        accepted = accepted_encodings(request.headers.get("accept-encoding", ""))
+        for encoding in ENCODINGS:
+            if encoding in accepted and encoding in asset.variants:
+                headers["Content-Encoding"] = encoding
+                body = asset.variants[encoding]
+                break
+        else:
+            body = asset.variants["identity"]
+        return Response(content=body, media_type=asset.media_type, headers=headers)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                name: {encoding: len(body) for encoding, body in asset.variants.items()}
+                for name, asset in self._assets.items()
+            }
+
+
+# Se carga en el arranque (app.main) desde frontend/
+static_assets = StaticAssets(
+    gzip_level=settings.STATIC_GZIP_LEVEL,
+    brotli_quality=settings.STATIC_BROTLI_QUALITY,
+)
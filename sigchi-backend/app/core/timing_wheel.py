@@ -0,0 +1,100 @@
+# app/core/timing_wheel.py
+
+from typing import Any, Hashable
+
+
+class TimingWheel:
+    """
+    Rueda de tiempo jerárquica (Varghese & Lauck): `levels` ruedas de
+    `slots` casillas; una casilla del nivel i abarca slots**i ticks.
+
+    Un timer va al nivel más bajo cuyo "bloque" actual contiene su
+    vencimiento; cuando el reloj entra en ese bloque se redistribuye a
+    niveles inferiores (cada timer baja como mucho `levels` veces). Alta,
+    baja y cada tick cuestan O(1) sin importar cuántos timers haya
+    pendientes; lo que vence más allá del último nivel espera en
+    `_overflow` y se reubica en cada vuelta completa.
+
+    No es thread-safe: quien la usa toma su propio lock.
+    """
+
+    def __init__(self, tick_seconds: float, start: float, slots: int = 64, levels: int = 4):
+        self.tick_seconds = tick_seconds
+        self.slots = slots
+        self.levels = levels
+        self._spans = [slots ** i for i in range(levels + 1)]
+        self._wheels: list[list[dict]] = [[{} for _ in range(slots)] for _ in range(levels)]
+        self._overflow: dict = {}
+        # Vencidos al darlos de alta: salen en el próximo advance()
+        self._ready: dict = {}
+        # key -> casilla donde está, para dar de baja en O(1)
+        self._where: dict[Hashable, dict] = {}
+        self._current = int(start // tick_seconds)
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._where
+
+    def add(self, key: Hashable, due: float, payload: Any = None) -> None:
+        """Programa (o reprograma) `key` para `due` (epoch)."""
+        self.remove(key)
+        tick = int(due // self.tick_seconds)
+        if tick <= self._current:
+            self._ready[key] = (tick, payload)
+            self._where[key] = self._ready
+        else:
+            self._place(key, tick, payload)
+
+    def remove(self, key: Hashable) -> bool:
+        bucket = self._where.pop(key, None)
+        if bucket is None:
+            return False
+        del bucket[key]
+        return True
+
+    def advance(self, now: float) -> list[tuple[Hashable, Any]]:
+        """Avanza el reloj hasta `now` y devuelve los (key, payload) vencidos."""
+        expired = [(key, payload) for key, (_, payload) in self._ready.items()]
+        self._ready.clear()
+        target = int(now // self.tick_seconds)
+        while self._current < target:
+            self._current += 1
+            self._cascade()
+            bucket = self._wheels[0][self._current % self.slots]
+            if bucket:
+                expired.extend((key, payload) for key, (_, payload) in bucket.items())
+                bucket.clear()
+        for key, _ in expired:
+            del self._where[key]
+        return expired
+
+    def _place(self, key: Hashable, tick: int, payload: Any) -> None:
+        # tick >= _current: al redistribuir, lo que vence en el tick actual
+        # cae en la casilla del nivel 0 que se vacía a continuación
+        bucket = self._overflow
+        for level in range(self.levels):
+            # Mismo bloque del nivel superior que el reloj actual
+            if tick // self._spans[level + 1] == self._current // self._spans[level + 1]:
+                bucket = self._wheels[level][(tick // self._spans[level]) % self.slots]
+                break
+        bucket[key] = (tick, payload)
+        self._where[key] = bucket
+
+    def _cascade(self) -> None:
+        # De arriba hacia abajo: lo que baja de un nivel puede volver a
+        # bajar en el mismo tick
+        if self._current % self._spans[self.levels] == 0 and self._overflow:
+            self._replace(self._overflow)
+        for level in range(self.levels - 1, 0, -1):
+            if self._current % self._spans[level] == 0:
+                bucket = self._wheels[level][(self._current // self._spans[level]) % self.slots]
+                if bucket:
+                    self._replace(bucket)
+
+    def _replace(self, bucket: dict) -> None:
+        entries = list(bucket.items())
+        bucket.clear()
+        for key, (tick, payload) in entries:
+            self._place(key, tick, payload)
@@ -0,0 +1,128 @@
+# app/core/token_cache.py
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from jose import jwt
+
+from app.core.config import settings
+
+
+def token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+class VerifiedTokenCache:
+    """
+    Cache acotado (LRU) de tokens ya verificados: digest del token -> claims.
+
+    Una entrada vale hasta el exp del propio token. Guardamos solo el
+    digest, nunca el token en claro. Lleva métricas del tiempo de decode
+    que se ahorra con cada hit.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+        self._by_user: dict[str, set[bytes]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.decode_seconds = 0.0
+
+    def _drop(self, digest: bytes) -> None:
+        entry = self._entries.pop(digest, None)
+        if entry is None:
+            return
+        sub = entry[1].get("sub")
+        digests = self._by_user.get(sub)
+        if digests is not None:
+            digests.discard(digest)
+            if not digests:
+                del self._by_user[sub]
+
+    def _get(self, digest: bytes) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, claims = entry
+            if expires_at <= time.time():
+                self._drop(digest)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return claims
+
+    def _set(self, digest: bytes, claims: dict) -> None:
+        exp = claims.get("exp")
+        if self.max_size <= 0 or exp is None:
+            return
+        with self._lock:
+            self._drop(digest)
+            self._entries[digest] = (float(exp), claims)
+            sub = claims.get("sub")
+            if sub is not None:
+                self._by_user.setdefault(sub, set()).add(digest)
+            while len(self._entries) > self.max_size:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+
+    def decode(self, token: str) -> dict:
+        """
+        Igual que jwt.decode, pero reutiliza la verificación previa del
+        mismo token. Lanza JWTError si el token no es válido.
+        """
+        digest = token_digest(token)
+        claims = self._get(digest)
+        if claims is not None:
+            return claims
+
+        start = time.perf_counter()
+        try:
+            claims = jwt.decode(
+                token,
+                settings.SECRET_KEY,
+                algorithms=[settings.ALGORITHM],
+            )
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.decode_seconds += elapsed
+        self._set(digest, claims)
+        return claims
+
+    # --- Hooks de revocación (logout, desactivación de usuario) ---
+
+    def revoke_token(self, token: str) -> None:
+        with self._lock:
+            self._drop(token_digest(token))
+
+    def revoke_user(self, user_id: int) -> None:
+        with self._lock:
+            for digest in list(self._by_user.get(str(user_id), ())):
+                self._drop(digest)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            avg_decode = (self.decode_seconds / self.misses) if self.misses else 0.0
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "avg_decode_us": avg_decode * 1e6,
+                "decode_seconds_saved": avg_decode * self.hits,
+            }
+
+
+token_cache = VerifiedTokenCache(max_size=settings.TOKEN_CACHE_MAX_SIZE)
@@ -0,0 +1,192 @@
+# app/core/token_denylist.py
+
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.db.models import User, TokenRevocation
+from app.core.token_cache import token_cache
+
+
+class TokenDenylist:
+    """
+    Denylist compacta de tokens revocados.
+
+    La fuente de verdad es la tabla token_revocations; cada worker mantiene
+    en memoria un dict jti -> exp y otro user_id -> versión mínima, y los
+    sincroniza de forma incremental (created_at posterior al último sync,
+    con margen). La comprobación por request es O(1) y no toca la base de
+    datos.
+    """
+
+    def __init__(self):
+        self._jtis: dict[str, float] = {}
+        self._min_versions: dict[int, tuple[int, float]] = {}
+        self._synced_at: float | None = None
+        self._lock = threading.Lock()
+
+    def is_revoked(self, claims: dict) -> bool:
+        jti = claims.get("jti")
+        if jti is not None and jti in self._jtis:
+            return True
+        entry = self._min_versions.get(int(claims["sub"]))
+        if entry is not None and claims.get("ver", 0) < entry[0]:
+            return True
+        return False
+
+    def _apply(
+        self,
+        jti: str | None,
+        user_id: int | None,
+        min_version: int | None,
+        expires_at: datetime,
+    ) -> None:
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        exp = expires_at.timestamp()
+        if jti is not None:
+            self._jtis[jti] = exp
+        if user_id is not None and min_version is not None:
+            current = self._min_versions.get(user_id)
+            if current is None or current[0] < min_version:
+                self._min_versions[user_id] = (min_version, exp)
+
+    def _prune(self) -> None:
+        now = time.time()
+        self._jtis = {jti: exp for jti, exp in self._jtis.items() if exp > now}
+        self._min_versions = {
+            uid: entry for uid, entry in self._min_versions.items() if entry[1] > now
+        }
+
+    def sync(self, db: Session) -> None:
+        """
+        Trae las revocaciones nuevas (emitidas por cualquier worker).
+
+        No se usa el id como cursor: una transacción con un id menor puede
+        confirmarse después de que ya se leyó uno mayor, y esa revocación
+        se perdería. Se relee por created_at desde el sync anterior menos
+        settings.SYNC_MARGIN_SECONDS (como BusyIndex); aplicar dos veces la
+        misma fila no cambia nada.
+        """
+        started_at = time.time()
+        stmt = select(TokenRevocation).where(
+            TokenRevocation.expires_at > datetime.now(timezone.utc)
+        )
+        if self._synced_at is not None:
+            since = datetime.fromtimestamp(
+                self._synced_at - settings.SYNC_MARGIN_SECONDS, timezone.utc
+            )
+            stmt = stmt.where(TokenRevocation.created_at >= since)
+        rows = db.execute(stmt).scalars().all()
+        with self._lock:
+            for row in rows:
+                self._apply(row.jti, row.user_id, row.min_version, row.expires_at)
+            self._synced_at = started_at
+            self._prune()
+
+    def purge_expired(self, db: Session) -> None:
+        db.execute(
+            delete(TokenRevocation).where(
+                TokenRevocation.expires_at <= datetime.now(timezone.utc)
+            )
+        )
+        db.commit()
+
+    def revoke_jti(self, db: Session, jti: str, expires_at: datetime) -> None:
+        """
+        Revoca un token concreto (logout) hasta su expiración.
+        """
+        db.add(TokenRevocation(jti=jti, expires_at=expires_at))
+        db.commit()
+        with self._lock:
+            self._apply(jti, None, None, expires_at)
+
+    def revoke_user(self, db: Session, user_id: int) -> int:
+        """
+        Sube token_version del usuario: todos sus tokens anteriores quedan
+        inválidos. Devuelve la nueva versión.
+        """
+        db.execute(_bump_version_stmt(user_id))
+        new_version = db.execute(_version_stmt(user_id)).scalar_one()
+        expires_at = _version_revocation_expiry()
+        db.add(
+            TokenRevocation(
+                user_id=user_id,
+                min_version=new_version,
+                expires_at=expires_at,
+            )
+        )
+        db.commit()
+        self._user_revoked(user_id, new_version, expires_at)
+        return new_version
+
+    def revoke_users(self, db: Session, user_ids: list[int]) -> None:
+        """
+        revoke_user para muchos usuarios a la vez (importación masiva):
+        un UPDATE, un SELECT y un único commit.
+        """
+        if not user_ids:
+            return
+        db.execute(
+            update(User)
+            .where(User.id.in_(user_ids))
+            .values(token_version=User.token_version + 1)
+        )
+        versions = db.execute(
+            select(User.id, User.token_version).where(User.id.in_(user_ids))
+        ).all()
+        expires_at = _version_revocation_expiry()
+        db.add_all(
+            TokenRevocation(user_id=uid, min_version=version, expires_at=expires_at)
+            for uid, version in versions
+        )
+        db.commit()
+        for uid, version in versions:
+            self._user_revoked(uid, version, expires_at)
+
+    async def async_revoke_user(self, db: AsyncSession, user_id: int) -> int:
+        await db.execute(_bump_version_stmt(user_id))
+        new_version = (await db.execute(_version_stmt(user_id))).scalar_one()
+        expires_at = _version_revocation_expiry()
+        db.add(
+            TokenRevocation(
+                user_id=user_id,
+                min_version=new_version,
+                expires_at=expires_at,
+            )
+        )
+        await db.commit()
+        self._user_revoked(user_id, new_version, expires_at)
+        return new_version
+
+    def _user_revoked(self, user_id: int, new_version: int, expires_at: datetime) -> None:
+        with self._lock:
+            self._apply(None, user_id, new_version, expires_at)
+        token_cache.revoke_user(user_id)
+
+
+def _bump_version_stmt(user_id: int):
+    return (
+        update(User)
+        .where(User.id == user_id)
+        .values(token_version=User.token_version + 1)
+    )
+
+
+def _version_stmt(user_id: int):
+    return select(User.token_version).where(User.id == user_id)
+
+
+def _version_revocation_expiry() -> datetime:
+    # Ningún token anterior sobrevive más allá de su tiempo de vida
+    return datetime.now(timezone.utc) + timedelta(
+        minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
+    )
+
+
+token_denylist = TokenDenylist()
@@ -1,30 +1,71 @@
+import asyncio
+import time
 from pathlib import Path
 
+import anyio
+
 from fastapi import FastAPI, Request
-from fastapi.responses import FileResponse, RedirectResponse, Response
-from fastapi.staticfiles import StaticFiles
-from jose import jwt, JWTError
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi.responses import RedirectResponse, Response
+from jose import JWTError
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from sqlalchemy.orm import Session
-from app.core.db.database import Base, engine, SessionLocal
+from sqlalchemy.schema import CreateIndex
+from app.core.db.database import Base, engine, SessionLocal, async_engine
 from app.core.db.models import User, Role
-from app.core.security import get_password_hash
+from app.core.db.booking import ensure_booking_guard
+from app.core.db.columns import ensure_columns
+from app.core.db.fulltext import ensure_fulltext
+from app.core.compression import CompressionMiddleware
+from app.core.etag import ETAG_HEADER
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.principal import Principal, resolve_principal
+from app.core.reminders import reminder_scheduler
+from app.core.static_assets import static_assets
+from app.core.security import (
+    get_password_hash,
+    password_hasher,
+    decode_access_token,
+    principal_from_token_claims,
+)
+from app.core.token_denylist import token_denylist
 from app.core.config import settings
-from app.routers import users, auth, patients, doctors, appointments, clinical_histories
+from app.routers import users, auth, patients, doctors, appointments, clinical_histories, admin
+from app.routers import async_patients, async_doctors, async_appointments, async_clinical_histories
+from app.routers import imports, exports, stats, events
+from app.services import reminder_service
 from fastapi.middleware.cors import CORSMiddleware  # Importa CORSMiddleware
 
 # Rutas del frontend estatico
 BASE_DIR = Path(__file__).resolve().parent.parent
 FRONTEND_DIR = BASE_DIR / "frontend"
-LOGIN_FILE = FRONTEND_DIR / "login.html"
-ADMIN_FILE = FRONTEND_DIR / "admin.html"
-DOCTOR_FILE = FRONTEND_DIR / "doctor.html"
-PATIENT_FILE = FRONTEND_DIR / "patient.html"
+LOGIN_FILE = "login.html"
+ADMIN_FILE = "admin.html"
+DOCTOR_FILE = "doctor.html"
+PATIENT_FILE = "patient.html"
 
 # Crear las tablas en la base de datos
 Base.metadata.create_all(bind=engine)
 
+# ...y agregar las columnas nuevas a las que ya existían (users.token_version)
+for added_column in ensure_columns(engine, Base.metadata):
+    print(f"Columna agregada: {added_column}")
+
+# create_all no agrega índices nuevos a tablas que ya existían.
+# IF NOT EXISTS en lugar de checkfirst: la reflexión de SQLite no ve los
+# índices sobre expresiones (lower(col)) y los intentaría crear de nuevo
+with engine.begin() as conn:
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            conn.execute(CreateIndex(index, if_not_exists=True))
+
+# Estructuras de búsqueda de texto completo (tsvector / FTS5)
+ensure_fulltext(engine)
+
+# Restricción de no solapamiento de citas (o el lock que la reemplaza)
+ensure_booking_guard(engine)
+
 app = FastAPI(
     title="SIGCHI Backend",
     version="0.1.0",
@@ -37,10 +78,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Permite cualquier método HTTP (GET, POST, PUT, DELETE, etc.)
     allow_headers=["*"],  # Permite cualquier encabezado
+    expose_headers=[NEXT_CURSOR_HEADER, ETAG_HEADER],  # Cursor keyset y revalidación
 )
 
-# Servir archivos estaticos del frontend
-app.mount("/frontend", StaticFiles(directory=str(FRONTEND_DIR)), name="frontend")
+# Comprimir las respuestas grandes de la API (listados, exportaciones)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    encodings=settings.COMPRESSION_ENCODINGS,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+    zstd_level=settings.COMPRESSION_ZSTD_LEVEL,
+)
+
+# Servir archivos estaticos del frontend: precomprimidos en memoria
+# (static_assets), con ETag
+@app.get("/frontend/{name:path}", include_in_schema=False)
+async def serve_frontend(name: str, request: Request):
+    return static_assets.response(request, name)
 
 # --- Middleware de autenticacion para vistas HTML ---
 
@@ -61,63 +116,63 @@ def extract_token(request: Request) -> str | None:
     return None
 
 
-def resolve_user(token: str) -> tuple[User, str]:
+async def resolve_user(token: str) -> tuple[Principal, str | None]:
     """
     Decodifica el token JWT y recupera el usuario y su rol.
+    Usa el cache de principals y, si no está, consulta la BD sin bloquear el event loop.
     """
-    payload = jwt.decode(
-        token,
-        settings.SECRET_KEY,
-        algorithms=[settings.ALGORITHM],
-    )
-    user_id = payload.get("sub")
-    if user_id is None:
-        raise JWTError("Token sin sub")
-    user_id = int(user_id)
-    db = SessionLocal()
-    try:
-        user = db.query(User).filter(User.id == user_id).first()
-        if not user:
-            raise JWTError("Usuario no encontrado")
-        role = getattr(user, "role", None)
-        role_name = getattr(role, "name", None)
-        return user, role_name
-    finally:
-        db.close()
+    user_id, payload = decode_access_token(token)
+
+    principal = principal_from_token_claims(payload)
+    if principal is not None:
+        return principal, principal.role_name
+
+    principal = await resolve_principal(user_id)
+    if principal is None:
+        raise JWTError("Usuario no encontrado")
+    return principal, principal.role_name
 
 
-class AuthHTMLMiddleware(BaseHTTPMiddleware):
+class AuthHTMLMiddleware:
     """
     Protege las rutas HTML por rol. Usa el token (header Authorization o cookie access_token)
     y redirige a /login si falta o no cumple el rol.
-    """
-    async def dispatch(self, request: Request, call_next):
-        path = request.url.path.rstrip("/") or "/"
 
-        # No proteger rutas de API ni estaticos ni docs
-        if path.startswith("/api") or path.startswith("/frontend") or path.startswith("/docs") or path.startswith("/openapi") or path.startswith("/redoc"):
-            return await call_next(request)
+    Middleware ASGI puro: cualquier ruta que no sea una vista HTML protegida
+    (API, estaticos, docs) pasa directo sin envolver la respuesta.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
 
-        # rutas publicas
-        if path in {"/", "/login"}:
-            return await call_next(request)
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
+        path = scope["path"].rstrip("/") or "/"
         allowed_roles = PROTECTED_HTML.get(path)
-        if allowed_roles:
-            token = extract_token(request)
-            if not token:
-                return RedirectResponse(url="/login", status_code=302)
-            try:
-                user, role_name = resolve_user(token)
-            except JWTError:
-                return RedirectResponse(url="/login", status_code=302)
-
-            if role_name not in allowed_roles:
-                return RedirectResponse(url="/login", status_code=302)
-            request.state.user = user
-            request.state.role_name = role_name
-
-        return await call_next(request)
+        if not allowed_roles:
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope)
+        token = extract_token(request)
+        if not token:
+            await RedirectResponse(url="/login", status_code=302)(scope, receive, send)
+            return
+        try:
+            user, role_name = await resolve_user(token)
+        except JWTError:
+            await RedirectResponse(url="/login", status_code=302)(scope, receive, send)
+            return
+
+        if role_name not in allowed_roles:
+            await RedirectResponse(url="/login", status_code=302)(scope, receive, send)
+            return
+        request.state.user = user
+        request.state.role_name = role_name
+
+        await self.app(scope, receive, send)
 
 
 app.add_middleware(AuthHTMLMiddleware)
@@ -130,23 +185,23 @@ async def serve_root():
 
 
 @app.get("/login", include_in_schema=False)
-async def serve_login():
-    return FileResponse(LOGIN_FILE)
+async def serve_login(request: Request):
+    return static_assets.response(request, LOGIN_FILE)
 
 
 @app.get("/admin", include_in_schema=False)
-async def serve_admin():
-    return FileResponse(ADMIN_FILE)
+async def serve_admin(request: Request):
+    return static_assets.response(request, ADMIN_FILE)
 
 
 @app.get("/doctor", include_in_schema=False)
-async def serve_doctor():
-    return FileResponse(DOCTOR_FILE)
+async def serve_doctor(request: Request):
+    return static_assets.response(request, DOCTOR_FILE)
 
 
 @app.get("/patient", include_in_schema=False)
-async def serve_patient():
-    return FileResponse(PATIENT_FILE)
+async def serve_patient(request: Request):
+    return static_assets.response(request, PATIENT_FILE)
 
 
 @app.get("/favicon.ico", include_in_schema=False)
@@ -204,9 +259,92 @@ def create_admin_user(db: Session):
 # Llamar a las funciones de inicialización al iniciar la aplicación
 @app.on_event("startup")
 def on_startup():
+    static_assets.load(FRONTEND_DIR)  # Leer y precomprimir el frontend
     db: Session = SessionLocal()  # Obtener la sesión de la base de datos
     create_admin_role(db)  # Crear el rol admin si no existe
     create_admin_user(db)  # Crear el usuario admin si no existe
+    password_hasher.start()  # Levantar el pool de procesos de hashing
+    token_denylist.purge_expired(db)  # Borrar revocaciones ya vencidas
+    token_denylist.sync(db)  # Cargar tokens revocados vigentes
+    if settings.REMINDERS_ENABLED:
+        # Recordatorios que vencen en las próximas horas (y los recién vencidos)
+        reminder_service.refresh(db, reminder_scheduler)
+    db.close()
+
+
+def _sync_token_denylist():
+    db = SessionLocal()
+    try:
+        token_denylist.sync(db)
+    finally:
+        db.close()
+
+
+async def _token_denylist_sync_loop():
+    # Trae revocaciones hechas por otros workers
+    while True:
+        await asyncio.sleep(settings.TOKEN_DENYLIST_SYNC_SECONDS)
+        try:
+            await run_in_threadpool(_sync_token_denylist)
+        except Exception as exc:  # no tumbar el loop por un fallo transitorio de BD
+            print(f"Error sincronizando denylist de tokens: {exc}")
+
+
+def _refresh_reminders():
+    db = SessionLocal()
+    try:
+        reminder_service.refresh(db, reminder_scheduler)
+    finally:
+        db.close()
+
+
+def _send_reminders(due: list):
+    db = SessionLocal()
+    try:
+        reminder_service.send_due(db, due)
+    finally:
+        db.close()
+
+
+async def _reminder_loop():
+    # La rueda avanza en el loop (O(1) por tick); la base de datos solo se
+    # toca en el threadpool, para enviar lo vencido y mantener la ventana
+    refreshed_at = time.monotonic()
+    while True:
+        await asyncio.sleep(settings.REMINDER_TICK_SECONDS)
+        try:
+            due = reminder_scheduler.advance(time.time())
+            if due:
+                await run_in_threadpool(_send_reminders, due)
+            if time.monotonic() - refreshed_at >= settings.REMINDER_SYNC_SECONDS:
+                refreshed_at = time.monotonic()
+                await run_in_threadpool(_refresh_reminders)
+        except Exception as exc:  # no tumbar el loop por un fallo transitorio de BD
+            print(f"Error procesando recordatorios: {exc}")
+
+
+@app.on_event("startup")
+async def start_background_tasks():
+    # Tantos hilos para handlers sync como conexiones puede dar el pool:
+    # así la espera se ve en la cola de anyio y no escondida en el pool.
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = settings.THREADPOOL_TOKENS or (
+        settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    )
+    app.state.denylist_task = asyncio.create_task(_token_denylist_sync_loop())
+    app.state.reminder_task = (
+        asyncio.create_task(_reminder_loop()) if settings.REMINDERS_ENABLED else None
+    )
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    app.state.denylist_task.cancel()
+    if app.state.reminder_task is not None:
+        app.state.reminder_task.cancel()
+    password_hasher.shutdown()
+    if async_engine is not None:
+        await async_engine.dispose()
 
 origins = [
     "http://localhost:3000",  # Dirección de tu frontend
@@ -225,7 +363,23 @@ origins = [
 
 app.include_router(users.router)
 app.include_router(auth.router)
-app.include_router(patients.router)
-app.include_router(doctors.router)
-app.include_router(appointments.router)
-app.include_router(clinical_histories.router)
+
+# DB_ASYNC elige entre los routers sync (threadpool) y los async (AsyncSession)
+# de los listados y CRUD con más tráfico. El resto de los routers no tiene
+# versión async: usa Session sync en cualquiera de los dos modos
+if settings.DB_ASYNC:
+    app.include_router(async_patients.router)
+    app.include_router(async_doctors.router)
+    app.include_router(async_appointments.router)
+    app.include_router(async_clinical_histories.router)
+else:
+    app.include_router(patients.router)
+    app.include_router(doctors.router)
+    app.include_router(appointments.router)
+    app.include_router(clinical_histories.router)
+
+app.include_router(admin.router)
+app.include_router(imports.router)
+app.include_router(exports.router)
+app.include_router(stats.router)
+app.include_router(events.router)
@@ -1,7 +1,11 @@
 from .user import User, Role
 from .patient import Patient
 from .doctor import Doctor
+from .doctor_schedule import DoctorSchedule
 from .appointment import Appointment
 from .clinical_history import ClinicalHistory
+from .token_revocation import TokenRevocation
+from .stat_counter import StatCounter
+from .reminder_delivery import ReminderDelivery
 
-__all__ = ["User", "Role", "Patient", "Doctor", "Appointment", "ClinicalHistory"]
\ No newline at end of file
+__all__ = ["User", "Role", "Patient", "Doctor", "DoctorSchedule", "Appointment", "ClinicalHistory", "TokenRevocation", "StatCounter", "ReminderDelivery"]
\ No newline at end of file
@@ -2,14 +2,31 @@
 
 from datetime import datetime, timezone
 
-from sqlalchemy import Column, Integer, DateTime, String, ForeignKey, Text
+from sqlalchemy import Column, Integer, DateTime, String, ForeignKey, Text, Index, text
 from sqlalchemy.orm import relationship
 
+from app.core.db.columns import UTCDateTime
 from app.core.db.database import Base
 
 
 class Appointment(Base):
     __tablename__ = "appointments"
+    __table_args__ = (
+        # Listados por rol: filtran por doctor/paciente y paginan por (scheduled_at, id)
+        Index("ix_appointments_doctor_scheduled", "doctor_id", "scheduled_at", "id"),
+        Index("ix_appointments_patient_scheduled", "patient_id", "scheduled_at", "id"),
+        Index("ix_appointments_scheduled", "scheduled_at", "id"),
+        # Cambios recientes (sincronización de la agenda en memoria)
+        Index("ix_appointments_updated", "updated_at"),
+        # Agenda pendiente por doctor: solo las citas aún programadas
+        Index(
+            "ix_appointments_doctor_pending",
+            "doctor_id",
+            "scheduled_at",
+            postgresql_where=text("status = 'scheduled'"),
+            sqlite_where=text("status = 'scheduled'"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -17,7 +34,7 @@ class Appointment(Base):
     doctor_id = Column(Integer, ForeignKey("doctors.id"), nullable=False)
 
     # Cuándo es la cita
-    scheduled_at = Column(DateTime(timezone=True), nullable=False)
+    scheduled_at = Column(UTCDateTime, nullable=False)
 
     # Estados típicos: "scheduled", "completed", "cancelled"
     status = Column(String(20), nullable=False, default="scheduled")
@@ -2,14 +2,22 @@
 
 from datetime import datetime, timezone
 
-from sqlalchemy import Column, Integer, DateTime, String, Text, ForeignKey
+from sqlalchemy import Column, Integer, DateTime, String, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
+from app.core.db.columns import UTCDateTime
 from app.core.db.database import Base
 
 
 class ClinicalHistory(Base):
     __tablename__ = "clinical_histories"
+    __table_args__ = (
+        # Listados por rol: filtran por paciente/doctor y paginan por (visit_date, id)
+        Index("ix_clinical_histories_patient_visit", "patient_id", "visit_date", "id"),
+        Index("ix_clinical_histories_doctor_visit", "doctor_id", "visit_date", "id"),
+        Index("ix_clinical_histories_visit", "visit_date", "id"),
+        Index("ix_clinical_histories_appointment", "appointment_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -20,7 +28,7 @@ class ClinicalHistory(Base):
     appointment_id = Column(Integer, ForeignKey("appointments.id"), nullable=True)
 
     # Información clínica
-    visit_date = Column(DateTime(timezone=True), nullable=False)
+    visit_date = Column(UTCDateTime, nullable=False)
     diagnosis = Column(Text, nullable=True)
     treatment = Column(Text, nullable=True)
     notes = Column(Text, nullable=True)
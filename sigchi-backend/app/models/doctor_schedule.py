@@ -0,0 +1,28 @@
+# app/models/doctor_schedule.py
+
+from sqlalchemy import Column, Integer, Time, ForeignKey
+
+from app.core.db.database import Base
+
+
+class DoctorSchedule(Base):
+    """
+    Bloque semanal de atención de un doctor (p.ej. lunes 08:00-12:00),
+    en la zona horaria de la clínica (CLINIC_TIMEZONE). Un doctor puede
+    tener varios bloques por día.
+    """
+    __tablename__ = "doctor_schedules"
+
+    id = Column(Integer, primary_key=True)
+
+    doctor_id = Column(
+        Integer,
+        ForeignKey("doctors.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+
+    # 0 = lunes ... 6 = domingo (como date.weekday())
+    weekday = Column(Integer, nullable=False)
+    start_time = Column(Time, nullable=False)
+    end_time = Column(Time, nullable=False)
@@ -2,7 +2,7 @@
 
 from datetime import date
 
-from sqlalchemy import Column, Integer, String, Date, ForeignKey
+from sqlalchemy import Column, Integer, String, Date, ForeignKey, Index, func
 from sqlalchemy.orm import relationship
 
 from app.core.db.database import Base
@@ -25,3 +25,8 @@ class Patient(Base):
 
     # Relación inversa hacia User
     user = relationship("User", back_populates="patient")
+
+
+# Búsqueda por prefijo (recepción / autocompletado): rango sobre lower(col)
+Index("ix_patients_document_number_lower", func.lower(Patient.document_number))
+Index("ix_patients_phone", Patient.phone)
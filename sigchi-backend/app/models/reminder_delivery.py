@@ -0,0 +1,32 @@
+# app/models/reminder_delivery.py
+
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer
+
+from app.core.db.columns import UTCDateTime
+from app.core.db.database import Base
+
+
+class ReminderDelivery(Base):
+    """
+    Recordatorio ya enviado. El primer worker que inserta la fila se
+    queda con el envío; los demás chocan con la clave primaria y lo
+    descartan. scheduled_at va en la clave: si la cita se reprograma, sus
+    recordatorios se vuelven a enviar.
+    """
+    __tablename__ = "reminder_deliveries"
+
+    appointment_id = Column(
+        Integer,
+        ForeignKey("appointments.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    offset_minutes = Column(Integer, primary_key=True)
+    scheduled_at = Column(UTCDateTime, primary_key=True)
+
+    sent_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
@@ -0,0 +1,24 @@
+# app/models/stat_counter.py
+
+from sqlalchemy import BigInteger, Column, String
+
+from app.core.db.database import Base
+
+
+class StatCounter(Base):
+    """
+    Contador del dashboard, mantenido de forma incremental por los
+    servicios en la misma transacción que la escritura que lo cambia
+    (ver app/services/stats_service.py).
+
+    metric: qué se cuenta (p.ej. "appointments_day")
+    bucket: por qué se agrupa (fecha, semana o id de doctor, como texto)
+    status: estado de la cita, o "" si la métrica no lo usa
+    """
+    __tablename__ = "stat_counters"
+
+    metric = Column(String(40), primary_key=True)
+    bucket = Column(String(40), primary_key=True)
+    status = Column(String(20), primary_key=True, default="")
+
+    count = Column(BigInteger, nullable=False, default=0)
@@ -0,0 +1,31 @@
+# app/models/token_revocation.py
+
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, Integer, String, DateTime
+
+from app.core.db.database import Base
+
+
+class TokenRevocation(Base):
+    """
+    Denylist de tokens. Cada fila revoca un jti concreto (logout) o todos
+    los tokens de un usuario con versión menor a min_version.
+    Las filas se pueden purgar una vez pasado expires_at.
+    """
+    __tablename__ = "token_revocations"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    jti = Column(String(64), nullable=True)
+    user_id = Column(Integer, nullable=True)
+    min_version = Column(Integer, nullable=True)
+
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    # Cursor del sync incremental de la denylist
+    created_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+        index=True,
+    )
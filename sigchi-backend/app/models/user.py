@@ -1,5 +1,5 @@
 # app/models/user.py
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Index, func
 from sqlalchemy.orm import relationship
 
 from app.core.db.database import Base
@@ -27,8 +27,16 @@ class User(Base):
     last_name = Column(String(100), nullable=True)
     is_active = Column(Boolean, default=True)
 
+    # Se incrementa para invalidar todos los tokens emitidos antes
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
+
     role_id = Column(Integer, ForeignKey("roles.id"), nullable=False)
     role    = relationship("Role", back_populates="users")
 
     patient = relationship("Patient", back_populates="user", uselist=False)
-    doctor = relationship("Doctor", back_populates="user", uselist=False)
\ No newline at end of file
+    doctor = relationship("Doctor", back_populates="user", uselist=False)
+
+
+# Búsqueda de pacientes por nombre (prefijo, sin distinguir mayúsculas)
+Index("ix_users_first_name_lower", func.lower(User.first_name))
+Index("ix_users_last_name_lower", func.lower(User.last_name))
@@ -0,0 +1,25 @@
+# app/rebuild_stats.py
+#
+# Recalcula los contadores del dashboard (stat_counters) desde las tablas
+# de citas e historias clínicas. Para la carga inicial o tras escrituras
+# hechas por fuera de la API:
+#
+#     python -m app.rebuild_stats
+
+from app.core.db.database import SessionLocal, engine
+from app.models import StatCounter
+from app.services.stats_service import rebuild_stats
+
+
+def main() -> None:
+    StatCounter.__table__.create(bind=engine, checkfirst=True)
+    db = SessionLocal()
+    try:
+        result = rebuild_stats(db)
+    finally:
+        db.close()
+    print(f"Contadores reconstruidos: {result['counters']} ({', '.join(result['metrics'])})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
-from . import users, auth, patients, doctors, appointments, clinical_histories
+from . import users, auth, patients, doctors, appointments, clinical_histories, admin
+from . import imports, exports, stats, events
+from . import async_patients, async_doctors, async_appointments, async_clinical_histories
 
 __all__ = [
     "users",
@@ -7,4 +9,13 @@ __all__ = [
     "doctors",
     "appointments",
     "clinical_histories",
+    "admin",
+    "imports",
+    "exports",
+    "stats",
+    "events",
+    "async_patients",
+    "async_doctors",
+    "async_appointments",
+    "async_clinical_histories",
 ]
\ No newline at end of file
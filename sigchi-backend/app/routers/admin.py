@@ -0,0 +1,31 @@
+# app/routers/admin.py
+
+from fastapi import APIRouter, Depends
+
+from app.core.db.database import engine, async_engine, replica_engines
+from app.core.db.pool import pool_status
+from app.core.principal import Principal
+from app.core.security import get_current_admin_user
+
+
+router = APIRouter(
+    prefix="/api/admin",
+    tags=["Admin"],
+)
+
+
+# --- Telemetría del pool de conexiones (solo admin) ---
+@router.get("/db-pool")
+def get_db_pool_status(
+    current_admin: Principal = Depends(get_current_admin_user),
+):
+    """
+    Conexiones en uso, libres y en overflow, más el histograma
+    de espera por checkout del pool.
+    """
+    result = pool_status(engine.pool)
+    if replica_engines:
+        result["replicas"] = [pool_status(e.pool) for e in replica_engines]
+    if async_engine is not None:
+        result["async"] = pool_status(async_engine.pool)
+    return result
@@ -1,12 +1,15 @@
 # app/routers/appointments.py
 
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Request, Response, status
 from sqlalchemy.orm import Session
 
 from app.core.db.database import get_db
-from app.core.db.models import User
+from app.core.etag import conditional, etag_matches, not_modified, row_etag, set_etag
+from app.core.pagination import page_start, set_next_cursor
+from app.core.principal import Principal
 from app.core.security import (
     get_current_active_user,
 )
@@ -15,7 +18,9 @@ from app.schemas.appointment import (
     AppointmentUpdate,
     AppointmentResponse,
 )
+from app.services.appointment_service import APPOINTMENT_ORDER
 from app.services import (
+    access_service,
     appointment_service,
     patient_service,
     doctor_service,
@@ -28,21 +33,6 @@ router = APIRouter(
 )
 
 
-def _get_role_name(current_user: User) -> str | None:
-    role = getattr(current_user, "role", None)
-    return getattr(role, "name", None)
-
-
-def _get_current_patient_id_for_user(db: Session, current_user: User) -> int | None:
-    patient = patient_service.get_patient_by_user_id(db, current_user.id)
-    return patient.id if patient else None
-
-
-def _get_current_doctor_id_for_user(db: Session, current_user: User) -> int | None:
-    doctor = doctor_service.get_doctor_by_user_id(db, current_user.id)
-    return doctor.id if doctor else None
-
-
 # --- Crear cita ---
 @router.post(
     "/",
@@ -52,7 +42,7 @@ def _get_current_doctor_id_for_user(db: Session, current_user: User) -> int | No
 def create_appointment(
     appointment_in: AppointmentCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
 ):
     """
     Reglas:
@@ -60,51 +50,13 @@ def create_appointment(
       - 'doctor': solo puede crear citas donde doctor_id sea su propio perfil.
       - 'patient': solo puede crear citas donde patient_id sea su propio perfil.
     """
-    role_name = _get_role_name(current_user)
-
-    # Validar existencia de patient y doctor
-    patient = patient_service.get_patient(db, appointment_in.patient_id)
-    if not patient:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid patient_id",
-        )
-
-    doctor = doctor_service.get_doctor(db, appointment_in.doctor_id)
-    if not doctor:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid doctor_id",
-        )
-
-    if role_name == "admin":
-        # Admin puede crear cualquier cita válida
-        pass
-
-    elif role_name == "doctor":
-        current_doctor_id = _get_current_doctor_id_for_user(db, current_user)
-        if not current_doctor_id or current_doctor_id != appointment_in.doctor_id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Doctors can only create appointments for themselves",
-            )
-
-    elif role_name == "patient":
-        current_patient_id = _get_current_patient_id_for_user(db, current_user)
-        if not current_patient_id or current_patient_id != appointment_in.patient_id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Patients can only create appointments for themselves",
-            )
-
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Insufficient permissions",
-        )
-
-    appointment = appointment_service.create_appointment(db, appointment_in)
-    return appointment
+    appointment_service.check_can_create(
+        current_user,
+        appointment_in,
+        patient_service.get_patient(db, appointment_in.patient_id),
+        doctor_service.get_doctor(db, appointment_in.doctor_id),
+    )
+    return appointment_service.create_appointment(db, appointment_in)
 
 
 # --- Listar citas ---
@@ -113,10 +65,13 @@ def create_appointment(
     response_model=List[AppointmentResponse],
 )
 def list_appointments(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 20,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
 ):
     """
     Reglas:
@@ -124,38 +79,17 @@ def list_appointments(
       - doctor: ve solo sus citas (doctor_id propio).
       - patient: ve solo sus citas (patient_id propio).
     """
-    role_name = _get_role_name(current_user)
-
-    if role_name == "admin":
-        return appointment_service.list_appointments(db, skip=skip, limit=limit)
-
-    elif role_name == "doctor":
-        doctor_id = _get_current_doctor_id_for_user(db, current_user)
-        if not doctor_id:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Doctor profile not found for this user",
-            )
-        return appointment_service.list_appointments_by_doctor(
-            db, doctor_id=doctor_id, skip=skip, limit=limit
-        )
-
-    elif role_name == "patient":
-        patient_id = _get_current_patient_id_for_user(db, current_user)
-        if not patient_id:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Patient profile not found for this user",
-            )
-        return appointment_service.list_appointments_by_patient(
-            db, patient_id=patient_id, skip=skip, limit=limit
-        )
+    skip, after = page_start(skip, cursor, datetime, int)
+    scope = access_service.list_scope(current_user)
 
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Insufficient permissions",
-        )
+    etag = appointment_service.get_page_etag(db, skip, limit, after, **scope)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    page = appointment_service.list_appointments(
+        db, skip=skip, limit=limit, after=after, **scope
+    )
+    set_etag(response, etag)
+    return set_next_cursor(response, page, limit, APPOINTMENT_ORDER)
 
 
 # --- Obtener cita por id ---
@@ -165,8 +99,10 @@ def list_appointments(
 )
 def get_appointment_by_id(
     appointment_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
 ):
     """
     Reglas:
@@ -174,41 +110,11 @@ def get_appointment_by_id(
       - doctor: solo citas donde él sea el doctor.
       - patient: solo citas donde él sea el paciente.
     """
-    appointment = appointment_service.get_appointment(db, appointment_id)
-    if not appointment:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Appointment not found",
-        )
-
-    role_name = _get_role_name(current_user)
-
-    if role_name == "admin":
-        return appointment
-
-    elif role_name == "doctor":
-        doctor_id = _get_current_doctor_id_for_user(db, current_user)
-        if not doctor_id or doctor_id != appointment.doctor_id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You can only access your own appointments",
-            )
-        return appointment
-
-    elif role_name == "patient":
-        patient_id = _get_current_patient_id_for_user(db, current_user)
-        if not patient_id or patient_id != appointment.patient_id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You can only access your own appointments",
-            )
-        return appointment
-
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Insufficient permissions",
-        )
+    appointment = appointment_service.require_appointment(
+        appointment_service.get_appointment(db, appointment_id)
+    )
+    appointment_service.check_can_view(current_user, appointment)
+    return conditional(request, response, row_etag(appointment), appointment)
 
 
 # --- Actualizar cita (admin o doctor dueño) ---
@@ -220,7 +126,7 @@ def update_appointment(
     appointment_id: int,
     appointment_in: AppointmentUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
 ):
     """
     Reglas:
@@ -228,33 +134,11 @@ def update_appointment(
       - doctor: solo citas donde él sea el doctor.
       - patient: no actualiza (solo puede cancelar desde el endpoint de cancelación).
     """
-    appointment = appointment_service.get_appointment(db, appointment_id)
-    if not appointment:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Appointment not found",
-        )
-
-    role_name = _get_role_name(current_user)
-
-    if role_name == "admin":
-        pass
-
-    elif role_name == "doctor":
-        doctor_id = _get_current_doctor_id_for_user(db, current_user)
-        if not doctor_id or doctor_id != appointment.doctor_id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You can only update your own appointments",
-            )
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only admin or doctors can update appointments",
-        )
-
-    appointment = appointment_service.update_appointment(db, appointment, appointment_in)
-    return appointment
+    appointment = appointment_service.require_appointment(
+        appointment_service.get_appointment(db, appointment_id)
+    )
+    appointment_service.check_can_update(current_user, appointment)
+    return appointment_service.update_appointment(db, appointment, appointment_in)
 
 
 # --- Cancelar cita ---
@@ -265,7 +149,7 @@ def update_appointment(
 def cancel_appointment(
     appointment_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
 ):
     """
     Reglas:
@@ -273,39 +157,8 @@ def cancel_appointment(
       - doctor: solo citas donde él sea el doctor.
       - patient: solo citas donde él sea el paciente.
     """
-    appointment = appointment_service.get_appointment(db, appointment_id)
-    if not appointment:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Appointment not found",
-        )
-
-    role_name = _get_role_name(current_user)
-
-    if role_name == "admin":
-        pass
-
-    elif role_name == "doctor":
-        doctor_id = _get_current_doctor_id_for_user(db, current_user)
-        if not doctor_id or doctor_id != appointment.doctor_id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You can only cancel your own appointments",
-            )
-
-    elif role_name == "patient":
-        patient_id = _get_current_patient_id_for_user(db, current_user)
-        if not patient_id or patient_id != appointment.patient_id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You can only cancel your own appointments",
-            )
-
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Insufficient permissions",
-        )
-
-    appointment = appointment_service.set_appointment_status(db, appointment, "cancelled")
-    return appointment
+    appointment = appointment_service.require_appointment(
+        appointment_service.get_appointment(db, appointment_id)
+    )
+    appointment_service.check_can_cancel(current_user, appointment)
+    return appointment_service.set_appointment_status(db, appointment, "cancelled")
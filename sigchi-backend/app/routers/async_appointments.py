@@ -0,0 +1,165 @@
+# app/routers/async_appointments.py
+
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db.database import get_async_db
+from app.core.etag import conditional, etag_matches, not_modified, row_etag, set_etag
+from app.core.pagination import page_start, set_next_cursor
+from app.core.principal import Principal
+from app.core.security import (
+    get_current_active_user,
+)
+from app.schemas.appointment import (
+    AppointmentCreate,
+    AppointmentUpdate,
+    AppointmentResponse,
+)
+from app.services.appointment_service import APPOINTMENT_ORDER
+from app.services import (
+    access_service,
+    appointment_service,
+    async_appointment_service,
+    async_patient_service,
+    async_doctor_service,
+)
+
+
+router = APIRouter(
+    prefix="/api/appointments",
+    tags=["Appointments"],
+)
+
+
+# --- Crear cita ---
+@router.post(
+    "/",
+    response_model=AppointmentResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_appointment(
+    appointment_in: AppointmentCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
+):
+    """
+    Reglas:
+      - 'admin': puede crear citas para cualquier paciente/doctor válidos.
+      - 'doctor': solo puede crear citas donde doctor_id sea su propio perfil.
+      - 'patient': solo puede crear citas donde patient_id sea su propio perfil.
+    """
+    appointment_service.check_can_create(
+        current_user,
+        appointment_in,
+        await async_patient_service.get_patient(db, appointment_in.patient_id),
+        await async_doctor_service.get_doctor(db, appointment_in.doctor_id),
+    )
+    return await async_appointment_service.create_appointment(db, appointment_in)
+
+
+# --- Listar citas ---
+@router.get(
+    "/",
+    response_model=List[AppointmentResponse],
+)
+async def list_appointments(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
+):
+    """
+    Reglas:
+      - admin: ve todas las citas.
+      - doctor: ve solo sus citas (doctor_id propio).
+      - patient: ve solo sus citas (patient_id propio).
+    """
+    skip, after = page_start(skip, cursor, datetime, int)
+    scope = access_service.list_scope(current_user)
+
+    etag = await async_appointment_service.get_page_etag(db, skip, limit, after, **scope)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    page = await async_appointment_service.list_appointments(
+        db, skip=skip, limit=limit, after=after, **scope
+    )
+    set_etag(response, etag)
+    return set_next_cursor(response, page, limit, APPOINTMENT_ORDER)
+
+
+# --- Obtener cita por id ---
+@router.get(
+    "/{appointment_id}",
+    response_model=AppointmentResponse,
+)
+async def get_appointment_by_id(
+    appointment_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
+):
+    """
+    Reglas:
+      - admin: puede ver cualquier cita.
+      - doctor: solo citas donde él sea el doctor.
+      - patient: solo citas donde él sea el paciente.
+    """
+    appointment = appointment_service.require_appointment(
+        await async_appointment_service.get_appointment(db, appointment_id)
+    )
+    appointment_service.check_can_view(current_user, appointment)
+    return conditional(request, response, row_etag(appointment), appointment)
+
+
+# --- Actualizar cita (admin o doctor dueño) ---
+@router.put(
+    "/{appointment_id}",
+    response_model=AppointmentResponse,
+)
+async def update_appointment(
+    appointment_id: int,
+    appointment_in: AppointmentUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
+):
+    """
+    Reglas:
+      - admin: puede actualizar cualquier cita.
+      - doctor: solo citas donde él sea el doctor.
+      - patient: no actualiza (solo puede cancelar desde el endpoint de cancelación).
+    """
+    appointment = appointment_service.require_appointment(
+        await async_appointment_service.get_appointment(db, appointment_id)
+    )
+    appointment_service.check_can_update(current_user, appointment)
+    return await async_appointment_service.update_appointment(db, appointment, appointment_in)
+
+
+# --- Cancelar cita ---
+@router.post(
+    "/{appointment_id}/cancel",
+    response_model=AppointmentResponse,
+)
+async def cancel_appointment(
+    appointment_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
+):
+    """
+    Reglas:
+      - admin: puede cancelar cualquier cita.
+      - doctor: solo citas donde él sea el doctor.
+      - patient: solo citas donde él sea el paciente.
+    """
+    appointment = appointment_service.require_appointment(
+        await async_appointment_service.get_appointment(db, appointment_id)
+    )
+    appointment_service.check_can_cancel(current_user, appointment)
+    return await async_appointment_service.set_appointment_status(db, appointment, "cancelled")
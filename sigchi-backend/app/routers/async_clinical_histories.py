@@ -0,0 +1,233 @@
+# app/routers/async_clinical_histories.py
+
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db.database import get_async_db
+from app.core.etag import conditional, etag_matches, not_modified, row_etag, set_etag
+from app.core.pagination import page_start, set_next_cursor
+from app.core.principal import Principal
+from app.core.security import get_current_active_user
+from app.schemas.clinical_history import (
+    ClinicalHistoryCreate,
+    ClinicalHistoryUpdate,
+    ClinicalHistoryResponse,
+    ClinicalHistorySearchResult,
+)
+from app.services.clinical_history_service import HISTORY_ORDER
+from app.services import (
+    access_service,
+    clinical_history_service,
+    async_clinical_history_service,
+    async_patient_service,
+    async_doctor_service,
+)
+
+
+router = APIRouter(
+    prefix="/api/histories",
+    tags=["Clinical Histories"],
+)
+
+
+# --- Crear historia clínica ---
+@router.post(
+    "/",
+    response_model=ClinicalHistoryResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_clinical_history(
+    history_in: ClinicalHistoryCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
+):
+    """
+    Reglas:
+      - admin: puede crear historias para cualquier combinación paciente/doctor válida.
+      - doctor: solo puede crear historias donde doctor_id corresponda a su propio perfil.
+      - patient: NO puede crear historias.
+    """
+    clinical_history_service.check_can_create(
+        current_user,
+        history_in,
+        await async_patient_service.get_patient(db, history_in.patient_id),
+        await async_doctor_service.get_doctor(db, history_in.doctor_id),
+    )
+    return await async_clinical_history_service.create_history(db, history_in)
+
+
+# --- Listar historias según rol ---
+@router.get(
+    "/",
+    response_model=List[ClinicalHistoryResponse],
+)
+async def list_clinical_histories(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
+):
+    """
+    Reglas:
+      - admin: ve todas las historias.
+      - doctor: ve solo historias donde él sea el doctor.
+      - patient: ve solo historias donde él sea el paciente.
+    """
+    skip, after = page_start(skip, cursor, datetime, int)
+    scope = access_service.list_scope(current_user)
+
+    etag, _ = await async_clinical_history_service.get_page_version(
+        db, skip, limit, after, **scope
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    page = await async_clinical_history_service.list_histories(
+        db, skip=skip, limit=limit, after=after, **scope
+    )
+    set_etag(response, etag)
+    return set_next_cursor(response, page, limit, HISTORY_ORDER)
+
+
+# --- Buscar en historias (texto completo, según rol) ---
+@router.get(
+    "/search",
+    response_model=List[ClinicalHistorySearchResult],
+)
+async def search_clinical_histories(
+    q: str = Query(..., min_length=2, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
+):
+    """
+    Busca en diagnosis, treatment y notes, ordenado por relevancia.
+    Mismo alcance que el listado:
+      - admin: todas las historias.
+      - doctor: solo historias donde él sea el doctor.
+      - patient: solo sus propias historias.
+    """
+    results = await async_clinical_history_service.search_histories(
+        db, q, limit=limit, **access_service.list_scope(current_user)
+    )
+    return clinical_history_service.search_results(results)
+
+
+# --- Ver historia por id ---
+@router.get(
+    "/{history_id}",
+    response_model=ClinicalHistoryResponse,
+)
+async def get_clinical_history_by_id(
+    history_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
+):
+    """
+    Reglas:
+      - admin: puede ver cualquier historia.
+      - doctor: solo historias donde él sea el doctor.
+      - patient: solo historias donde él sea el paciente.
+    """
+    history = clinical_history_service.require_history(
+        await async_clinical_history_service.get_history(db, history_id)
+    )
+    clinical_history_service.check_can_view(current_user, history)
+    return conditional(request, response, row_etag(history), history)
+
+
+# --- Listar historias de un paciente específico (admin/doctor/patient) ---
+@router.get(
+    "/patient/{patient_id}",
+    response_model=List[ClinicalHistoryResponse],
+)
+async def list_histories_for_patient(
+    request: Request,
+    response: Response,
+    patient_id: int,
+    skip: int = 0,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
+):
+    """
+    Reglas:
+      - admin: puede ver historias de cualquier paciente.
+      - doctor: solo historias donde él sea el doctor del paciente indicado.
+      - patient: solo puede usar este endpoint si patient_id corresponde a su propio perfil.
+
+    Los permisos y el ETag salen de (id, updated_at, doctor_id) de la
+    página; las historias completas solo se cargan si el cliente no tiene
+    la versión vigente.
+    """
+    skip, after = page_start(skip, cursor, datetime, int)
+    doctor_id = clinical_history_service.patient_scope(current_user, patient_id)
+
+    etag, rows = await async_clinical_history_service.get_page_version(
+        db, skip, limit, after, patient_id=patient_id
+    )
+    clinical_history_service.check_doctor_histories(doctor_id, rows)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    history_list = await async_clinical_history_service.list_histories(
+        db, skip=skip, limit=limit, after=after, patient_id=patient_id
+    )
+    # La página pudo cambiar entre ambas consultas
+    clinical_history_service.check_doctor_histories(doctor_id, history_list)
+    set_etag(response, etag)
+    return set_next_cursor(response, history_list, limit, HISTORY_ORDER)
+
+
+# --- Actualizar historia (admin o doctor dueño) ---
+@router.put(
+    "/{history_id}",
+    response_model=ClinicalHistoryResponse,
+)
+async def update_clinical_history(
+    history_id: int,
+    history_in: ClinicalHistoryUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
+):
+    """
+    Reglas:
+      - admin: puede actualizar cualquier historia.
+      - doctor: solo historias donde él sea el doctor.
+      - patient: no puede actualizar.
+    """
+    history = clinical_history_service.require_history(
+        await async_clinical_history_service.get_history(db, history_id)
+    )
+    clinical_history_service.check_can_update(current_user, history)
+    return await async_clinical_history_service.update_history(db, history, history_in)
+
+
+# --- Eliminar historia (solo admin) ---
+@router.delete(
+    "/{history_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+)
+async def delete_clinical_history(
+    history_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
+):
+    """
+    Elimina una historia clínica (borrado físico).
+    Solo 'admin'.
+    """
+    clinical_history_service.check_can_delete(current_user)
+    history = clinical_history_service.require_history(
+        await async_clinical_history_service.get_history(db, history_id)
+    )
+    await async_clinical_history_service.delete_history(db, history)
+    return None
@@ -0,0 +1,274 @@
+# app/routers/async_doctors.py
+
+from datetime import date, datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db.database import get_async_db
+from app.core.etag import conditional, etag_matches, not_modified, set_etag
+from app.core.pagination import page_start, set_next_cursor
+from app.core.principal import Principal
+from app.core.security import (
+    require_roles,
+    get_current_admin_user,
+    get_current_doctor_user,
+    get_current_active_user,
+)
+from app.schemas.appointment import DoctorCalendar
+from app.schemas.doctor import (
+    DoctorCreate,
+    DoctorUpdate,
+    DoctorResponse,
+    FreeSlot,
+    ScheduleBlock,
+    ScheduleBlockResponse,
+)
+from app.services import (
+    access_service,
+    async_appointment_service,
+    async_availability_service,
+    async_doctor_service,
+    availability_service,
+    doctor_service,
+)
+from app.services.appointment_service import calendar_response, calendar_window
+from app.services.availability_service import search_window
+from app.services.doctor_service import DOCTOR_ORDER, doctor_to_response
+
+
+router = APIRouter(
+    prefix="/api/doctors",
+    tags=["Doctors"],
+)
+
+
+# --- Crear doctor (solo admin) ---
+@router.post(
+    "/",
+    response_model=DoctorResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_doctor(
+    doctor_in: DoctorCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_admin: Principal = Depends(get_current_admin_user),
+):
+    """
+    Crea un perfil de doctor asociado a un usuario existente.
+    Reglas:
+      - Solo 'admin' puede crear doctores.
+      - El usuario referenciado debe tener rol 'doctor'.
+      - No debe existir ya un perfil de doctor para ese user_id.
+    """
+    doctor_service.check_new_doctor(
+        await async_doctor_service.get_doctor_by_user_id(db, doctor_in.user_id),
+        await async_doctor_service.get_user_role(db, doctor_in.user_id),
+    )
+    return doctor_to_response(await async_doctor_service.create_doctor(db, doctor_in))
+
+
+# --- Listar doctores (solo admin; si quieres, agregar 'doctor') ---
+@router.get(
+    "/",
+    response_model=List[DoctorResponse],
+)
+async def list_doctors(
+    response: Response,
+    skip: int = 0,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_roles(["admin"])),
+):
+    """
+    Lista doctores con paginación básica.
+    Solo 'admin' (puedes añadir 'doctor' en require_roles si lo necesitas).
+    """
+    skip, after = page_start(skip, cursor, int)
+    doctors = await async_doctor_service.list_doctors(db, skip=skip, limit=limit, after=after)
+    set_next_cursor(response, doctors, limit, DOCTOR_ORDER)
+    return [doctor_to_response(d) for d in doctors]
+
+
+# --- Turnos libres (cualquier usuario activo) ---
+@router.get(
+    "/availability",
+    response_model=List[FreeSlot],
+)
+async def get_availability(
+    specialty: Optional[str] = None,
+    doctor_id: Optional[int] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
+):
+    """
+    Próximos turnos libres (de APPOINTMENT_SLOT_MINUTES) entre todos los
+    doctores con horario cargado, ordenados por hora. Se puede filtrar por
+    especialidad y/o doctor. Sin date_from se busca desde ahora; sin
+    date_to, los próximos 30 días.
+    """
+    start, end = search_window(date_from, date_to)
+    return await async_availability_service.find_free_slots(
+        db, start, end, limit=limit, specialty=specialty, doctor_id=doctor_id
+    )
+
+
+# --- Ver mi perfil de doctor (rol doctor) ---
+@router.get(
+    "/me",
+    response_model=DoctorResponse,
+)
+async def get_my_doctor_profile(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    current_doctor_user: Principal = Depends(get_current_doctor_user),
+):
+    """
+    Devuelve el perfil de doctor asociado al usuario autenticado
+    con rol 'doctor'.
+    """
+    doctor = doctor_service.require_profile(
+        await async_doctor_service.get_doctor_by_user_id(db, current_doctor_user.id)
+    )
+    etag = doctor_service.profile_etag(doctor)
+    return conditional(request, response, etag, doctor_to_response(doctor))
+
+
+# --- Obtener doctor por id (visible para cualquier usuario activo) ---
+@router.get(
+    "/{doctor_id}",
+    response_model=DoctorResponse,
+)
+async def get_doctor_by_id(
+    doctor_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
+):
+    """
+    En este punto, la información del doctor la consideramos "pública"
+    (sirve para que pacientes vean con quién pueden agendar).
+    Si luego quieres limitar, puedes añadir lógica por rol aquí.
+    """
+    doctor = doctor_service.require_doctor(await async_doctor_service.get_doctor(db, doctor_id))
+    return doctor_to_response(doctor)
+
+
+# --- Horario semanal del doctor ---
+@router.get(
+    "/{doctor_id}/schedule",
+    response_model=List[ScheduleBlockResponse],
+)
+async def get_doctor_schedule(
+    doctor_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
+):
+    """
+    Bloques de atención del doctor (públicos, como el perfil).
+    """
+    return await async_availability_service.get_schedule(db, doctor_id)
+
+
+@router.put(
+    "/{doctor_id}/schedule",
+    response_model=List[ScheduleBlockResponse],
+)
+async def replace_doctor_schedule(
+    doctor_id: int,
+    blocks: List[ScheduleBlock],
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
+):
+    """
+    Reemplaza el horario semanal completo del doctor.
+    Reglas:
+      - admin: cualquier doctor.
+      - doctor: solo su propio horario.
+    """
+    doctor = doctor_service.require_doctor(await async_doctor_service.get_doctor(db, doctor_id))
+    access_service.check_own_doctor(current_user, doctor, "You can only update your own schedule")
+    availability_service.check_schedule(blocks)
+    return await async_availability_service.replace_schedule(db, doctor_id, blocks)
+
+
+# --- Calendario del doctor (admin o el propio doctor) ---
+@router.get(
+    "/{doctor_id}/calendar",
+    response_model=DoctorCalendar,
+)
+async def get_doctor_calendar(
+    doctor_id: int,
+    request: Request,
+    response: Response,
+    date_from: date = Query(..., alias="from"),
+    date_to: date = Query(..., alias="to"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
+):
+    """
+    Citas del doctor entre dos fechas (inclusive, en hora de la clínica)
+    ordenadas por scheduled_at, y cuántas hay por día y estado.
+
+    Responde con ETag: si el cliente reenvía If-None-Match y nada cambió
+    en el rango, devuelve 304 tras una sola consulta agregada.
+    """
+    if doctor_service.check_calendar_access(current_user, doctor_id):
+        doctor_service.require_doctor(await async_doctor_service.get_doctor(db, doctor_id))
+
+    start, end = calendar_window(date_from, date_to)
+    etag = await async_appointment_service.get_calendar_etag(db, doctor_id, start, end)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    appointments, days = await async_appointment_service.get_calendar(db, doctor_id, start, end)
+    set_etag(response, etag)
+    return calendar_response(doctor_id, date_from, date_to, appointments, days)
+
+
+# --- Actualizar doctor (admin o el propio doctor) ---
+@router.put(
+    "/{doctor_id}",
+    response_model=DoctorResponse,
+)
+async def update_doctor(
+    doctor_id: int,
+    doctor_in: DoctorUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
+):
+    """
+    Actualiza datos de un doctor.
+    Reglas:
+      - admin: puede actualizar cualquier doctor.
+      - doctor: solo su propio perfil.
+    """
+    doctor = doctor_service.require_doctor(await async_doctor_service.get_doctor(db, doctor_id))
+    access_service.check_own_doctor(
+        current_user, doctor, "You can only update your own doctor profile"
+    )
+    return doctor_to_response(await async_doctor_service.update_doctor(db, doctor, doctor_in))
+
+
+# --- Eliminar doctor (solo admin) ---
+@router.delete(
+    "/{doctor_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+)
+async def delete_doctor(
+    doctor_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_admin: Principal = Depends(get_current_admin_user),
+):
+    """
+    Elimina un doctor (delete físico).
+    Solo 'admin'. Más adelante podrías cambiarlo a soft-delete.
+    """
+    doctor = doctor_service.require_doctor(await async_doctor_service.get_doctor(db, doctor_id))
+    await async_doctor_service.delete_doctor(db, doctor)
+    return None
@@ -0,0 +1,181 @@
+# app/routers/async_patients.py
+
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db.database import get_async_db
+from app.core.etag import conditional, row_etag
+from app.core.pagination import page_start, set_next_cursor
+from app.core.principal import Principal
+from app.core.security import (
+    require_roles,
+    get_current_patient_user,
+    get_current_active_user,
+)
+from app.schemas.patient import (
+    PatientCreate,
+    PatientUpdate,
+    PatientResponse,
+    PatientSearchResult,
+)
+from app.services import async_patient_service, patient_service
+from app.services.patient_service import PATIENT_ORDER
+
+
+router = APIRouter(
+    prefix="/api/patients",
+    tags=["Patients"],
+)
+
+
+# --- Crear paciente (solo admin o doctor) ---
+@router.post(
+    "/",
+    response_model=PatientResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_patient(
+    patient_in: PatientCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_roles(["admin", "doctor"])),
+):
+    """
+    Crea un perfil de paciente asociado a un usuario existente.
+    Solo 'admin' y 'doctor' pueden crear pacientes.
+    """
+    patient_service.check_new_patient(
+        await async_patient_service.get_patient_by_user_id(db, patient_in.user_id)
+    )
+    return await async_patient_service.create_patient(db, patient_in)
+
+
+# --- Listar pacientes (solo admin; si quieres, puedes añadir 'doctor') ---
+@router.get(
+    "/",
+    response_model=List[PatientResponse],
+)
+async def list_patients(
+    response: Response,
+    skip: int = 0,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_roles(["admin", "doctor"])),
+):
+    """
+    Lista de pacientes con paginación básica.
+    Admin y doctor.
+    """
+    skip, after = page_start(skip, cursor, int)
+    patients = await async_patient_service.list_patients(db, skip=skip, limit=limit, after=after)
+    return set_next_cursor(response, patients, limit, PATIENT_ORDER)
+
+
+# --- Ver mi propio perfil de paciente (rol patient) ---
+@router.get(
+    "/me",
+    response_model=PatientResponse,
+)
+async def get_my_patient_profile(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    current_patient_user: Principal = Depends(get_current_patient_user),
+):
+    """
+    Devuelve el perfil de paciente asociado al usuario autenticado
+    con rol 'patient'.
+    """
+    patient = patient_service.require_profile(
+        await async_patient_service.get_patient_by_user_id(db, current_patient_user.id)
+    )
+    # patients no tiene updated_at: el ETag sale de sus columnas
+    return conditional(request, response, row_etag(patient), patient)
+
+
+# --- Buscar pacientes / autocompletado (admin o doctor) ---
+@router.get(
+    "/search",
+    response_model=List[PatientSearchResult],
+)
+async def search_patients(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_roles(["admin", "doctor"])),
+):
+    """
+    Busca por prefijo de documento, nombre, apellido o teléfono (cada
+    palabra de q debe coincidir con alguno). Pensado para autocompletar:
+    primero la coincidencia exacta de documento, luego por apellido.
+    """
+    return await async_patient_service.search_patients(db, q, limit)
+
+
+# --- Obtener paciente por id ---
+@router.get(
+    "/{patient_id}",
+    response_model=PatientResponse,
+)
+async def get_patient_by_id(
+    patient_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
+):
+    """
+    Reglas:
+      - admin: puede ver cualquier paciente.
+      - doctor: puede ver cualquier paciente (más adelante podemos filtrar 'sus' pacientes).
+      - patient: solo puede ver su propio registro.
+    """
+    patient = patient_service.require_patient(
+        await async_patient_service.get_patient(db, patient_id)
+    )
+    patient_service.check_can_view(current_user, patient)
+    return patient
+
+
+# --- Actualizar paciente (solo admin o doctor) ---
+@router.put(
+    "/{patient_id}",
+    response_model=PatientResponse,
+)
+async def update_patient(
+    patient_id: int,
+    patient_in: PatientUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_roles(["admin", "doctor"])),
+):
+    """
+    Actualiza datos de un paciente.
+    Solo 'admin' o 'doctor'.
+    (En el futuro podemos agregar lógica para que el doctor solo
+    pueda modificar sus propios pacientes).
+    """
+    patient = patient_service.require_patient(
+        await async_patient_service.get_patient(db, patient_id)
+    )
+    return await async_patient_service.update_patient(db, patient, patient_in)
+
+
+# --- Eliminar paciente (solo admin) ---
+@router.delete(
+    "/{patient_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+)
+async def delete_patient(
+    patient_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_roles(["admin"])),
+):
+    """
+    Elimina un paciente (delete físico).
+    Solo 'admin'. Más adelante podrías cambiarlo a soft-delete.
+    """
+    patient = patient_service.require_patient(
+        await async_patient_service.get_patient(db, patient_id)
+    )
+    await async_patient_service.delete_patient(db, patient)
+    return None
@@ -1,17 +1,24 @@
 # app/routers/auth.py
 
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
+from jose import JWTError
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.core.db.database import get_db
 from app.core.db.models import User
+from app.core.principal import load_principal, principal_to_claims
 from app.core.security import (
-    verify_password,
+    oauth2_scheme,
+    password_hasher,
     create_access_token,
+    decode_access_token,
 )
+from app.core.token_cache import token_cache
+from app.core.token_denylist import token_denylist
 from app.core.config import settings
 
 
@@ -21,7 +28,11 @@ router = APIRouter(
 )
 
 
-def authenticate_user(
+def get_user_by_email(db: Session, email: str) -> User | None:
+    return db.query(User).filter(User.email == email).first()
+
+
+async def authenticate_user(
     db: Session,
     email: str,
     password: str,
@@ -29,19 +40,22 @@ def authenticate_user(
     """
     Devuelve el usuario si las credenciales son válidas,
     o None si son inválidas.
+
+    La consulta corre en el threadpool y la verificación del hash en el
+    pool de procesos de password_hasher (503 si está saturado).
     """
-    user = db.query(User).filter(User.email == email).first()
+    user = await run_in_threadpool(get_user_by_email, db, email)
     if not user:
         return None
 
-    if not verify_password(password, user.hashed_password):
+    if not await password_hasher.verify(password, user.hashed_password):
         return None
 
     return user
 
 
 @router.post("/token")
-def login_for_access_token(
+async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db),
 ):
@@ -58,7 +72,7 @@ def login_for_access_token(
     """
 
     # En nuestro sistema, username == email
-    user = authenticate_user(db, email=form_data.username, password=form_data.password)
+    user = await authenticate_user(db, email=form_data.username, password=form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -79,8 +93,15 @@ def login_for_access_token(
 
     # Muy importante: sub debe ser un str con el id del usuario,
     # porque get_current_user luego hace int(sub)
+    claims = {"sub": str(user.id), "ver": user.token_version or 0}
+
+    if settings.JWT_SCOPED_CLAIMS:
+        # Rol e ids de perfil firmados: autorizar sin consultar la BD
+        principal = await run_in_threadpool(load_principal, db, user.id)
+        claims.update(principal_to_claims(principal))
+
     access_token = create_access_token(
-        data={"sub": str(user.id)},
+        data=claims,
         expires_delta=access_token_expires,
     )
 
@@ -88,3 +109,29 @@ def login_for_access_token(
         "access_token": access_token,
         "token_type": "bearer",
     }
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+):
+    """
+    Revoca el token actual: entra en la denylist hasta su expiración
+    y se saca del cache de tokens verificados.
+    """
+    try:
+        user_id, payload = decode_access_token(token)
+    except JWTError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    jti = payload.get("jti")
+    if jti is not None:
+        expires_at = datetime.fromtimestamp(payload["exp"], tz=timezone.utc)
+        token_denylist.revoke_jti(db, jti, expires_at)
+    token_cache.revoke_token(token)
+    return None
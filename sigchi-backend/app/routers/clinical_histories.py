@@ -1,19 +1,25 @@
 # app/routers/clinical_histories.py
 
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Query, Request, Response, status
 from sqlalchemy.orm import Session
 
 from app.core.db.database import get_db
-from app.core.db.models import User
+from app.core.etag import conditional, etag_matches, not_modified, row_etag, set_etag
+from app.core.pagination import page_start, set_next_cursor
+from app.core.principal import Principal
 from app.core.security import get_current_active_user
 from app.schemas.clinical_history import (
     ClinicalHistoryCreate,
     ClinicalHistoryUpdate,
     ClinicalHistoryResponse,
+    ClinicalHistorySearchResult,
 )
+from app.services.clinical_history_service import HISTORY_ORDER
 from app.services import (
+    access_service,
     clinical_history_service,
     patient_service,
     doctor_service,
@@ -26,21 +32,6 @@ router = APIRouter(
 )
 
 
-def _get_role_name(current_user: User) -> str | None:
-    role = getattr(current_user, "role", None)
-    return getattr(role, "name", None)
-
-
-def _get_current_patient_id_for_user(db: Session, current_user: User) -> int | None:
-    patient = patient_service.get_patient_by_user_id(db, current_user.id)
-    return patient.id if patient else None
-
-
-def _get_current_doctor_id_for_user(db: Session, current_user: User) -> int | None:
-    doctor = doctor_service.get_doctor_by_user_id(db, current_user.id)
-    return doctor.id if doctor else None
-
-
 # --- Crear historia clínica ---
 @router.post(
     "/",
@@ -50,7 +41,7 @@ def _get_current_doctor_id_for_user(db: Session, current_user: User) -> int | No
 def create_clinical_history(
     history_in: ClinicalHistoryCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
 ):
     """
     Reglas:
@@ -58,43 +49,13 @@ def create_clinical_history(
       - doctor: solo puede crear historias donde doctor_id corresponda a su propio perfil.
       - patient: NO puede crear historias.
     """
-    role_name = _get_role_name(current_user)
-
-    # Validar existencia de patient y doctor
-    patient = patient_service.get_patient(db, history_in.patient_id)
-    if not patient:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid patient_id",
-        )
-
-    doctor = doctor_service.get_doctor(db, history_in.doctor_id)
-    if not doctor:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid doctor_id",
-        )
-
-    if role_name == "admin":
-        pass
-
-    elif role_name == "doctor":
-        current_doctor_id = _get_current_doctor_id_for_user(db, current_user)
-        if not current_doctor_id or current_doctor_id != history_in.doctor_id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Doctors can only create histories for themselves as doctor",
-            )
-
-    else:
-        # patients (y cualquier rol no esperado) no pueden crear
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only admin or doctors can create clinical histories",
-        )
-
-    history = clinical_history_service.create_history(db, history_in)
-    return history
+    clinical_history_service.check_can_create(
+        current_user,
+        history_in,
+        patient_service.get_patient(db, history_in.patient_id),
+        doctor_service.get_doctor(db, history_in.doctor_id),
+    )
+    return clinical_history_service.create_history(db, history_in)
 
 
 # --- Listar historias según rol ---
@@ -103,10 +64,13 @@ def create_clinical_history(
     response_model=List[ClinicalHistoryResponse],
 )
 def list_clinical_histories(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 20,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
 ):
     """
     Reglas:
@@ -114,38 +78,41 @@ def list_clinical_histories(
       - doctor: ve solo historias donde él sea el doctor.
       - patient: ve solo historias donde él sea el paciente.
     """
-    role_name = _get_role_name(current_user)
-
-    if role_name == "admin":
-        return clinical_history_service.list_histories(db, skip=skip, limit=limit)
-
-    elif role_name == "doctor":
-        doctor_id = _get_current_doctor_id_for_user(db, current_user)
-        if not doctor_id:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Doctor profile not found for this user",
-            )
-        return clinical_history_service.list_histories_by_doctor(
-            db, doctor_id=doctor_id, skip=skip, limit=limit
-        )
+    skip, after = page_start(skip, cursor, datetime, int)
+    scope = access_service.list_scope(current_user)
+
+    etag, _ = clinical_history_service.get_page_version(db, skip, limit, after, **scope)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    page = clinical_history_service.list_histories(
+        db, skip=skip, limit=limit, after=after, **scope
+    )
+    set_etag(response, etag)
+    return set_next_cursor(response, page, limit, HISTORY_ORDER)
 
-    elif role_name == "patient":
-        patient_id = _get_current_patient_id_for_user(db, current_user)
-        if not patient_id:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Patient profile not found for this user",
-            )
-        return clinical_history_service.list_histories_by_patient(
-            db, patient_id=patient_id, skip=skip, limit=limit
-        )
 
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Insufficient permissions",
-        )
+# --- Buscar en historias (texto completo, según rol) ---
+@router.get(
+    "/search",
+    response_model=List[ClinicalHistorySearchResult],
+)
+def search_clinical_histories(
+    q: str = Query(..., min_length=2, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user),
+):
+    """
+    Busca en diagnosis, treatment y notes, ordenado por relevancia.
+    Mismo alcance que el listado:
+      - admin: todas las historias.
+      - doctor: solo historias donde él sea el doctor.
+      - patient: solo sus propias historias.
+    """
+    results = clinical_history_service.search_histories(
+        db, q, limit=limit, **access_service.list_scope(current_user)
+    )
+    return clinical_history_service.search_results(results)
 
 
 # --- Ver historia por id ---
@@ -155,8 +122,10 @@ def list_clinical_histories(
 )
 def get_clinical_history_by_id(
     history_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
 ):
     """
     Reglas:
@@ -164,41 +133,11 @@ def get_clinical_history_by_id(
       - doctor: solo historias donde él sea el doctor.
       - patient: solo historias donde él sea el paciente.
     """
-    history = clinical_history_service.get_history(db, history_id)
-    if not history:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Clinical history not found",
-        )
-
-    role_name = _get_role_name(current_user)
-
-    if role_name == "admin":
-        return history
-
-    elif role_name == "doctor":
-        doctor_id = _get_current_doctor_id_for_user(db, current_user)
-        if not doctor_id or doctor_id != history.doctor_id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You can only access histories where you are the doctor",
-            )
-        return history
-
-    elif role_name == "patient":
-        patient_id = _get_current_patient_id_for_user(db, current_user)
-        if not patient_id or patient_id != history.patient_id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You can only access your own clinical histories",
-            )
-        return history
-
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Insufficient permissions",
-        )
+    history = clinical_history_service.require_history(
+        clinical_history_service.get_history(db, history_id)
+    )
+    clinical_history_service.check_can_view(current_user, history)
+    return conditional(request, response, row_etag(history), history)
 
 
 # --- Listar historias de un paciente específico (admin/doctor/patient) ---
@@ -207,57 +146,42 @@ def get_clinical_history_by_id(
     response_model=List[ClinicalHistoryResponse],
 )
 def list_histories_for_patient(
+    request: Request,
+    response: Response,
     patient_id: int,
     skip: int = 0,
     limit: int = 50,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
 ):
     """
     Reglas:
       - admin: puede ver historias de cualquier paciente.
       - doctor: solo historias donde él sea el doctor del paciente indicado.
       - patient: solo puede usar este endpoint si patient_id corresponde a su propio perfil.
-    """
-    history_list = clinical_history_service.list_histories_by_patient(
-        db, patient_id=patient_id, skip=skip, limit=limit
-    )
-
-    role_name = _get_role_name(current_user)
-
-    if role_name == "admin":
-        return history_list
 
-    elif role_name == "doctor":
-        doctor_id = _get_current_doctor_id_for_user(db, current_user)
-        if not doctor_id:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Doctor profile not found for this user",
-            )
-        # Verificamos que todas las historias devueltas sean de él
-        for history in history_list:
-            if history.doctor_id != doctor_id:
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="You can only see histories where you are the doctor",
-                )
-        return history_list
+    Los permisos y el ETag salen de (id, updated_at, doctor_id) de la
+    página; las historias completas solo se cargan si el cliente no tiene
+    la versión vigente.
+    """
+    skip, after = page_start(skip, cursor, datetime, int)
+    doctor_id = clinical_history_service.patient_scope(current_user, patient_id)
 
-    elif role_name == "patient":
-        current_patient_id = _get_current_patient_id_for_user(db, current_user)
-        if not current_patient_id or current_patient_id != patient_id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You can only see your own clinical histories",
-            )
-        return history_list
+    etag, rows = clinical_history_service.get_page_version(
+        db, skip, limit, after, patient_id=patient_id
+    )
+    clinical_history_service.check_doctor_histories(doctor_id, rows)
+    if etag_matches(request, etag):
+        return not_modified(etag)
 
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Insufficient permissions",
-        )
+    history_list = clinical_history_service.list_histories(
+        db, skip=skip, limit=limit, after=after, patient_id=patient_id
+    )
+    # La página pudo cambiar entre ambas consultas
+    clinical_history_service.check_doctor_histories(doctor_id, history_list)
+    set_etag(response, etag)
+    return set_next_cursor(response, history_list, limit, HISTORY_ORDER)
 
 
 # --- Actualizar historia (admin o doctor dueño) ---
@@ -269,7 +193,7 @@ def update_clinical_history(
     history_id: int,
     history_in: ClinicalHistoryUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
 ):
     """
     Reglas:
@@ -277,33 +201,11 @@ def update_clinical_history(
       - doctor: solo historias donde él sea el doctor.
       - patient: no puede actualizar.
     """
-    history = clinical_history_service.get_history(db, history_id)
-    if not history:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Clinical history not found",
-        )
-
-    role_name = _get_role_name(current_user)
-
-    if role_name == "admin":
-        pass
-
-    elif role_name == "doctor":
-        doctor_id = _get_current_doctor_id_for_user(db, current_user)
-        if not doctor_id or doctor_id != history.doctor_id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You can only update histories where you are the doctor",
-            )
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only admin or doctors can update clinical histories",
-        )
-
-    history = clinical_history_service.update_history(db, history, history_in)
-    return history
+    history = clinical_history_service.require_history(
+        clinical_history_service.get_history(db, history_id)
+    )
+    clinical_history_service.check_can_update(current_user, history)
+    return clinical_history_service.update_history(db, history, history_in)
 
 
 # --- Eliminar historia (solo admin) ---
@@ -314,25 +216,15 @@ def update_clinical_history(
 def delete_clinical_history(
     history_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
 ):
     """
     Elimina una historia clínica (borrado físico).
     Solo 'admin'.
     """
-    role_name = _get_role_name(current_user)
-    if role_name != "admin":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only admin can delete clinical histories",
-        )
-
-    history = clinical_history_service.get_history(db, history_id)
-    if not history:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Clinical history not found",
-        )
-
+    clinical_history_service.check_can_delete(current_user)
+    history = clinical_history_service.require_history(
+        clinical_history_service.get_history(db, history_id)
+    )
     clinical_history_service.delete_history(db, history)
     return None
@@ -1,25 +1,34 @@
 # app/routers/doctors.py
 
-from typing import List
+from datetime import date, datetime
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Query, Request, Response, status
 from sqlalchemy.orm import Session
 
 from app.core.db.database import get_db
-from app.core.db.models import User
+from app.core.etag import conditional, etag_matches, not_modified, set_etag
+from app.core.pagination import page_start, set_next_cursor
+from app.core.principal import Principal
 from app.core.security import (
     require_roles,
     get_current_admin_user,
     get_current_doctor_user,
     get_current_active_user,
 )
+from app.schemas.appointment import DoctorCalendar
 from app.schemas.doctor import (
     DoctorCreate,
     DoctorUpdate,
     DoctorResponse,
+    FreeSlot,
+    ScheduleBlock,
+    ScheduleBlockResponse,
 )
-from app.services import doctor_service
-from app.core.db.models import Doctor
+from app.services import access_service, appointment_service, availability_service, doctor_service
+from app.services.appointment_service import calendar_response, calendar_window
+from app.services.availability_service import search_window
+from app.services.doctor_service import DOCTOR_ORDER, doctor_to_response
 
 
 router = APIRouter(
@@ -27,16 +36,6 @@ router = APIRouter(
     tags=["Doctors"],
 )
 
-def doctor_to_response(doctor: Doctor) -> dict:
-    user = getattr(doctor, "user", None)
-    email = getattr(user, "email", None)
-    return {
-        "id": doctor.id,
-        "user_id": doctor.user_id,
-        "specialty": doctor.specialty,
-        "user_email": email,
-    }
-
 
 # --- Crear doctor (solo admin) ---
 @router.post(
@@ -47,7 +46,7 @@ def doctor_to_response(doctor: Doctor) -> dict:
 def create_doctor(
     doctor_in: DoctorCreate,
     db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin_user),
+    current_admin: Principal = Depends(get_current_admin_user),
 ):
     """
     Crea un perfil de doctor asociado a un usuario existente.
@@ -56,34 +55,11 @@ def create_doctor(
       - El usuario referenciado debe tener rol 'doctor'.
       - No debe existir ya un perfil de doctor para ese user_id.
     """
-
-    # ¿Ya existe un perfil de doctor para ese usuario?
-    existing = doctor_service.get_doctor_by_user_id(db, doctor_in.user_id)
-    if existing:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="This user already has a doctor profile",
-        )
-
-    # Validar que el usuario existe
-    user = db.query(User).filter(User.id == doctor_in.user_id).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User not found",
-        )
-
-    # Validar que su rol sea 'doctor'
-    role = getattr(user, "role", None)
-    role_name = getattr(role, "name", None)
-    if role_name != "doctor":
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User must have role 'doctor' to create a doctor profile",
-        )
-
-    doctor = doctor_service.create_doctor(db, doctor_in)
-    return doctor_to_response(doctor)
+    doctor_service.check_new_doctor(
+        doctor_service.get_doctor_by_user_id(db, doctor_in.user_id),
+        doctor_service.get_user_role(db, doctor_in.user_id),
+    )
+    return doctor_to_response(doctor_service.create_doctor(db, doctor_in))
 
 
 # --- Listar doctores (solo admin; si quieres, agregar 'doctor') ---
@@ -92,39 +68,69 @@ def create_doctor(
     response_model=List[DoctorResponse],
 )
 def list_doctors(
+    response: Response,
     skip: int = 0,
     limit: int = 20,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_roles(["admin"])),
+    current_user: Principal = Depends(require_roles(["admin"])),
 ):
     """
     Lista doctores con paginación básica.
     Solo 'admin' (puedes añadir 'doctor' en require_roles si lo necesitas).
     """
-    doctors = doctor_service.list_doctors(db, skip=skip, limit=limit)
+    skip, after = page_start(skip, cursor, int)
+    doctors = doctor_service.list_doctors(db, skip=skip, limit=limit, after=after)
+    set_next_cursor(response, doctors, limit, DOCTOR_ORDER)
     return [doctor_to_response(d) for d in doctors]
 
 
+# --- Turnos libres (cualquier usuario activo) ---
+@router.get(
+    "/availability",
+    response_model=List[FreeSlot],
+)
+def get_availability(
+    specialty: Optional[str] = None,
+    doctor_id: Optional[int] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user),
+):
+    """
+    Próximos turnos libres (de APPOINTMENT_SLOT_MINUTES) entre todos los
+    doctores con horario cargado, ordenados por hora. Se puede filtrar por
+    especialidad y/o doctor. Sin date_from se busca desde ahora; sin
+    date_to, los próximos 30 días.
+    """
+    start, end = search_window(date_from, date_to)
+    return availability_service.find_free_slots(
+        db, start, end, limit=limit, specialty=specialty, doctor_id=doctor_id
+    )
+
+
 # --- Ver mi perfil de doctor (rol doctor) ---
 @router.get(
     "/me",
     response_model=DoctorResponse,
 )
 def get_my_doctor_profile(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
-    current_doctor_user: User = Depends(get_current_doctor_user),
+    current_doctor_user: Principal = Depends(get_current_doctor_user),
 ):
     """
     Devuelve el perfil de doctor asociado al usuario autenticado
     con rol 'doctor'.
     """
-    doctor = doctor_service.get_doctor_by_user_id(db, current_doctor_user.id)
-    if not doctor:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Doctor profile not found for this user",
-        )
-    return doctor_to_response(doctor)
+    doctor = doctor_service.require_profile(
+        doctor_service.get_doctor_by_user_id(db, current_doctor_user.id)
+    )
+    etag = doctor_service.profile_etag(doctor)
+    return conditional(request, response, etag, doctor_to_response(doctor))
 
 
 # --- Obtener doctor por id (visible para cualquier usuario activo) ---
@@ -135,22 +141,89 @@ def get_my_doctor_profile(
 def get_doctor_by_id(
     doctor_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
 ):
     """
     En este punto, la información del doctor la consideramos "pública"
     (sirve para que pacientes vean con quién pueden agendar).
     Si luego quieres limitar, puedes añadir lógica por rol aquí.
     """
-    doctor = doctor_service.get_doctor(db, doctor_id)
-    if not doctor:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Doctor not found",
-        )
+    doctor = doctor_service.require_doctor(doctor_service.get_doctor(db, doctor_id))
     return doctor_to_response(doctor)
 
 
+# --- Horario semanal del doctor ---
+@router.get(
+    "/{doctor_id}/schedule",
+    response_model=List[ScheduleBlockResponse],
+)
+def get_doctor_schedule(
+    doctor_id: int,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user),
+):
+    """
+    Bloques de atención del doctor (públicos, como el perfil).
+    """
+    return availability_service.get_schedule(db, doctor_id)
+
+
+@router.put(
+    "/{doctor_id}/schedule",
+    response_model=List[ScheduleBlockResponse],
+)
+def replace_doctor_schedule(
+    doctor_id: int,
+    blocks: List[ScheduleBlock],
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user),
+):
+    """
+    Reemplaza el horario semanal completo del doctor.
+    Reglas:
+      - admin: cualquier doctor.
+      - doctor: solo su propio horario.
+    """
+    doctor = doctor_service.require_doctor(doctor_service.get_doctor(db, doctor_id))
+    access_service.check_own_doctor(current_user, doctor, "You can only update your own schedule")
+    availability_service.check_schedule(blocks)
+    return availability_service.replace_schedule(db, doctor_id, blocks)
+
+
+# --- Calendario del doctor (admin o el propio doctor) ---
+@router.get(
+    "/{doctor_id}/calendar",
+    response_model=DoctorCalendar,
+)
+def get_doctor_calendar(
+    doctor_id: int,
+    request: Request,
+    response: Response,
+    date_from: date = Query(..., alias="from"),
+    date_to: date = Query(..., alias="to"),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user),
+):
+    """
+    Citas del doctor entre dos fechas (inclusive, en hora de la clínica)
+    ordenadas por scheduled_at, y cuántas hay por día y estado.
+
+    Responde con ETag: si el cliente reenvía If-None-Match y nada cambió
+    en el rango, devuelve 304 tras una sola consulta agregada.
+    """
+    if doctor_service.check_calendar_access(current_user, doctor_id):
+        doctor_service.require_doctor(doctor_service.get_doctor(db, doctor_id))
+
+    start, end = calendar_window(date_from, date_to)
+    etag = appointment_service.get_calendar_etag(db, doctor_id, start, end)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    appointments, days = appointment_service.get_calendar(db, doctor_id, start, end)
+    set_etag(response, etag)
+    return calendar_response(doctor_id, date_from, date_to, appointments, days)
+
+
 # --- Actualizar doctor (admin o el propio doctor) ---
 @router.put(
     "/{doctor_id}",
@@ -160,7 +233,7 @@ def update_doctor(
     doctor_id: int,
     doctor_in: DoctorUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
 ):
     """
     Actualiza datos de un doctor.
@@ -168,34 +241,11 @@ def update_doctor(
       - admin: puede actualizar cualquier doctor.
       - doctor: solo su propio perfil.
     """
-    doctor = doctor_service.get_doctor(db, doctor_id)
-    if not doctor:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Doctor not found",
-        )
-
-    role = getattr(current_user, "role", None)
-    role_name = getattr(role, "name", None)
-
-    if role_name == "admin":
-        # Admin puede actualizar cualquiera
-        pass
-    elif role_name == "doctor":
-        # El doctor solo puede actualizar su propio perfil
-        if doctor.user_id != current_user.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You can only update your own doctor profile",
-            )
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Insufficient permissions",
-        )
-
-    doctor = doctor_service.update_doctor(db, doctor, doctor_in)
-    return doctor_to_response(doctor)
+    doctor = doctor_service.require_doctor(doctor_service.get_doctor(db, doctor_id))
+    access_service.check_own_doctor(
+        current_user, doctor, "You can only update your own doctor profile"
+    )
+    return doctor_to_response(doctor_service.update_doctor(db, doctor, doctor_in))
 
 
 # --- Eliminar doctor (solo admin) ---
@@ -206,18 +256,12 @@ def update_doctor(
 def delete_doctor(
     doctor_id: int,
     db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin_user),
+    current_admin: Principal = Depends(get_current_admin_user),
 ):
     """
     Elimina un doctor (delete físico).
     Solo 'admin'. Más adelante podrías cambiarlo a soft-delete.
     """
-    doctor = doctor_service.get_doctor(db, doctor_id)
-    if not doctor:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Doctor not found",
-        )
-
+    doctor = doctor_service.require_doctor(doctor_service.get_doctor(db, doctor_id))
     doctor_service.delete_doctor(db, doctor)
     return None
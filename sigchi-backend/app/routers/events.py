@@ -0,0 +1,127 @@
+# app/routers/events.py
+
+import asyncio
+import time
+
+from fastapi import APIRouter, WebSocket, status
+from fastapi.websockets import WebSocketState
+from jose import JWTError
+
+from app.core.config import settings
+from app.core.events import ADMIN_TOPIC, Subscription, doctor_topic, event_bus, patient_topic
+from app.core.principal import Principal, resolve_principal
+from app.core.security import decode_access_token, principal_from_token_claims
+from app.core.token_denylist import token_denylist
+
+
+router = APIRouter(
+    prefix="/api/events",
+    tags=["Events"],
+)
+
+
+def _topic(principal: Principal) -> tuple | None:
+    # Mismo alcance que list_appointments / list_clinical_histories
+    if principal.role_name == "admin":
+        return ADMIN_TOPIC
+    if principal.role_name == "doctor" and principal.doctor_id:
+        return doctor_topic(principal.doctor_id)
+    if principal.role_name == "patient" and principal.patient_id:
+        return patient_topic(principal.patient_id)
+    return None
+
+
+async def _authenticate(websocket: WebSocket) -> tuple[Principal, dict] | None:
+    # Los navegadores no permiten headers en el handshake: cookie
+    # access_token (la que fija el login) o ?token=
+    token = websocket.query_params.get("token") or websocket.cookies.get("access_token")
+    if not token:
+        return None
+    try:
+        user_id, payload = decode_access_token(token)
+    except JWTError:
+        return None
+    principal = principal_from_token_claims(payload)
+    if principal is None:
+        principal = await resolve_principal(user_id)
+    if principal is None or not principal.is_active:
+        return None
+    return principal, payload
+
+
+async def _send_events(websocket: WebSocket, subscription: Subscription) -> None:
+    while True:
+        message = await subscription.get()
+        if message is None:
+            return
+        await websocket.send_text(message)
+
+
+def _log_send_failure(task: asyncio.Task) -> None:
+    # Recupera la excepción apenas termina la tarea (si no, asyncio avisa
+    # "Task exception was never retrieved")
+    if not task.cancelled() and task.exception() is not None:
+        print(f"Error enviando eventos por WebSocket: {task.exception()!r}")
+
+
+async def _wait_disconnect(websocket: WebSocket) -> None:
+    # Los mensajes del cliente se ignoran: el canal es solo de bajada
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+
+@router.websocket("/ws")
+async def events_websocket(websocket: WebSocket):
+    """
+    Cambios de citas e historias en vivo, como JSON
+    {"type": "appointment.created" | "appointment.updated" |
+    "appointment.imported" | "history.created" | "history.updated" |
+    "history.deleted", "data": {...}}.
+
+    Cada rol recibe lo mismo que ve en los listados: admin todo, doctor
+    lo suyo y paciente lo suyo. La conexión se cierra cuando vence o se
+    revoca el token (1008) o si el cliente no consume los mensajes (1013);
+    al reconectar conviene volver a pedir los listados.
+    """
+    auth = await _authenticate(websocket)
+    topic = _topic(auth[0]) if auth is not None else None
+    if topic is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    _, payload = auth
+
+    await websocket.accept()
+    subscription = event_bus.subscribe(topic)
+    sender = asyncio.create_task(_send_events(websocket, subscription))
+    sender.add_done_callback(_log_send_failure)
+    receiver = asyncio.create_task(_wait_disconnect(websocket))
+    done = set()
+    try:
+        # La denylist se revisa cada TOKEN_DENYLIST_SYNC_SECONDS (lo que
+        # tarda en llegar una revocación de otro worker)
+        while not done:
+            timeout = settings.TOKEN_DENYLIST_SYNC_SECONDS
+            if "exp" in payload:
+                timeout = min(timeout, max(payload["exp"] - time.time(), 0))
+            done, _ = await asyncio.wait(
+                {sender, receiver}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done and (
+                token_denylist.is_revoked(payload) or payload.get("exp", float("inf")) <= time.time()
+            ):
+                break
+    finally:
+        event_bus.unsubscribe(subscription)
+        sender.cancel()
+        receiver.cancel()
+
+    if receiver in done:
+        return
+    if sender in done:
+        if sender.exception() is None:
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        elif websocket.application_state == WebSocketState.CONNECTED:
+            # El error no fue del socket mismo: avisar al cliente
+            await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+        return
+    await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
@@ -0,0 +1,63 @@
+# app/routers/exports.py
+
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+
+from app.core.principal import Principal
+from app.core.security import get_current_admin_user
+from app.services import export_service
+
+
+router = APIRouter(
+    prefix="/api/export",
+    tags=["Export"],
+)
+
+FORMAT_QUERY = Query("ndjson", alias="format", pattern="^(ndjson|csv)$")
+
+
+def _export_response(stmt, fmt: str, name: str, request: Request) -> StreamingResponse:
+    return StreamingResponse(
+        export_service.stream_rows(stmt, fmt, request),
+        media_type=export_service.MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'},
+    )
+
+
+@router.get("/appointments")
+def export_appointments(
+    request: Request,
+    fmt: str = FORMAT_QUERY,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    doctor_id: Optional[int] = None,
+    patient_id: Optional[int] = None,
+    current_admin: Principal = Depends(get_current_admin_user),
+):
+    """
+    Exporta citas (NDJSON o CSV) filtrando por rango de scheduled_at
+    [date_from, date_to), doctor y paciente. Solo admin.
+    """
+    stmt = export_service.appointments_stmt(date_from, date_to, doctor_id, patient_id)
+    return _export_response(stmt, fmt, "appointments", request)
+
+
+@router.get("/histories")
+def export_histories(
+    request: Request,
+    fmt: str = FORMAT_QUERY,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    doctor_id: Optional[int] = None,
+    patient_id: Optional[int] = None,
+    current_admin: Principal = Depends(get_current_admin_user),
+):
+    """
+    Exporta historias clínicas (NDJSON o CSV) filtrando por rango de
+    visit_date [date_from, date_to), doctor y paciente. Solo admin.
+    """
+    stmt = export_service.histories_stmt(date_from, date_to, doctor_id, patient_id)
+    return _export_response(stmt, fmt, "histories", request)
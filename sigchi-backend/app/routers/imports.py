@@ -0,0 +1,69 @@
+# app/routers/imports.py
+
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.orm import Session
+
+from app.core.db.database import get_db
+from app.core.principal import Principal
+from app.core.security import get_current_admin_user
+from app.schemas.imports import ImportReport
+from app.services import import_service
+
+
+router = APIRouter(
+    prefix="/api/import",
+    tags=["Import"],
+)
+
+# Todos los endpoints reciben el archivo como cuerpo crudo:
+#   Content-Type: application/x-ndjson  -> un objeto JSON por línea
+#   Content-Type: text/csv              -> primera fila con los nombres de campo
+# y devuelven un reporte con los errores por fila (sin abortar el lote).
+
+
+@router.post("/users", response_model=ImportReport)
+async def import_users(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_admin: Principal = Depends(get_current_admin_user),
+):
+    """
+    Alta masiva de usuarios (email, password, role_id). Solo admin.
+    """
+    return await import_service.run_import(request, db, import_service.USERS)
+
+
+@router.post("/patients", response_model=ImportReport)
+async def import_patients(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_admin: Principal = Depends(get_current_admin_user),
+):
+    """
+    Alta masiva de perfiles de paciente (user_id + datos). Solo admin.
+    """
+    return await import_service.run_import(request, db, import_service.PATIENTS)
+
+
+@router.post("/doctors", response_model=ImportReport)
+async def import_doctors(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_admin: Principal = Depends(get_current_admin_user),
+):
+    """
+    Alta masiva de perfiles de doctor (user_id, specialty). Solo admin.
+    """
+    return await import_service.run_import(request, db, import_service.DOCTORS)
+
+
+@router.post("/appointments", response_model=ImportReport)
+async def import_appointments(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_admin: Principal = Depends(get_current_admin_user),
+):
+    """
+    Alta masiva de citas (patient_id, doctor_id, scheduled_at...). Solo admin.
+    """
+    return await import_service.run_import(request, db, import_service.APPOINTMENTS)
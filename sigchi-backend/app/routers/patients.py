@@ -1,12 +1,14 @@
 # app/routers/patients.py
 
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Query, Request, Response, status
 from sqlalchemy.orm import Session
 
 from app.core.db.database import get_db
-from app.core.db.models import User
+from app.core.etag import conditional, row_etag
+from app.core.pagination import page_start, set_next_cursor
+from app.core.principal import Principal
 from app.core.security import (
     require_roles,
     get_current_patient_user,
@@ -16,8 +18,10 @@ from app.schemas.patient import (
     PatientCreate,
     PatientUpdate,
     PatientResponse,
+    PatientSearchResult,
 )
 from app.services import patient_service
+from app.services.patient_service import PATIENT_ORDER
 
 
 router = APIRouter(
@@ -35,23 +39,16 @@ router = APIRouter(
 def create_patient(
     patient_in: PatientCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_roles(["admin", "doctor"])),
+    current_user: Principal = Depends(require_roles(["admin", "doctor"])),
 ):
     """
     Crea un perfil de paciente asociado a un usuario existente.
     Solo 'admin' y 'doctor' pueden crear pacientes.
     """
-
-    # Evitar duplicados por user_id
-    existing = patient_service.get_patient_by_user_id(db, patient_in.user_id)
-    if existing:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="This user already has a patient profile",
-        )
-
-    patient = patient_service.create_patient(db, patient_in)
-    return patient
+    patient_service.check_new_patient(
+        patient_service.get_patient_by_user_id(db, patient_in.user_id)
+    )
+    return patient_service.create_patient(db, patient_in)
 
 
 # --- Listar pacientes (solo admin; si quieres, puedes añadir 'doctor') ---
@@ -60,17 +57,20 @@ def create_patient(
     response_model=List[PatientResponse],
 )
 def list_patients(
+    response: Response,
     skip: int = 0,
     limit: int = 20,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_roles(["admin", "doctor"])),
+    current_user: Principal = Depends(require_roles(["admin", "doctor"])),
 ):
     """
     Lista de pacientes con paginación básica.
     Admin y doctor.
     """
-    patients = patient_service.list_patients(db, skip=skip, limit=limit)
-    return patients
+    skip, after = page_start(skip, cursor, int)
+    patients = patient_service.list_patients(db, skip=skip, limit=limit, after=after)
+    return set_next_cursor(response, patients, limit, PATIENT_ORDER)
 
 
 # --- Ver mi propio perfil de paciente (rol patient) ---
@@ -79,20 +79,39 @@ def list_patients(
     response_model=PatientResponse,
 )
 def get_my_patient_profile(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
-    current_patient_user: User = Depends(get_current_patient_user),
+    current_patient_user: Principal = Depends(get_current_patient_user),
 ):
     """
     Devuelve el perfil de paciente asociado al usuario autenticado
     con rol 'patient'.
     """
-    patient = patient_service.get_patient_by_user_id(db, current_patient_user.id)
-    if not patient:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Patient profile not found for this user",
-        )
-    return patient
+    patient = patient_service.require_profile(
+        patient_service.get_patient_by_user_id(db, current_patient_user.id)
+    )
+    # patients no tiene updated_at: el ETag sale de sus columnas
+    return conditional(request, response, row_etag(patient), patient)
+
+
+# --- Buscar pacientes / autocompletado (admin o doctor) ---
+@router.get(
+    "/search",
+    response_model=List[PatientSearchResult],
+)
+def search_patients(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_roles(["admin", "doctor"])),
+):
+    """
+    Busca por prefijo de documento, nombre, apellido o teléfono (cada
+    palabra de q debe coincidir con alguno). Pensado para autocompletar:
+    primero la coincidencia exacta de documento, luego por apellido.
+    """
+    return patient_service.search_patients(db, q, limit)
 
 
 # --- Obtener paciente por id ---
@@ -103,7 +122,7 @@ def get_my_patient_profile(
 def get_patient_by_id(
     patient_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
 ):
     """
     Reglas:
@@ -111,36 +130,10 @@ def get_patient_by_id(
       - doctor: puede ver cualquier paciente (más adelante podemos filtrar 'sus' pacientes).
       - patient: solo puede ver su propio registro.
     """
-    patient = patient_service.get_patient(db, patient_id)
-    if not patient:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Patient not found",
-        )
-
-    role = getattr(current_user, "role", None)
-    role_name = getattr(role, "name", None)
-
-    if role_name == "patient":
-        # El paciente solo se puede ver a sí mismo
-        if patient.user_id != current_user.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You cannot access another patient's data",
-            )
-
-    elif role_name in ("admin", "doctor"):
-        # Por ahora, admin/doctor pueden ver cualquier paciente.
-        # Más adelante, podemos restringir doctor a "sus" pacientes.
-        pass
-
-    else:
-        # Rol desconocido (por si acaso)
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Insufficient permissions",
-        )
-
+    patient = patient_service.require_patient(
+        patient_service.get_patient(db, patient_id)
+    )
+    patient_service.check_can_view(current_user, patient)
     return patient
 
 
@@ -153,7 +146,7 @@ def update_patient(
     patient_id: int,
     patient_in: PatientUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_roles(["admin", "doctor"])),
+    current_user: Principal = Depends(require_roles(["admin", "doctor"])),
 ):
     """
     Actualiza datos de un paciente.
@@ -161,15 +154,10 @@ def update_patient(
     (En el futuro podemos agregar lógica para que el doctor solo
     pueda modificar sus propios pacientes).
     """
-    patient = patient_service.get_patient(db, patient_id)
-    if not patient:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Patient not found",
-        )
-
-    patient = patient_service.update_patient(db, patient, patient_in)
-    return patient
+    patient = patient_service.require_patient(
+        patient_service.get_patient(db, patient_id)
+    )
+    return patient_service.update_patient(db, patient, patient_in)
 
 
 # --- Eliminar paciente (solo admin) ---
@@ -180,18 +168,14 @@ def update_patient(
 def delete_patient(
     patient_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_roles(["admin"])),
+    current_user: Principal = Depends(require_roles(["admin"])),
 ):
     """
     Elimina un paciente (delete físico).
     Solo 'admin'. Más adelante podrías cambiarlo a soft-delete.
     """
-    patient = patient_service.get_patient(db, patient_id)
-    if not patient:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Patient not found",
-        )
-
+    patient = patient_service.require_patient(
+        patient_service.get_patient(db, patient_id)
+    )
     patient_service.delete_patient(db, patient)
     return None
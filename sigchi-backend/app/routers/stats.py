@@ -0,0 +1,51 @@
+# app/routers/stats.py
+
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.core.db.database import get_db
+from app.core.principal import Principal
+from app.core.security import get_current_admin_user
+from app.schemas.stats import DashboardStats, StatsRebuild
+from app.services import stats_service
+
+
+router = APIRouter(
+    prefix="/api/stats",
+    tags=["Stats"],
+)
+
+
+@router.get("", response_model=DashboardStats)
+def get_dashboard_stats(
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    weeks: int = Query(12, ge=1, le=260),
+    db: Session = Depends(get_db),
+    current_admin: Principal = Depends(get_current_admin_user),
+):
+    """
+    Contadores del dashboard (solo admin): citas por estado, por día en
+    [from, to] y por doctor, historias por doctor y pacientes nuevos en
+    las últimas `weeks` semanas hasta `to`.
+
+    Se leen de stat_counters, que los servicios mantienen en cada
+    escritura: no se cuenta sobre las tablas de citas / historias.
+    """
+    date_from, date_to = stats_service.stats_window(date_from, date_to)
+    return stats_service.get_dashboard(db, date_from, date_to, weeks)
+
+
+@router.post("/rebuild", response_model=StatsRebuild)
+def rebuild_dashboard_stats(
+    db: Session = Depends(get_db),
+    current_admin: Principal = Depends(get_current_admin_user),
+):
+    """
+    Recalcula los contadores de citas e historias desde las tablas (solo
+    admin). Equivale a `python -m app.rebuild_stats`.
+    """
+    return stats_service.rebuild_stats(db)
@@ -1,17 +1,22 @@
 # app/routers/users.py
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
 from sqlalchemy.orm import Session
-from typing import List
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
 
+from app.core.config import settings
 from app.core.db.database import get_db
 from app.core.db.models import User, Role
+from app.core.pagination import apply_keyset, decode_cursor, set_next_cursor
+from app.core.principal import Principal, principal_cache
 from app.core.security import (
-    get_password_hash,
+    password_hasher,
     get_current_user,
     get_current_admin_user,
 )
-from app.schemas.user import UserCreate, UserResponse
+from app.core.token_denylist import token_denylist
+from app.schemas.user import UserCreate, UserResponse, UserUpdate
 from fastapi import Body
 
 
@@ -21,12 +26,7 @@ router = APIRouter(
 )
 
 
-@router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def create_user(
-    payload: UserCreate = Body(...),
-    db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin_user),
-):
+def _check_new_user(db: Session, payload: UserCreate) -> None:
     # 1) ¿Ya existe un usuario con ese email?
     existing_user = db.query(User).filter(User.email == payload.email).first()
     if existing_user:
@@ -43,39 +43,102 @@ def create_user(
             detail="Invalid role_id",
         )
 
-    # 3) Crear el usuario
+
+def _insert_user(db: Session, payload: UserCreate, hashed_password: str) -> User:
     db_user = User(
         email=payload.email,
-        hashed_password=get_password_hash(payload.password),
+        hashed_password=hashed_password,
         role_id=payload.role_id,
     )
 
     db.add(db_user)
     db.commit()
-    db.refresh(db_user)
+    principal_cache.invalidate(db_user.id)
+    return db_user
+
+
+@router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
+async def create_user(
+    payload: UserCreate = Body(...),
+    db: Session = Depends(get_db),
+    current_admin: Principal = Depends(get_current_admin_user),
+):
+    await run_in_threadpool(_check_new_user, db, payload)
+
+    # 3) Crear el usuario (el hash corre en el pool de procesos)
+    hashed_password = await password_hasher.hash(payload.password)
+    db_user = await run_in_threadpool(_insert_user, db, payload, hashed_password)
 
     return db_user
 
 
 @router.get("/", response_model=List[UserResponse])
 def list_users(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin_user),
+    current_admin: Principal = Depends(get_current_admin_user),
 ):
     """
     Listado de usuarios, solo para admin.
     """
+    after = decode_cursor(cursor, int) if cursor else None
+    if after is not None:
+        skip = 0
+
     users = (
-        db.query(User)
-        .order_by(User.id)
+        apply_keyset(db.query(User), (User.id,), after)
         .offset(skip)
         .limit(limit)
         .all()
     )
-    return users
+    return set_next_cursor(response, users, limit, (User.id,))
+
+def _update_user(db: Session, user_id: int, payload: UserUpdate) -> User:
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found",
+        )
+
+    data = payload.model_dump(exclude_unset=True, exclude_none=True)
+    if "role_id" in data and not db.query(Role).filter(Role.id == data["role_id"]).first():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid role_id",
+        )
+
+    deactivated = data.get("is_active") is False and user.is_active is not False
+    role_changed = data.get("role_id", user.role_id) != user.role_id
+    for field, value in data.items():
+        setattr(user, field, value)
+    db.commit()
+
+    principal_cache.invalidate(user.id)
+    # Sus tokens siguen valiendo hasta exp: un usuario desactivado se
+    # corta ya en todos los workers, y si el rol va firmado en el token
+    # (JWT_SCOPED_CLAIMS), también al cambiarlo
+    if deactivated or (role_changed and settings.JWT_SCOPED_CLAIMS):
+        token_denylist.revoke_user(db, user.id)
+    return user
+
+
+@router.patch("/{user_id}", response_model=UserResponse)
+def update_user(
+    user_id: int,
+    payload: UserUpdate,
+    db: Session = Depends(get_db),
+    current_admin: Principal = Depends(get_current_admin_user),
+):
+    """
+    Activa / desactiva un usuario o le cambia el rol. Solo admin.
+    """
+    return _update_user(db, user_id, payload)
+
 
 @router.get("/me", response_model=UserResponse)
-async def read_current_user(current_user: User = Depends(get_current_user)):
+async def read_current_user(current_user: Principal = Depends(get_current_user)):
     return current_user
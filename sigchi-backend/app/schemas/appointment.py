@@ -2,8 +2,8 @@
 
 from __future__ import annotations
 
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel, ConfigDict
 
@@ -41,3 +41,18 @@ class AppointmentResponse(AppointmentBase):
     updated_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class CalendarDay(BaseModel):
+    date: date
+    total: int
+    # status -> cantidad de citas ese día
+    by_status: Dict[str, int]
+
+
+class DoctorCalendar(BaseModel):
+    doctor_id: int
+    date_from: date
+    date_to: date
+    appointments: List[AppointmentResponse]
+    days: List[CalendarDay]
@@ -37,3 +37,8 @@ class ClinicalHistoryResponse(ClinicalHistoryBase):
     updated_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ClinicalHistorySearchResult(ClinicalHistoryResponse):
+    # Relevancia (mayor = mejor); 0 en el backend sin ranking
+    rank: float
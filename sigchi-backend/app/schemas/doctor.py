@@ -2,9 +2,10 @@
 
 from __future__ import annotations
 
+from datetime import datetime, time
 from typing import Optional
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 
 class DoctorBase(BaseModel):
@@ -26,3 +27,33 @@ class DoctorResponse(DoctorBase):
     user_email: Optional[str] = None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ScheduleBlock(BaseModel):
+    """
+    Bloque semanal de atención, en hora local de la clínica.
+    weekday: 0 = lunes ... 6 = domingo.
+    """
+    weekday: int = Field(ge=0, le=6)
+    start_time: time
+    end_time: time
+
+    @model_validator(mode="after")
+    def _check_range(self):
+        if self.end_time <= self.start_time:
+            raise ValueError("end_time must be after start_time")
+        return self
+
+
+class ScheduleBlockResponse(ScheduleBlock):
+    id: int
+    doctor_id: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class FreeSlot(BaseModel):
+    doctor_id: int
+    specialty: Optional[str] = None
+    start: datetime
+    end: datetime
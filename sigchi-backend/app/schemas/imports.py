@@ -0,0 +1,24 @@
+# app/schemas/imports.py
+
+from __future__ import annotations
+
+from typing import List
+
+from pydantic import BaseModel
+
+
+class ImportRowError(BaseModel):
+    # Número de fila de datos (1 = primera fila después del encabezado CSV)
+    row: int
+    error: str
+
+
+class ImportReport(BaseModel):
+    entity: str
+    format: str  # "ndjson" o "csv"
+    total: int
+    inserted: int
+    failed: int
+    errors: List[ImportRowError] = []
+    # True si hubo más errores de los que se devuelven
+    errors_truncated: bool = False
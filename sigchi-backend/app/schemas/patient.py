@@ -36,3 +36,10 @@ class PatientResponse(PatientBase):
     # last_name: Optional[str] = None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class PatientSearchResult(PatientResponse):
+    # Datos del User asociado, para mostrar en el autocompletado
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    email: Optional[str] = None
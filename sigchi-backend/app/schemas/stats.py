@@ -0,0 +1,44 @@
+# app/schemas/stats.py
+
+from __future__ import annotations
+
+from datetime import date
+from typing import Dict, List
+
+from pydantic import BaseModel
+
+from app.schemas.appointment import CalendarDay
+
+
+class DoctorAppointmentStats(BaseModel):
+    doctor_id: int
+    total: int
+    # status -> cantidad de citas del doctor
+    by_status: Dict[str, int]
+
+
+class DoctorHistoryStats(BaseModel):
+    doctor_id: int
+    count: int
+
+
+class WeekStats(BaseModel):
+    # Lunes de la semana (hora de la clínica)
+    week_start: date
+    count: int
+
+
+class DashboardStats(BaseModel):
+    date_from: date
+    date_to: date
+    appointments_by_status: Dict[str, int]
+    # Solo los días de [date_from, date_to] que tienen citas
+    appointments_by_day: List[CalendarDay]
+    appointments_by_doctor: List[DoctorAppointmentStats]
+    histories_by_doctor: List[DoctorHistoryStats]
+    new_patients_by_week: List[WeekStats]
+
+
+class StatsRebuild(BaseModel):
+    metrics: List[str]
+    counters: int
@@ -1,4 +1,6 @@
 # app/schemas/user.py
+from typing import Optional
+
 from pydantic import BaseModel, EmailStr, constr
 from pydantic import BaseModel, EmailStr
 
@@ -14,8 +16,18 @@ class UserCreate(BaseModel):
     role_id: int
 
 
+class UserUpdate(BaseModel):
+    """
+    Cambios de acceso (solo admin). Desactivar al usuario revoca sus
+    tokens; cambiarle el rol también, si van firmados (JWT_SCOPED_CLAIMS).
+    """
+    is_active: Optional[bool] = None
+    role_id: Optional[int] = None
+
+
 class UserResponse(UserBase):
     id: int
+    is_active: Optional[bool] = None
 
     class Config:
         # Pydantic v2: reemplaza orm_mode=True
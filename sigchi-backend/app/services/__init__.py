@@ -1,13 +1,33 @@
 # app/services/__init__.py
 
+from . import access_service
 from . import patient_service
 from . import doctor_service
 from . import appointment_service
 from . import clinical_history_service
+from . import async_patient_service
+from . import async_doctor_service
+from . import async_appointment_service
+from . import async_clinical_history_service
+from . import import_service
+from . import export_service
+from . import stats_service
+from . import async_stats_service
+from . import reminder_service
 
 __all__ = [
+    "access_service",
     "patient_service",
     "doctor_service",
     "appointment_service",
     "clinical_history_service",
+    "async_patient_service",
+    "async_doctor_service",
+    "async_appointment_service",
+    "async_clinical_history_service",
+    "import_service",
+    "export_service",
+    "stats_service",
+    "async_stats_service",
+    "reminder_service",
 ]
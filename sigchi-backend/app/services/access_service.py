@@ -0,0 +1,110 @@
+# app/services/access_service.py
+
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+from app.core.principal import Principal
+
+
+# Reglas de acceso por rol compartidas por los routers sync y async: solo
+# miran el principal y lo que ya se cargó, sin tocar la base de datos.
+
+INSUFFICIENT_PERMISSIONS = "Insufficient permissions"
+
+
+def forbidden(detail: str = INSUFFICIENT_PERMISSIONS) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=detail)
+
+
+def list_scope(principal: Principal) -> dict:
+    """
+    Filtro de los listados y búsquedas según el rol:
+      - admin: sin filtro.
+      - doctor: {"doctor_id": ...} (el suyo).
+      - patient: {"patient_id": ...} (el suyo).
+    """
+    role_name = principal.role_name
+
+    if role_name == "admin":
+        return {}
+
+    if role_name == "doctor":
+        if not principal.doctor_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Doctor profile not found for this user",
+            )
+        return {"doctor_id": principal.doctor_id}
+
+    if role_name == "patient":
+        if not principal.patient_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Patient profile not found for this user",
+            )
+        return {"patient_id": principal.patient_id}
+
+    raise forbidden()
+
+
+def check_row_access(
+    principal: Principal,
+    row,
+    doctor_detail: str,
+    patient_detail: Optional[str] = None,
+    denied_detail: str = INSUFFICIENT_PERMISSIONS,
+) -> None:
+    """
+    Acceso a una fila con doctor_id y patient_id (cita, historia, o el
+    esquema de alta):
+      - admin: cualquiera.
+      - doctor: solo si es el doctor de la fila.
+      - patient: solo si es el paciente de la fila; sin patient_detail,
+        los pacientes no tienen acceso (denied_detail).
+    """
+    role_name = principal.role_name
+
+    if role_name == "admin":
+        return
+
+    if role_name == "doctor":
+        if not principal.doctor_id or principal.doctor_id != row.doctor_id:
+            raise forbidden(doctor_detail)
+        return
+
+    if role_name == "patient" and patient_detail is not None:
+        if not principal.patient_id or principal.patient_id != row.patient_id:
+            raise forbidden(patient_detail)
+        return
+
+    raise forbidden(denied_detail)
+
+
+def check_references(patient, doctor) -> None:
+    """Paciente y doctor referenciados por un alta (cita o historia)."""
+    if not patient:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid patient_id",
+        )
+    if not doctor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid doctor_id",
+        )
+
+
+def check_own_doctor(principal: Principal, doctor, detail: str) -> None:
+    """admin: cualquier doctor; doctor: solo su propio perfil."""
+    role_name = principal.role_name
+
+    if role_name == "admin":
+        return
+
+    if role_name == "doctor":
+        if doctor.user_id != principal.id:
+            raise forbidden(detail)
+        return
+
+    raise forbidden()
@@ -1,10 +1,179 @@
 # app/services/appointment_service.py
 
+from datetime import date, datetime, timedelta
 from typing import List, Optional
 
+from fastapi import HTTPException, status
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from app.core.availability import busy_index, clinic_date, clinic_day_start
+from app.core.config import settings
+from app.core.db import booking
+from app.core.db.database import engine
+from app.core.etag import make_etag, page_etag
+from app.core.events import event_bus
+from app.core.pagination import apply_keyset
+from app.core.principal import Principal
+from app.core.reminders import reminder_scheduler
 from app.models import Appointment
+from app.schemas.appointment import AppointmentResponse
+from app.services import access_service, stats_service
+
+
+# Orden estable para paginar por cursor (keyset)
+APPOINTMENT_ORDER = (Appointment.scheduled_at, Appointment.id)
+
+CONFLICT_DETAIL = "Doctor already has appointment {} at that time"
+CONFLICT_HEADER = "X-Conflicting-Appointment-Id"
+
+# Campos que, al cambiar, obligan a volver a comprobar solapamientos
+BOOKING_FIELDS = {"scheduled_at", "doctor_id", "status"}
+
+
+# --- Después de confirmar ---
+
+def appointment_changed(event_type: str, appointment: Appointment) -> None:
+    """
+    Refleja el cambio (ya confirmado) en el índice de turnos ocupados y
+    en los recordatorios de este worker, y lo avisa a los admins, al
+    doctor y al paciente.
+    """
+    busy_index.update(appointment)
+    reminder_scheduler.update(appointment)
+    event_bus.publish(
+        event_type,
+        AppointmentResponse.model_validate(appointment).model_dump(mode="json"),
+        doctor_ids=(appointment.doctor_id,),
+        patient_ids=(appointment.patient_id,),
+    )
+
+
+# --- Reglas de acceso compartidas por los routers sync y async ---
+
+def check_can_create(principal: Principal, appointment_in, patient, doctor) -> None:
+    access_service.check_references(patient, doctor)
+    access_service.check_row_access(
+        principal,
+        appointment_in,
+        doctor_detail="Doctors can only create appointments for themselves",
+        patient_detail="Patients can only create appointments for themselves",
+    )
+
+
+def require_appointment(appointment: Optional[Appointment]) -> Appointment:
+    if not appointment:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Appointment not found",
+        )
+    return appointment
+
+
+def check_can_view(principal: Principal, appointment: Appointment) -> None:
+    access_service.check_row_access(
+        principal,
+        appointment,
+        doctor_detail="You can only access your own appointments",
+        patient_detail="You can only access your own appointments",
+    )
+
+
+def check_can_update(principal: Principal, appointment: Appointment) -> None:
+    # Los pacientes no actualizan: solo cancelan desde su endpoint
+    access_service.check_row_access(
+        principal,
+        appointment,
+        doctor_detail="You can only update your own appointments",
+        denied_detail="Only admin or doctors can update appointments",
+    )
+
+
+def check_can_cancel(principal: Principal, appointment: Appointment) -> None:
+    access_service.check_row_access(
+        principal,
+        appointment,
+        doctor_detail="You can only cancel your own appointments",
+        patient_detail="You can only cancel your own appointments",
+    )
+
+
+# --- Solapamientos ---
+
+def overlap_stmt(doctor_id: int, scheduled_at: datetime, exclude_id: Optional[int] = None):
+    """
+    Primera cita 'scheduled' del doctor que se solapa con una que empiece
+    en scheduled_at. El estado va literal para usar el índice parcial
+    ix_appointments_doctor_pending.
+    """
+    slot = timedelta(minutes=settings.APPOINTMENT_SLOT_MINUTES)
+    stmt = select(Appointment.id).where(
+        Appointment.doctor_id == doctor_id,
+        Appointment.status == literal_column("'scheduled'"),
+        Appointment.scheduled_at > scheduled_at - slot,
+        Appointment.scheduled_at < scheduled_at + slot,
+    )
+    if exclude_id is not None:
+        stmt = stmt.where(Appointment.id != exclude_id)
+    return stmt.order_by(Appointment.scheduled_at).limit(1)
+
+
+def conflict_error(conflict_id: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=CONFLICT_DETAIL.format(conflict_id),
+        headers={CONFLICT_HEADER: str(conflict_id)},
+    )
+
+
+def find_conflict(
+    db: Session,
+    doctor_id: int,
+    scheduled_at: datetime,
+    exclude_id: Optional[int] = None,
+) -> Optional[int]:
+    return db.scalar(overlap_stmt(doctor_id, scheduled_at, exclude_id))
+
+
+def stats_keys(appointment: Appointment) -> list[tuple]:
+    return stats_service.appointment_keys(
+        appointment.doctor_id, appointment.scheduled_at, appointment.status
+    )
+
+
+def _commit_booking(db: Session, appointment: Appointment, deltas: dict) -> Appointment:
+    """
+    Confirma la cita (ya agregada a la sesión) solo si no se solapa con
+    otra: INSERT/UPDATE, lock del doctor (según booking.backend) y recién
+    entonces la comprobación, en la misma transacción. De dos reservas
+    concurrentes al mismo turno, la que obtiene el lock en segundo lugar
+    ya ve la fila confirmada de la primera. Los contadores del dashboard
+    (deltas) se actualizan solo si la reserva se confirma.
+    """
+    # Tras un rollback el objeto se expira: los valores se leen antes
+    doctor_id, scheduled_at = appointment.doctor_id, appointment.scheduled_at
+    previous_id = appointment.id
+    try:
+        db.flush()
+    except IntegrityError:
+        # Restricción EXCLUDE: otra transacción ganó el turno
+        db.rollback()
+        conflict = find_conflict(db, doctor_id, scheduled_at, previous_id)
+        if conflict is None:
+            raise
+        raise conflict_error(conflict)
+
+    lock = booking.lock_doctor_stmt(doctor_id)
+    if lock is not None:
+        db.execute(lock)
+    conflict = find_conflict(db, doctor_id, scheduled_at, appointment.id)
+    if conflict is not None:
+        db.rollback()
+        raise conflict_error(conflict)
+    stats_service.record(db, deltas)
+    db.commit()
+    return appointment
 
 
 def create_appointment(db: Session, appointment_in) -> Appointment:
@@ -16,9 +185,14 @@ def create_appointment(db: Session, appointment_in) -> Appointment:
         notes=appointment_in.notes,
         status="scheduled",
     )
+    # Chequeo rápido sin lock: el caso común de turno ocupado no espera
+    conflict = find_conflict(db, appointment.doctor_id, appointment.scheduled_at)
+    if conflict is not None:
+        raise conflict_error(conflict)
+
     db.add(appointment)
-    db.commit()
-    db.refresh(appointment)
+    _commit_booking(db, appointment, stats_service.changes(after=stats_keys(appointment)))
+    appointment_changed("appointment.created", appointment)
     return appointment
 
 
@@ -26,56 +200,178 @@ def get_appointment(db: Session, appointment_id: int) -> Optional[Appointment]:
     return db.query(Appointment).filter(Appointment.id == appointment_id).first()
 
 
-def list_appointments(
+def page_version_stmt(skip: int, limit: int, after: tuple | None, *criteria):
+    """
+    La misma página que los listados, pero solo (id, updated_at): sirve
+    para el ETag sin cargar ni serializar las citas.
+    """
+    stmt = select(Appointment.id, Appointment.updated_at).where(*criteria)
+    return apply_keyset(stmt, APPOINTMENT_ORDER, after).offset(skip).limit(limit)
+
+
+def page_criteria(doctor_id: Optional[int] = None, patient_id: Optional[int] = None) -> list:
+    criteria = []
+    if doctor_id is not None:
+        criteria.append(Appointment.doctor_id == doctor_id)
+    if patient_id is not None:
+        criteria.append(Appointment.patient_id == patient_id)
+    return criteria
+
+
+def get_page_etag(
     db: Session,
-    skip: int = 0,
-    limit: int = 20,
-) -> List[Appointment]:
-    return db.query(Appointment).offset(skip).limit(limit).all()
+    skip: int,
+    limit: int,
+    after: tuple | None,
+    doctor_id: Optional[int] = None,
+    patient_id: Optional[int] = None,
+) -> str:
+    criteria = page_criteria(doctor_id, patient_id)
+    rows = db.execute(page_version_stmt(skip, limit, after, *criteria)).all()
+    return page_etag("appointments", limit, rows)
 
 
-def list_appointments_by_doctor(
+def list_appointments(
     db: Session,
-    doctor_id: int,
     skip: int = 0,
     limit: int = 20,
+    after: tuple | None = None,
+    doctor_id: Optional[int] = None,
+    patient_id: Optional[int] = None,
 ) -> List[Appointment]:
+    query = db.query(Appointment).filter(*page_criteria(doctor_id, patient_id))
+    return apply_keyset(query, APPOINTMENT_ORDER, after).offset(skip).limit(limit).all()
+
+
+# --- Calendario del doctor ---
+
+def calendar_window(date_from: date, date_to: date) -> tuple[datetime, datetime]:
+    """
+    [00:00 de date_from, 00:00 del día siguiente a date_to) en hora de la
+    clínica, expresado en UTC.
+    """
+    days = (date_to - date_from).days + 1
+    if days < 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'to' must not be before 'from'",
+        )
+    if days > settings.CALENDAR_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range cannot exceed {settings.CALENDAR_MAX_DAYS} days",
+        )
+    return clinic_day_start(date_from), clinic_day_start(date_to + timedelta(days=1))
+
+
+def _calendar_range(doctor_id: int, start: datetime, end: datetime):
     return (
-        db.query(Appointment)
-        .filter(Appointment.doctor_id == doctor_id)
-        .offset(skip)
-        .limit(limit)
-        .all()
+        Appointment.doctor_id == doctor_id,
+        Appointment.scheduled_at >= start,
+        Appointment.scheduled_at < end,
     )
 
 
-def list_appointments_by_patient(
-    db: Session,
-    patient_id: int,
-    skip: int = 0,
-    limit: int = 20,
-) -> List[Appointment]:
+def calendar_version_stmt(doctor_id: int, start: datetime, end: datetime):
+    """
+    Cambia si en el rango se crea, mueve, modifica o borra una cita:
+    cualquier escritura sube max(updated_at) o cambia count / max(id).
+    """
+    return select(
+        func.count(),
+        func.max(Appointment.updated_at),
+        func.max(Appointment.id),
+    ).where(*_calendar_range(doctor_id, start, end))
+
+
+def calendar_etag(doctor_id: int, start: datetime, end: datetime, version) -> str:
+    return make_etag("calendar", doctor_id, start, end, *version)
+
+
+def calendar_stmt(doctor_id: int, start: datetime, end: datetime):
+    """
+    Una sola consulta por rango (índice doctor_id, scheduled_at): las citas
+    en orden y, en cada fila, cuántas citas hay ese día con ese estado
+    (función de ventana).
+    """
+    day = clinic_date(Appointment.scheduled_at, engine.dialect.name, start)
+    per_status = func.count().over(partition_by=(day, Appointment.status))
     return (
-        db.query(Appointment)
-        .filter(Appointment.patient_id == patient_id)
-        .offset(skip)
-        .limit(limit)
-        .all()
+        select(Appointment, day.label("day"), per_status.label("day_status_count"))
+        .where(*_calendar_range(doctor_id, start, end))
+        .order_by(Appointment.scheduled_at, Appointment.id)
     )
 
 
+def build_calendar(rows) -> tuple[list[Appointment], list[dict]]:
+    appointments = []
+    days: dict[str, dict[str, int]] = {}
+    for appointment, day, count in rows:
+        appointments.append(appointment)
+        # SQLite devuelve la fecha como texto
+        days.setdefault(str(day), {})[appointment.status] = count
+    return appointments, [
+        {"date": date.fromisoformat(day), "total": sum(by_status.values()), "by_status": by_status}
+        for day, by_status in days.items()
+    ]
+
+
+def calendar_response(
+    doctor_id: int,
+    date_from: date,
+    date_to: date,
+    appointments: list[Appointment],
+    days: list[dict],
+) -> dict:
+    return {
+        "doctor_id": doctor_id,
+        "date_from": date_from,
+        "date_to": date_to,
+        "appointments": appointments,
+        "days": days,
+    }
+
+
+def get_calendar_etag(db: Session, doctor_id: int, start: datetime, end: datetime) -> str:
+    version = db.execute(calendar_version_stmt(doctor_id, start, end)).one()
+    return calendar_etag(doctor_id, start, end, version)
+
+
+def get_calendar(
+    db: Session,
+    doctor_id: int,
+    start: datetime,
+    end: datetime,
+) -> tuple[list[Appointment], list[dict]]:
+    return build_calendar(db.execute(calendar_stmt(doctor_id, start, end)).all())
+
+
 def update_appointment(
     db: Session,
     appointment: Appointment,
     appointment_in,
 ) -> Appointment:
     data = appointment_in.model_dump(exclude_unset=True)
+    before = stats_keys(appointment)
     for field, value in data.items():
         setattr(appointment, field, value)
+    deltas = stats_service.changes(before, stats_keys(appointment))
 
     db.add(appointment)
-    db.commit()
-    db.refresh(appointment)
+    if appointment.status == "scheduled" and BOOKING_FIELDS & data.keys():
+        # Sin autoflush: el UPDATE se envía en _commit_booking
+        with db.no_autoflush:
+            conflict = find_conflict(
+                db, appointment.doctor_id, appointment.scheduled_at, appointment.id
+            )
+        if conflict is not None:
+            db.rollback()
+            raise conflict_error(conflict)
+        _commit_booking(db, appointment, deltas)
+    else:
+        stats_service.record(db, deltas)
+        db.commit()
+    appointment_changed("appointment.updated", appointment)
     return appointment
 
 
@@ -84,8 +380,10 @@ def set_appointment_status(
     appointment: Appointment,
     status_value: str,
 ) -> Appointment:
+    before = stats_keys(appointment)
     appointment.status = status_value
     db.add(appointment)
+    stats_service.record(db, stats_service.changes(before, stats_keys(appointment)))
     db.commit()
-    db.refresh(appointment)
+    appointment_changed("appointment.updated", appointment)
     return appointment
@@ -0,0 +1,187 @@
+# app/services/async_appointment_service.py
+
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db import booking
+from app.core.etag import page_etag
+from app.core.pagination import apply_keyset
+from app.services import async_stats_service
+from app.services.appointment_service import (
+    APPOINTMENT_ORDER,
+    BOOKING_FIELDS,
+    appointment_changed,
+    stats_keys,
+    build_calendar,
+    calendar_etag,
+    calendar_stmt,
+    calendar_version_stmt,
+    conflict_error,
+    overlap_stmt,
+    page_criteria,
+    page_version_stmt,
+)
+from app.services.stats_service import changes
+from app.models import Appointment
+
+
+async def find_conflict(
+    db: AsyncSession,
+    doctor_id: int,
+    scheduled_at: datetime,
+    exclude_id: Optional[int] = None,
+) -> Optional[int]:
+    return await db.scalar(overlap_stmt(doctor_id, scheduled_at, exclude_id))
+
+
+async def _commit_booking(
+    db: AsyncSession,
+    appointment: Appointment,
+    deltas: dict,
+) -> Appointment:
+    # Mismo protocolo que appointment_service._commit_booking
+    # Tras un rollback el objeto se expira: los valores se leen antes
+    doctor_id, scheduled_at = appointment.doctor_id, appointment.scheduled_at
+    previous_id = appointment.id
+    try:
+        await db.flush()
+    except IntegrityError:
+        await db.rollback()
+        conflict = await find_conflict(db, doctor_id, scheduled_at, previous_id)
+        if conflict is None:
+            raise
+        raise conflict_error(conflict)
+
+    lock = booking.lock_doctor_stmt(doctor_id)
+    if lock is not None:
+        await db.execute(lock)
+    conflict = await find_conflict(db, doctor_id, scheduled_at, appointment.id)
+    if conflict is not None:
+        await db.rollback()
+        raise conflict_error(conflict)
+    await async_stats_service.record(db, deltas)
+    await db.commit()
+    return appointment
+
+
+async def create_appointment(db: AsyncSession, appointment_in) -> Appointment:
+    appointment = Appointment(
+        patient_id=appointment_in.patient_id,
+        doctor_id=appointment_in.doctor_id,
+        scheduled_at=appointment_in.scheduled_at,
+        reason=appointment_in.reason,
+        notes=appointment_in.notes,
+        status="scheduled",
+    )
+    conflict = await find_conflict(db, appointment.doctor_id, appointment.scheduled_at)
+    if conflict is not None:
+        raise conflict_error(conflict)
+
+    db.add(appointment)
+    await _commit_booking(db, appointment, changes(after=stats_keys(appointment)))
+    appointment_changed("appointment.created", appointment)
+    return appointment
+
+
+async def get_appointment(db: AsyncSession, appointment_id: int) -> Optional[Appointment]:
+    return await db.get(Appointment, appointment_id)
+
+
+async def get_page_etag(
+    db: AsyncSession,
+    skip: int,
+    limit: int,
+    after: tuple | None,
+    doctor_id: Optional[int] = None,
+    patient_id: Optional[int] = None,
+) -> str:
+    criteria = page_criteria(doctor_id, patient_id)
+    result = await db.execute(page_version_stmt(skip, limit, after, *criteria))
+    return page_etag("appointments", limit, result.all())
+
+
+async def list_appointments(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 20,
+    after: tuple | None = None,
+    doctor_id: Optional[int] = None,
+    patient_id: Optional[int] = None,
+) -> List[Appointment]:
+    result = await db.scalars(
+        apply_keyset(
+            select(Appointment).where(*page_criteria(doctor_id, patient_id)),
+            APPOINTMENT_ORDER,
+            after,
+        )
+        .offset(skip)
+        .limit(limit)
+    )
+    return list(result)
+
+
+async def get_calendar_etag(
+    db: AsyncSession,
+    doctor_id: int,
+    start: datetime,
+    end: datetime,
+) -> str:
+    result = await db.execute(calendar_version_stmt(doctor_id, start, end))
+    return calendar_etag(doctor_id, start, end, result.one())
+
+
+async def get_calendar(
+    db: AsyncSession,
+    doctor_id: int,
+    start: datetime,
+    end: datetime,
+) -> tuple[list[Appointment], list[dict]]:
+    result = await db.execute(calendar_stmt(doctor_id, start, end))
+    return build_calendar(result.all())
+
+
+async def update_appointment(
+    db: AsyncSession,
+    appointment: Appointment,
+    appointment_in,
+) -> Appointment:
+    data = appointment_in.model_dump(exclude_unset=True)
+    before = stats_keys(appointment)
+    for field, value in data.items():
+        setattr(appointment, field, value)
+    deltas = changes(before, stats_keys(appointment))
+
+    db.add(appointment)
+    if appointment.status == "scheduled" and BOOKING_FIELDS & data.keys():
+        # Sin autoflush: el UPDATE se envía en _commit_booking
+        with db.no_autoflush:
+            conflict = await find_conflict(
+                db, appointment.doctor_id, appointment.scheduled_at, appointment.id
+            )
+        if conflict is not None:
+            await db.rollback()
+            raise conflict_error(conflict)
+        await _commit_booking(db, appointment, deltas)
+    else:
+        await async_stats_service.record(db, deltas)
+        await db.commit()
+    appointment_changed("appointment.updated", appointment)
+    return appointment
+
+
+async def set_appointment_status(
+    db: AsyncSession,
+    appointment: Appointment,
+    status_value: str,
+) -> Appointment:
+    before = stats_keys(appointment)
+    appointment.status = status_value
+    db.add(appointment)
+    await async_stats_service.record(db, changes(before, stats_keys(appointment)))
+    await db.commit()
+    appointment_changed("appointment.updated", appointment)
+    return appointment
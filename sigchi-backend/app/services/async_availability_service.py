@@ -0,0 +1,62 @@
+# app/services/async_availability_service.py
+
+import time
+from typing import List, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.availability import busy_index
+from app.models import DoctorSchedule
+from app.schemas.doctor import ScheduleBlock
+from app.services.availability_service import (
+    schedule_rows,
+    blocks_stmt,
+    busy_stmt,
+    changes_stmt,
+    collect_free_slots,
+    group_blocks,
+)
+
+
+async def get_schedule(db: AsyncSession, doctor_id: int) -> List[DoctorSchedule]:
+    result = await db.scalars(
+        select(DoctorSchedule)
+        .where(DoctorSchedule.doctor_id == doctor_id)
+        .order_by(DoctorSchedule.weekday, DoctorSchedule.start_time)
+    )
+    return list(result)
+
+
+async def replace_schedule(
+    db: AsyncSession,
+    doctor_id: int,
+    blocks: List[ScheduleBlock],
+) -> List[DoctorSchedule]:
+    await db.execute(delete(DoctorSchedule).where(DoctorSchedule.doctor_id == doctor_id))
+    rows = schedule_rows(doctor_id, blocks)
+    db.add_all(rows)
+    await db.commit()
+    return rows
+
+
+async def find_free_slots(
+    db: AsyncSession,
+    start: int,
+    end: int,
+    limit: int = 10,
+    specialty: Optional[str] = None,
+    doctor_id: Optional[int] = None,
+) -> List[dict]:
+    result = await db.execute(blocks_stmt(specialty, doctor_id))
+    blocks_by_doctor, specialties = group_blocks(result.all())
+    started_at = time.time()
+    since = busy_index.changes_since()
+    if since is not None:
+        result = await db.execute(changes_stmt(since))
+        busy_index.apply_changes(result.all(), started_at)
+    missing = busy_index.missing(blocks_by_doctor)
+    if missing:
+        result = await db.execute(busy_stmt(missing))
+        busy_index.load(missing, result.all(), started_at)
+    return collect_free_slots(blocks_by_doctor, specialties, start, end, limit)
@@ -0,0 +1,119 @@
+# app/services/async_clinical_history_service.py
+
+from typing import List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.etag import page_etag
+from app.core.pagination import apply_keyset
+from app.services.clinical_history_service import (
+    HISTORY_ORDER,
+    page_criteria,
+    page_version_stmt,
+    publish_history,
+    search_histories_stmt,
+)
+from app.models import ClinicalHistory
+from app.services import async_stats_service
+from app.services.stats_service import changes, history_keys
+
+
+async def create_history(
+    db: AsyncSession,
+    history_in,
+) -> ClinicalHistory:
+    history = ClinicalHistory(
+        patient_id=history_in.patient_id,
+        doctor_id=history_in.doctor_id,
+        appointment_id=history_in.appointment_id,
+        visit_date=history_in.visit_date,
+        diagnosis=history_in.diagnosis,
+        treatment=history_in.treatment,
+        notes=history_in.notes,
+    )
+    db.add(history)
+    await async_stats_service.record(db, changes(after=history_keys(history.doctor_id)))
+    await db.commit()
+    publish_history("history.created", history)
+    return history
+
+
+async def get_history(
+    db: AsyncSession,
+    history_id: int,
+) -> Optional[ClinicalHistory]:
+    return await db.get(ClinicalHistory, history_id)
+
+
+async def get_page_version(
+    db: AsyncSession,
+    skip: int,
+    limit: int,
+    after: tuple | None,
+    doctor_id: Optional[int] = None,
+    patient_id: Optional[int] = None,
+) -> Tuple[str, list]:
+    criteria = page_criteria(doctor_id, patient_id)
+    result = await db.execute(page_version_stmt(skip, limit, after, *criteria))
+    rows = result.all()
+    return page_etag("histories", limit, rows), rows
+
+
+async def list_histories(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 20,
+    after: tuple | None = None,
+    doctor_id: Optional[int] = None,
+    patient_id: Optional[int] = None,
+) -> List[ClinicalHistory]:
+    result = await db.scalars(
+        apply_keyset(
+            select(ClinicalHistory).where(*page_criteria(doctor_id, patient_id)),
+            HISTORY_ORDER,
+            after,
+        )
+        .offset(skip)
+        .limit(limit)
+    )
+    return list(result)
+
+
+async def search_histories(
+    db: AsyncSession,
+    query: str,
+    doctor_id: int | None = None,
+    patient_id: int | None = None,
+    limit: int = 20,
+) -> List[Tuple[ClinicalHistory, float]]:
+    stmt = search_histories_stmt(query, doctor_id, patient_id, limit)
+    if stmt is None:
+        return []
+    result = await db.execute(stmt)
+    return [(history, rank) for history, rank in result.all()]
+
+
+async def update_history(
+    db: AsyncSession,
+    history: ClinicalHistory,
+    history_in,
+) -> ClinicalHistory:
+    data = history_in.model_dump(exclude_unset=True)
+    for field, value in data.items():
+        setattr(history, field, value)
+
+    db.add(history)
+    await db.commit()
+    publish_history("history.updated", history)
+    return history
+
+
+async def delete_history(
+    db: AsyncSession,
+    history: ClinicalHistory,
+) -> None:
+    await db.delete(history)
+    await async_stats_service.record(db, changes(before=history_keys(history.doctor_id)))
+    await db.commit()
+    publish_history("history.deleted", history)
@@ -0,0 +1,86 @@
+# app/services/async_doctor_service.py
+
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.pagination import apply_keyset
+from app.core.principal import principal_cache
+from app.core.token_denylist import token_denylist
+from app.services.doctor_service import DOCTOR_ORDER, WITH_USER_EMAIL, user_role_stmt
+from app.models import Doctor
+from app.schemas.doctor import DoctorCreate, DoctorUpdate
+
+
+# En async no hay lazy-load: doctor_to_response lee doctor.user.email,
+# así que el usuario se carga siempre junto al doctor.
+
+async def create_doctor(db: AsyncSession, doctor_in: DoctorCreate) -> Doctor:
+    doctor = Doctor(
+        user_id=doctor_in.user_id,
+        specialty=doctor_in.specialty,
+    )
+    db.add(doctor)
+    await db.commit()
+    # Solo falta el usuario (para el email); el resto ya quedó en el objeto
+    await db.refresh(doctor, ["user"])
+    principal_cache.invalidate(doctor.user_id)
+    if settings.JWT_SCOPED_CLAIMS:
+        await token_denylist.async_revoke_user(db, doctor.user_id)
+    return doctor
+
+
+async def get_user_role(db: AsyncSession, user_id: int):
+    return (await db.execute(user_role_stmt(user_id))).first()
+
+
+async def get_doctor(db: AsyncSession, doctor_id: int) -> Optional[Doctor]:
+    return await db.scalar(
+        select(Doctor).options(WITH_USER_EMAIL).where(Doctor.id == doctor_id)
+    )
+
+
+async def get_doctor_by_user_id(db: AsyncSession, user_id: int) -> Optional[Doctor]:
+    return await db.scalar(
+        select(Doctor).options(WITH_USER_EMAIL).where(Doctor.user_id == user_id)
+    )
+
+
+async def list_doctors(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 20,
+    after: tuple | None = None,
+) -> List[Doctor]:
+    result = await db.scalars(
+        apply_keyset(select(Doctor).options(WITH_USER_EMAIL), DOCTOR_ORDER, after)
+        .offset(skip)
+        .limit(limit)
+    )
+    return list(result)
+
+
+async def update_doctor(
+    db: AsyncSession,
+    doctor: Doctor,
+    doctor_in: DoctorUpdate,
+) -> Doctor:
+    data = doctor_in.model_dump(exclude_unset=True)
+    for field, value in data.items():
+        setattr(doctor, field, value)
+
+    db.add(doctor)
+    await db.commit()
+    principal_cache.invalidate(doctor.user_id)
+    return doctor
+
+
+async def delete_doctor(db: AsyncSession, doctor: Doctor) -> None:
+    user_id = doctor.user_id
+    await db.delete(doctor)
+    await db.commit()
+    principal_cache.invalidate(user_id)
+    if settings.JWT_SCOPED_CLAIMS:
+        await token_denylist.async_revoke_user(db, user_id)
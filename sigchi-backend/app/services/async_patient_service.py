@@ -0,0 +1,97 @@
+# app/services/async_patient_service.py
+
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.pagination import apply_keyset
+from app.core.search_cache import patient_search_cache
+from app.core.token_denylist import token_denylist
+from app.services.patient_service import (
+    PATIENT_ORDER,
+    cached_search,
+    patient_changed,
+    rank_search_rows,
+    search_patients_stmt,
+    search_tokens,
+)
+from app.models import Patient
+from app.schemas.patient import PatientCreate, PatientUpdate
+from app.services import async_stats_service
+from app.services.stats_service import changes, new_patient_keys
+
+
+async def create_patient(db: AsyncSession, patient_in: PatientCreate) -> Patient:
+    patient = Patient(
+        user_id=patient_in.user_id,
+        document_type=patient_in.document_type,
+        document_number=patient_in.document_number,
+        phone=patient_in.phone,
+        address=patient_in.address,
+        birth_date=patient_in.birth_date,
+    )
+    db.add(patient)
+    await async_stats_service.record(db, changes(after=new_patient_keys()))
+    await db.commit()
+    patient_changed(patient.user_id)
+    if settings.JWT_SCOPED_CLAIMS:
+        await token_denylist.async_revoke_user(db, patient.user_id)
+    return patient
+
+
+async def get_patient(db: AsyncSession, patient_id: int) -> Optional[Patient]:
+    return await db.get(Patient, patient_id)
+
+
+async def get_patient_by_user_id(db: AsyncSession, user_id: int) -> Optional[Patient]:
+    return await db.scalar(select(Patient).where(Patient.user_id == user_id))
+
+
+async def list_patients(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 20,
+    after: tuple | None = None,
+) -> List[Patient]:
+    result = await db.scalars(
+        apply_keyset(select(Patient), PATIENT_ORDER, after).offset(skip).limit(limit)
+    )
+    return list(result)
+
+
+async def search_patients(db: AsyncSession, query: str, limit: int = 10) -> List[dict]:
+    tokens = search_tokens(query)
+    if not tokens:
+        return []
+    rows = cached_search(tokens, limit)
+    if rows is None:
+        result = await db.execute(search_patients_stmt(tokens, limit))
+        rows = rank_search_rows(result.mappings(), limit)
+        patient_search_cache.set(" ".join(tokens), limit, rows)
+    return rows
+
+
+async def update_patient(
+    db: AsyncSession,
+    patient: Patient,
+    patient_in: PatientUpdate,
+) -> Patient:
+    data = patient_in.model_dump(exclude_unset=True)
+    for field, value in data.items():
+        setattr(patient, field, value)
+
+    db.add(patient)
+    await db.commit()
+    patient_changed(patient.user_id)
+    return patient
+
+
+async def delete_patient(db: AsyncSession, patient: Patient) -> None:
+    user_id = patient.user_id
+    await db.delete(patient)
+    await db.commit()
+    patient_changed(user_id)
+    if settings.JWT_SCOPED_CLAIMS:
+        await token_denylist.async_revoke_user(db, user_id)
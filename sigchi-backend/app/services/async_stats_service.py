@@ -0,0 +1,19 @@
+# app/services/async_stats_service.py
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.stats_service import increment_stmt, insert_counter_stmt, upsert_stmt
+
+
+async def record(db: AsyncSession, deltas: dict[tuple, int]) -> None:
+    # Mismo criterio que stats_service.record
+    if not deltas:
+        return
+    stmt = upsert_stmt(deltas)
+    if stmt is not None:
+        await db.execute(stmt)
+        return
+    for key, delta in sorted(deltas.items()):
+        result = await db.execute(increment_stmt(key, delta))
+        if result.rowcount == 0:
+            await db.execute(insert_counter_stmt(key, delta))
@@ -0,0 +1,196 @@
+# app/services/availability_service.py
+
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, func, literal_column, select
+from sqlalchemy.orm import Session
+
+from app.core.availability import (
+    SLOT_SECONDS,
+    busy_index,
+    from_epoch,
+    next_free_slots,
+    to_epoch,
+)
+from app.core.config import settings
+from app.core.db.database import primary_session
+from app.models import Appointment, Doctor, DoctorSchedule
+from app.schemas.doctor import ScheduleBlock
+
+
+# Rango por defecto de la búsqueda de turnos si no se envía date_to
+DEFAULT_SEARCH_DAYS = 30
+
+
+# --- Horario semanal del doctor ---
+
+def get_schedule(db: Session, doctor_id: int) -> List[DoctorSchedule]:
+    return (
+        db.query(DoctorSchedule)
+        .filter(DoctorSchedule.doctor_id == doctor_id)
+        .order_by(DoctorSchedule.weekday, DoctorSchedule.start_time)
+        .all()
+    )
+
+
+def schedule_overlaps(blocks: List[ScheduleBlock]) -> bool:
+    ordered = sorted(blocks, key=lambda b: (b.weekday, b.start_time))
+    return any(
+        prev.weekday == block.weekday and block.start_time < prev.end_time
+        for prev, block in zip(ordered, ordered[1:])
+    )
+
+
+def check_schedule(blocks: List[ScheduleBlock]) -> None:
+    if schedule_overlaps(blocks):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Schedule blocks overlap",
+        )
+
+
+def schedule_rows(doctor_id: int, blocks: List[ScheduleBlock]) -> List[DoctorSchedule]:
+    rows = [DoctorSchedule(doctor_id=doctor_id, **block.model_dump()) for block in blocks]
+    return sorted(rows, key=lambda row: (row.weekday, row.start_time))
+
+
+def replace_schedule(
+    db: Session,
+    doctor_id: int,
+    blocks: List[ScheduleBlock],
+) -> List[DoctorSchedule]:
+    """
+    Reemplaza el horario completo del doctor en una sola transacción.
+    """
+    db.execute(delete(DoctorSchedule).where(DoctorSchedule.doctor_id == doctor_id))
+    rows = schedule_rows(doctor_id, blocks)
+    db.add_all(rows)
+    db.commit()
+    return rows
+
+
+# --- Búsqueda de turnos libres ---
+
+def search_window(
+    date_from: Optional[datetime],
+    date_to: Optional[datetime],
+) -> tuple[int, int]:
+    """
+    [inicio, fin) en epoch. No se buscan turnos en el pasado.
+    """
+    now = int(time.time())
+    start = max(to_epoch(date_from), now) if date_from is not None else now
+    if date_to is not None:
+        end = to_epoch(date_to)
+    else:
+        end = start + DEFAULT_SEARCH_DAYS * 86400
+
+    if end - start > settings.AVAILABILITY_MAX_DAYS * 86400:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range cannot exceed {settings.AVAILABILITY_MAX_DAYS} days",
+        )
+    return start, end
+
+
+def blocks_stmt(specialty: Optional[str] = None, doctor_id: Optional[int] = None):
+    stmt = select(
+        DoctorSchedule.doctor_id,
+        Doctor.specialty,
+        DoctorSchedule.weekday,
+        DoctorSchedule.start_time,
+        DoctorSchedule.end_time,
+    ).join(Doctor, Doctor.id == DoctorSchedule.doctor_id)
+    if specialty is not None:
+        stmt = stmt.where(func.lower(Doctor.specialty) == specialty.lower())
+    if doctor_id is not None:
+        stmt = stmt.where(DoctorSchedule.doctor_id == doctor_id)
+    return stmt
+
+
+def busy_stmt(doctor_ids: List[int]):
+    # El estado va literal (no como parámetro) para que SQLite pueda usar
+    # el índice parcial ix_appointments_doctor_pending
+    since = datetime.now(timezone.utc) - timedelta(seconds=SLOT_SECONDS)
+    return select(
+        Appointment.doctor_id,
+        Appointment.id,
+        Appointment.scheduled_at,
+    ).where(
+        Appointment.doctor_id.in_(doctor_ids),
+        Appointment.status == literal_column("'scheduled'"),
+        Appointment.scheduled_at >= since,
+    )
+
+
+def changes_stmt(since: datetime):
+    return select(
+        Appointment.id,
+        Appointment.doctor_id,
+        Appointment.scheduled_at,
+        Appointment.status,
+    ).where(Appointment.updated_at >= since)
+
+
+def group_blocks(rows) -> tuple[dict, dict]:
+    blocks_by_doctor: dict[int, list] = {}
+    specialties: dict[int, Optional[str]] = {}
+    for doctor_id, specialty, weekday, start_time, end_time in rows:
+        blocks_by_doctor.setdefault(doctor_id, []).append((weekday, start_time, end_time))
+        specialties[doctor_id] = specialty
+    return blocks_by_doctor, specialties
+
+
+def collect_free_slots(
+    blocks_by_doctor: dict,
+    specialties: dict,
+    start: int,
+    end: int,
+    limit: int,
+) -> List[dict]:
+    return [
+        {
+            "doctor_id": doctor_id,
+            "specialty": specialties[doctor_id],
+            "start": from_epoch(slot),
+            "end": from_epoch(slot + SLOT_SECONDS),
+        }
+        for slot, doctor_id in next_free_slots(blocks_by_doctor, busy_index, start, end, limit)
+    ]
+
+
+def find_free_slots(
+    db: Session,
+    start: int,
+    end: int,
+    limit: int = 10,
+    specialty: Optional[str] = None,
+    doctor_id: Optional[int] = None,
+) -> List[dict]:
+    """
+    Próximos `limit` turnos libres en [start, end) entre los doctores con
+    horario (filtrando por especialidad / doctor). Las citas salen de
+    busy_index: a la base de datos solo se le piden los cambios desde el
+    último sync y los doctores que aún no estaban cargados.
+
+    Esas dos consultas van al primario aunque la petición sea un GET: si
+    una réplica atrasada más de settings.SYNC_MARGIN_SECONDS respondiera el sync,
+    el índice avanzaría su marca sin ver esas reservas y las seguiría
+    ofreciendo como libres.
+    """
+    blocks_by_doctor, specialties = group_blocks(
+        db.execute(blocks_stmt(specialty, doctor_id)).all()
+    )
+    started_at = time.time()
+    since = busy_index.changes_since()
+    missing = busy_index.missing(blocks_by_doctor)
+    if since is not None or missing:
+        with primary_session(db) as primary:
+            if since is not None:
+                busy_index.apply_changes(primary.execute(changes_stmt(since)).all(), started_at)
+            if missing:
+                busy_index.load(missing, primary.execute(busy_stmt(missing)).all(), started_at)
+    return collect_free_slots(blocks_by_doctor, specialties, start, end, limit)
@@ -1,10 +1,134 @@
 # app/services/clinical_history_service.py
 
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
+from fastapi import HTTPException, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from app.core.db import fulltext
+from app.core.etag import page_etag
+from app.core.events import event_bus
+from app.core.pagination import apply_keyset
+from app.core.principal import Principal
 from app.models import ClinicalHistory
+from app.schemas.clinical_history import ClinicalHistoryResponse, ClinicalHistorySearchResult
+from app.services import access_service, stats_service
+
+
+# Orden estable para paginar por cursor (keyset)
+HISTORY_ORDER = (ClinicalHistory.visit_date, ClinicalHistory.id)
+
+
+# --- Eventos en vivo ---
+
+def publish_history(event_type: str, history: ClinicalHistory) -> None:
+    """Avisa del cambio (ya confirmado) a los admins, al doctor y al paciente."""
+    if event_type == "history.deleted":
+        data = {"id": history.id, "doctor_id": history.doctor_id, "patient_id": history.patient_id}
+    else:
+        data = ClinicalHistoryResponse.model_validate(history).model_dump(mode="json")
+    event_bus.publish(
+        event_type,
+        data,
+        doctor_ids=(history.doctor_id,),
+        patient_ids=(history.patient_id,),
+    )
+
+
+# --- Reglas de acceso compartidas por los routers sync y async ---
+
+def check_can_create(principal: Principal, history_in, patient, doctor) -> None:
+    access_service.check_references(patient, doctor)
+    access_service.check_row_access(
+        principal,
+        history_in,
+        doctor_detail="Doctors can only create histories for themselves as doctor",
+        denied_detail="Only admin or doctors can create clinical histories",
+    )
+
+
+def require_history(history: Optional[ClinicalHistory]) -> ClinicalHistory:
+    if not history:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Clinical history not found",
+        )
+    return history
+
+
+def check_can_view(principal: Principal, history: ClinicalHistory) -> None:
+    access_service.check_row_access(
+        principal,
+        history,
+        doctor_detail="You can only access histories where you are the doctor",
+        patient_detail="You can only access your own clinical histories",
+    )
+
+
+def check_can_update(principal: Principal, history: ClinicalHistory) -> None:
+    access_service.check_row_access(
+        principal,
+        history,
+        doctor_detail="You can only update histories where you are the doctor",
+        denied_detail="Only admin or doctors can update clinical histories",
+    )
+
+
+def check_can_delete(principal: Principal) -> None:
+    if principal.role_name != "admin":
+        raise access_service.forbidden("Only admin can delete clinical histories")
+
+
+def patient_scope(principal: Principal, patient_id: int) -> Optional[int]:
+    """
+    Acceso a las historias de un paciente. Devuelve el doctor_id cuyas
+    historias hay que comprobar con check_doctor_histories (o None si
+    no hace falta):
+      - admin: cualquier paciente.
+      - doctor: solo historias donde él sea el doctor.
+      - patient: solo las suyas.
+    """
+    role_name = principal.role_name
+
+    if role_name == "admin":
+        return None
+
+    if role_name == "doctor":
+        if not principal.doctor_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Doctor profile not found for this user",
+            )
+        return principal.doctor_id
+
+    if role_name == "patient":
+        if not principal.patient_id or principal.patient_id != patient_id:
+            raise access_service.forbidden("You can only see your own clinical histories")
+        return None
+
+    raise access_service.forbidden()
+
+
+def check_doctor_histories(doctor_id: Optional[int], histories) -> None:
+    # Verificamos que todas las historias de la página sean de él
+    if doctor_id is None:
+        return
+    for history in histories:
+        if history.doctor_id != doctor_id:
+            raise access_service.forbidden(
+                "You can only see histories where you are the doctor"
+            )
+
+
+def search_results(results) -> List[ClinicalHistorySearchResult]:
+    return [
+        ClinicalHistorySearchResult(
+            **ClinicalHistoryResponse.model_validate(history).model_dump(),
+            rank=rank,
+        )
+        for history, rank in results
+    ]
 
 
 def create_history(
@@ -21,8 +145,10 @@ def create_history(
         notes=history_in.notes,
     )
     db.add(history)
+    deltas = stats_service.changes(after=stats_service.history_keys(history.doctor_id))
+    stats_service.record(db, deltas)
     db.commit()
-    db.refresh(history)
+    publish_history("history.created", history)
     return history
 
 
@@ -33,42 +159,86 @@ def get_history(
     return db.query(ClinicalHistory).filter(ClinicalHistory.id == history_id).first()
 
 
+def page_version_stmt(skip: int, limit: int, after: tuple | None, *criteria):
+    """
+    La misma página que los listados, pero solo (id, updated_at,
+    doctor_id): el ETag y el control de acceso por doctor sin cargar ni
+    serializar las historias.
+    """
+    stmt = select(
+        ClinicalHistory.id,
+        ClinicalHistory.updated_at,
+        ClinicalHistory.doctor_id,
+    ).where(*criteria)
+    return apply_keyset(stmt, HISTORY_ORDER, after).offset(skip).limit(limit)
+
+
+def page_criteria(doctor_id: Optional[int] = None, patient_id: Optional[int] = None) -> list:
+    criteria = []
+    if doctor_id is not None:
+        criteria.append(ClinicalHistory.doctor_id == doctor_id)
+    if patient_id is not None:
+        criteria.append(ClinicalHistory.patient_id == patient_id)
+    return criteria
+
+
+def get_page_version(
+    db: Session,
+    skip: int,
+    limit: int,
+    after: tuple | None,
+    doctor_id: Optional[int] = None,
+    patient_id: Optional[int] = None,
+) -> Tuple[str, list]:
+    """ETag de la página y sus filas (id, updated_at, doctor_id)."""
+    criteria = page_criteria(doctor_id, patient_id)
+    rows = db.execute(page_version_stmt(skip, limit, after, *criteria)).all()
+    return page_etag("histories", limit, rows), rows
+
+
 def list_histories(
     db: Session,
     skip: int = 0,
     limit: int = 20,
+    after: tuple | None = None,
+    doctor_id: Optional[int] = None,
+    patient_id: Optional[int] = None,
 ) -> List[ClinicalHistory]:
-    return db.query(ClinicalHistory).offset(skip).limit(limit).all()
+    query = db.query(ClinicalHistory).filter(*page_criteria(doctor_id, patient_id))
+    return apply_keyset(query, HISTORY_ORDER, after).offset(skip).limit(limit).all()
 
 
-def list_histories_by_patient(
-    db: Session,
-    patient_id: int,
-    skip: int = 0,
-    limit: int = 50,
-) -> List[ClinicalHistory]:
-    return (
-        db.query(ClinicalHistory)
-        .filter(ClinicalHistory.patient_id == patient_id)
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+def search_histories_stmt(
+    query: str,
+    doctor_id: int | None = None,
+    patient_id: int | None = None,
+    limit: int = 20,
+):
+    """
+    Consulta de búsqueda de texto completo (ver app/core/db/fulltext.py),
+    ordenada por relevancia. None si la búsqueda no tiene términos.
+    """
+    tokens = fulltext.search_tokens(query)
+    if not tokens:
+        return None
+    stmt = fulltext.search_stmt(tokens, doctor_id=doctor_id, patient_id=patient_id)
+    return stmt.order_by(
+        stmt.selected_columns.rank.desc(),
+        ClinicalHistory.visit_date.desc(),
+    ).limit(limit)
 
 
-def list_histories_by_doctor(
+def search_histories(
     db: Session,
-    doctor_id: int,
-    skip: int = 0,
-    limit: int = 50,
-) -> List[ClinicalHistory]:
-    return (
-        db.query(ClinicalHistory)
-        .filter(ClinicalHistory.doctor_id == doctor_id)
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+    query: str,
+    doctor_id: int | None = None,
+    patient_id: int | None = None,
+    limit: int = 20,
+) -> List[Tuple[ClinicalHistory, float]]:
+    stmt = search_histories_stmt(query, doctor_id, patient_id, limit)
+    if stmt is None:
+        return []
+    return [(history, rank) for history, rank in db.execute(stmt).all()]
 
 
 def update_history(
@@ -82,7 +252,7 @@ def update_history(
 
     db.add(history)
     db.commit()
-    db.refresh(history)
+    publish_history("history.updated", history)
     return history
 
 
@@ -91,4 +261,7 @@ def delete_history(
     history: ClinicalHistory,
 ) -> None:
     db.delete(history)
+    deltas = stats_service.changes(before=stats_service.history_keys(history.doctor_id))
+    stats_service.record(db, deltas)
     db.commit()
+    publish_history("history.deleted", history)
@@ -2,12 +2,122 @@
 
 from typing import List, Optional
 
-from sqlalchemy.orm import Session
-
-from app.models import Doctor
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.config import settings
+from app.core.etag import row_etag
+from app.core.pagination import apply_keyset
+from app.core.principal import Principal, principal_cache
+from app.core.token_denylist import token_denylist
+from app.models import Doctor, Role, User
 from app.schemas.doctor import DoctorCreate, DoctorUpdate
 
 
+# Orden estable para paginar por cursor (keyset)
+DOCTOR_ORDER = (Doctor.id,)
+
+# doctor_to_response lee doctor.user.email: se trae en el mismo SELECT
+# (solo el email) para no lanzar una consulta por cada doctor
+WITH_USER_EMAIL = joinedload(Doctor.user).load_only(User.email)
+
+
+# --- Reglas compartidas por los routers sync y async ---
+
+def doctor_to_response(doctor: Doctor) -> dict:
+    user = getattr(doctor, "user", None)
+    email = getattr(user, "email", None)
+    return {
+        "id": doctor.id,
+        "user_id": doctor.user_id,
+        "specialty": doctor.specialty,
+        "user_email": email,
+    }
+
+
+def profile_etag(doctor: Doctor) -> str:
+    # doctors no tiene updated_at: el ETag sale de sus columnas y del email
+    return row_etag(doctor, doctor.user.email if doctor.user else None)
+
+
+def user_role_stmt(user_id: int):
+    """(id, nombre del rol) del usuario, en una sola consulta."""
+    return (
+        select(User.id, Role.name)
+        .join(Role, Role.id == User.role_id, isouter=True)
+        .where(User.id == user_id)
+    )
+
+
+def check_new_doctor(existing: Optional[Doctor], user_role) -> None:
+    """
+    Reglas del alta:
+      - No debe existir ya un perfil de doctor para ese user_id.
+      - El usuario referenciado debe existir y tener rol 'doctor'.
+    user_role: la fila de user_role_stmt, o None.
+    """
+    if existing:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="This user already has a doctor profile",
+        )
+    if not user_role:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User not found",
+        )
+    if user_role[1] != "doctor":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User must have role 'doctor' to create a doctor profile",
+        )
+
+
+def require_doctor(doctor: Optional[Doctor]) -> Doctor:
+    if not doctor:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Doctor not found",
+        )
+    return doctor
+
+
+def require_profile(doctor: Optional[Doctor]) -> Doctor:
+    if not doctor:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Doctor profile not found for this user",
+        )
+    return doctor
+
+
+def check_calendar_access(principal: Principal, doctor_id: int) -> bool:
+    """
+    admin: cualquier calendario; doctor: solo el suyo. Devuelve True si
+    además hay que comprobar que el doctor existe (admin).
+    """
+    role_name = principal.role_name
+
+    if role_name == "admin":
+        return True
+    if role_name == "doctor":
+        if principal.doctor_id != doctor_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You can only access your own calendar",
+            )
+        return False
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="Insufficient permissions",
+    )
+
+
+def get_user_role(db: Session, user_id: int):
+    return db.execute(user_role_stmt(user_id)).first()
+
+
 def create_doctor(db: Session, doctor_in: DoctorCreate) -> Doctor:
     doctor = Doctor(
         user_id=doctor_in.user_id,
@@ -15,24 +125,41 @@ def create_doctor(db: Session, doctor_in: DoctorCreate) -> Doctor:
     )
     db.add(doctor)
     db.commit()
-    db.refresh(doctor)
+    principal_cache.invalidate(doctor.user_id)
+    # Los tokens "scoped" previos no llevan el id de perfil nuevo
+    if settings.JWT_SCOPED_CLAIMS:
+        token_denylist.revoke_user(db, doctor.user_id)
     return doctor
 
 
 def get_doctor(db: Session, doctor_id: int) -> Optional[Doctor]:
-    return db.query(Doctor).filter(Doctor.id == doctor_id).first()
+    return (
+        db.query(Doctor)
+        .options(WITH_USER_EMAIL)
+        .filter(Doctor.id == doctor_id)
+        .first()
+    )
 
 
 def get_doctor_by_user_id(db: Session, user_id: int) -> Optional[Doctor]:
-    return db.query(Doctor).filter(Doctor.user_id == user_id).first()
+    return (
+        db.query(Doctor)
+        .options(WITH_USER_EMAIL)
+        .filter(Doctor.user_id == user_id)
+        .first()
+    )
 
 
 def list_doctors(
     db: Session,
     skip: int = 0,
     limit: int = 20,
+    after: tuple | None = None,
 ) -> List[Doctor]:
-    return db.query(Doctor).offset(skip).limit(limit).all()
+    query = apply_keyset(
+        db.query(Doctor).options(WITH_USER_EMAIL), DOCTOR_ORDER, after
+    )
+    return query.offset(skip).limit(limit).all()
 
 
 def update_doctor(
@@ -46,10 +173,14 @@ def update_doctor(
 
     db.add(doctor)
     db.commit()
-    db.refresh(doctor)
+    principal_cache.invalidate(doctor.user_id)
     return doctor
 
 
 def delete_doctor(db: Session, doctor: Doctor) -> None:
+    user_id = doctor.user_id
     db.delete(doctor)
     db.commit()
+    principal_cache.invalidate(user_id)
+    if settings.JWT_SCOPED_CLAIMS:
+        token_denylist.revoke_user(db, user_id)
@@ -0,0 +1,142 @@
+# app/services/export_service.py
+
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import Iterator, Optional
+
+from fastapi import Request
+from sqlalchemy import select
+
+from app.core.db.database import SessionLocal
+from app.models import Appointment, ClinicalHistory
+
+
+# Filas que se traen del cursor del servidor por cada viaje
+EXPORT_CHUNK_ROWS = 1000
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+APPOINTMENT_EXPORT_COLUMNS = (
+    Appointment.id,
+    Appointment.patient_id,
+    Appointment.doctor_id,
+    Appointment.scheduled_at,
+    Appointment.status,
+    Appointment.reason,
+    Appointment.notes,
+    Appointment.created_at,
+    Appointment.updated_at,
+)
+
+HISTORY_EXPORT_COLUMNS = (
+    ClinicalHistory.id,
+    ClinicalHistory.patient_id,
+    ClinicalHistory.doctor_id,
+    ClinicalHistory.appointment_id,
+    ClinicalHistory.visit_date,
+    ClinicalHistory.diagnosis,
+    ClinicalHistory.treatment,
+    ClinicalHistory.notes,
+    ClinicalHistory.created_at,
+    ClinicalHistory.updated_at,
+)
+
+
+def _export_stmt(
+    columns,
+    date_column,
+    date_from: Optional[datetime],
+    date_to: Optional[datetime],
+    doctor_id: Optional[int],
+    patient_id: Optional[int],
+):
+    model = date_column.class_
+    stmt = select(*columns)
+    if date_from is not None:
+        stmt = stmt.where(date_column >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(date_column < date_to)
+    if doctor_id is not None:
+        stmt = stmt.where(model.doctor_id == doctor_id)
+    if patient_id is not None:
+        stmt = stmt.where(model.patient_id == patient_id)
+    return stmt.order_by(date_column, model.id)
+
+
+def appointments_stmt(date_from=None, date_to=None, doctor_id=None, patient_id=None):
+    return _export_stmt(
+        APPOINTMENT_EXPORT_COLUMNS,
+        Appointment.scheduled_at,
+        date_from,
+        date_to,
+        doctor_id,
+        patient_id,
+    )
+
+
+def histories_stmt(date_from=None, date_to=None, doctor_id=None, patient_id=None):
+    return _export_stmt(
+        HISTORY_EXPORT_COLUMNS,
+        ClinicalHistory.visit_date,
+        date_from,
+        date_to,
+        doctor_id,
+        patient_id,
+    )
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _csv_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return "" if value is None else value
+
+
+def stream_rows(stmt, fmt: str, request: Request | None = None) -> Iterator[str]:
+    """
+    Genera el export por trozos con un cursor del lado del servidor
+    (stream_results + yield_per): la memoria no depende del total de filas.
+
+    Abre su propia sesión porque el cuerpo se envía después de que las
+    dependencias de la petición ya cerraron la suya. Es un generador sync:
+    StreamingResponse lo itera en el threadpool.
+    """
+    names = [column.key for column in stmt.selected_columns]
+    db = SessionLocal()
+    # Es una lectura: puede ir a una réplica (respetando read-your-writes)
+    db.info["read_only"] = True
+    db.info["request"] = request
+    try:
+        result = db.execute(
+            stmt,
+            execution_options={"stream_results": True, "yield_per": EXPORT_CHUNK_ROWS},
+        )
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(names)
+            for rows in result.partitions():
+                writer.writerows([_csv_value(v) for v in row] for row in rows)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():
+                yield buffer.getvalue()
+        else:
+            for rows in result.partitions():
+                yield "".join(
+                    json.dumps(dict(zip(names, row)), default=_json_default) + "\n"
+                    for row in rows
+                )
+    finally:
+        db.close()
@@ -0,0 +1,506 @@
+# app/services/import_service.py
+
+import bisect
+import codecs
+import csv
+import json
+import sys
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Optional, Type
+
+from fastapi import HTTPException, Request, status
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert, literal_column, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.availability import (
+    SLOT_SECONDS,
+    busy_index,
+    first_overlap,
+    from_epoch,
+    to_epoch,
+)
+from app.core.config import settings
+from app.core.db import booking
+from app.core.events import event_bus
+from app.core.hashing import password_hasher
+from app.core.principal import principal_cache
+from app.core.search_cache import patient_search_cache
+from app.core.token_denylist import token_denylist
+from app.models import User, Role, Patient, Doctor, Appointment
+from app.schemas.appointment import AppointmentCreate
+from app.schemas.doctor import DoctorCreate
+from app.schemas.imports import ImportReport, ImportRowError
+from app.schemas.patient import PatientCreate
+from app.schemas.user import UserCreate
+from app.services import stats_service
+from app.services.appointment_service import CONFLICT_DETAIL
+
+
+NDJSON_CONTENT_TYPES = {
+    "application/x-ndjson",
+    "application/ndjson",
+    "application/jsonl",
+    "application/json-lines",
+}
+CSV_CONTENT_TYPES = {"text/csv", "application/csv"}
+
+
+@dataclass(frozen=True)
+class ImportSpec:
+    """
+    Cómo importar una entidad: esquema de validación, modelo destino y
+    chequeos contra la base de datos (los mismos que el alta individual).
+    """
+    entity: str
+    schema: Type[BaseModel]
+    model: type
+    # (db, [(fila, item)], vistos en lotes anteriores) -> (válidos, errores)
+    check: Callable
+    hash_passwords: bool = False
+    # Se llama con los valores efectivamente insertados
+    after_insert: Optional[Callable[[Session, list[dict]], None]] = None
+    # Claves de stat_counters de cada fila; se suman en la misma transacción
+    stats_keys: Optional[Callable[[dict], list[tuple]]] = None
+    # (db, [(fila, valores)], ids insertados) -> errores. Corre después del
+    # INSERT y antes del commit; si devuelve algo, el lote se deshace
+    recheck: Optional[Callable] = None
+
+
+def detect_format(request: Request) -> str:
+    content_type = request.headers.get("content-type", "")
+    content_type = content_type.split(";")[0].strip().lower()
+    if content_type in NDJSON_CONTENT_TYPES:
+        return "ndjson"
+    if content_type in CSV_CONTENT_TYPES:
+        return "csv"
+    raise HTTPException(
+        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        detail="Send the rows as application/x-ndjson or text/csv",
+    )
+
+
+async def _iter_lines(request: Request) -> AsyncIterator[str]:
+    # utf-8-sig: tolera el BOM que agregan algunas hojas de cálculo
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in request.stream():
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def _iter_records(request: Request, fmt: str) -> AsyncIterator[tuple]:
+    """
+    Recorre el cuerpo a medida que llega, sin cargarlo entero en memoria.
+    Produce (fila, datos, None) o (fila, None, error de formato).
+    """
+    row = 0
+
+    if fmt == "ndjson":
+        async for line in _iter_lines(request):
+            if not line.strip():
+                continue
+            row += 1
+            try:
+                data = json.loads(line)
+            except ValueError:
+                yield row, None, "Invalid JSON"
+                continue
+            if not isinstance(data, dict):
+                yield row, None, "Each line must be a JSON object"
+                continue
+            yield row, data, None
+        return
+
+    header = None
+    record = ""
+    async for line in _iter_lines(request):
+        record = f"{record}\n{line}" if record else line
+        # Con comillas abiertas el registro sigue en la línea siguiente
+        if record.count('"') % 2:
+            continue
+        if not record.strip():
+            record = ""
+            continue
+        fields = next(csv.reader([record]))
+        record = ""
+
+        if header is None:
+            header = [name.strip() for name in fields]
+            continue
+
+        row += 1
+        if len(fields) != len(header):
+            yield row, None, f"Expected {len(header)} columns, got {len(fields)}"
+            continue
+        # Celda vacía = campo no enviado (para que aplique el default/None)
+        yield row, {k: v for k, v in zip(header, fields) if v != ""}, None
+
+    if record:
+        yield row + 1, None, "Unterminated quoted field"
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}"
+        for err in exc.errors()
+    )
+
+
+def _add_error(report: ImportReport, row: int, error: str) -> None:
+    report.failed += 1
+    if len(report.errors) < settings.IMPORT_MAX_REPORTED_ERRORS:
+        report.errors.append(ImportRowError(row=row, error=error))
+    else:
+        report.errors_truncated = True
+
+
+def _record_stats(db: Session, spec: ImportSpec, values: list[dict]) -> None:
+    if spec.stats_keys is not None:
+        keys = [key for v in values for key in spec.stats_keys(v)]
+        stats_service.record(db, stats_service.changes(after=keys))
+
+
+def _insert_checked(db: Session, spec: ImportSpec, rows: list[tuple[int, dict]]) -> list:
+    """
+    INSERT de las filas y, si la entidad lo pide, la re-comprobación en la
+    misma transacción. Devuelve [] si se confirmó, o los errores de la
+    re-comprobación (con la transacción ya deshecha).
+    """
+    values = [values for _, values in rows]
+    if spec.recheck is None:
+        db.execute(insert(spec.model), values)
+    else:
+        ids = db.scalars(
+            insert(spec.model).returning(spec.model.id, sort_by_parameter_order=True),
+            values,
+        ).all()
+        errors = spec.recheck(db, rows, ids)
+        if errors:
+            db.rollback()
+            return errors
+    _record_stats(db, spec, values)
+    db.commit()
+    return []
+
+
+def _insert_rows(
+    db: Session,
+    spec: ImportSpec,
+    rows: list[tuple[int, dict]],
+) -> tuple[list[dict], list[tuple[int, str]]]:
+    """
+    Inserta el lote con un solo executemany. Si algo choca (p.ej. otra
+    petición creó el mismo email entre el chequeo y el insert), se
+    reintenta fila por fila para reportar solo las que fallan. Las filas
+    que rechaza la re-comprobación se reportan y el resto se reintenta.
+    """
+    inserted, errors = [], []
+    while rows:
+        try:
+            rejected = _insert_checked(db, spec, rows)
+        except IntegrityError:
+            db.rollback()
+            for row, values in rows:
+                try:
+                    rejected = _insert_checked(db, spec, [(row, values)])
+                except IntegrityError as exc:
+                    db.rollback()
+                    errors.append((row, f"Integrity error: {exc.orig}"))
+                    continue
+                if rejected:
+                    errors.extend(rejected)
+                else:
+                    inserted.append(values)
+            break
+        if not rejected:
+            inserted.extend(values for _, values in rows)
+            break
+        errors.extend(rejected)
+        rejected_rows = {row for row, _ in rejected}
+        rows = [(row, values) for row, values in rows if row not in rejected_rows]
+
+    if inserted and spec.after_insert is not None:
+        spec.after_insert(db, inserted)
+    return inserted, errors
+
+
+async def _import_batch(
+    db: Session,
+    spec: ImportSpec,
+    batch: list[tuple[int, BaseModel]],
+    seen: set,
+    report: ImportReport,
+) -> None:
+    valid, errors = await run_in_threadpool(spec.check, db, batch, seen)
+    for row, error in errors:
+        _add_error(report, row, error)
+    if not valid:
+        return
+
+    values = [item.model_dump() for _, item in valid]
+    if spec.hash_passwords:
+        # Todo el lote al pool de procesos de una vez, repartido por worker
+        hashes = await password_hasher.hash_many([v.pop("password") for v in values])
+        for v, hashed in zip(values, hashes):
+            v["hashed_password"] = hashed
+
+    rows = [(row, v) for (row, _), v in zip(valid, values)]
+    inserted, errors = await run_in_threadpool(_insert_rows, db, spec, rows)
+    report.inserted += len(inserted)
+    for row, error in errors:
+        _add_error(report, row, error)
+
+
+async def run_import(request: Request, db: Session, spec: ImportSpec) -> ImportReport:
+    """
+    Importa filas NDJSON/CSV en lotes de IMPORT_BATCH_SIZE. Cada lote se
+    valida y se confirma por separado: una fila inválida no aborta el resto.
+    """
+    fmt = detect_format(request)
+    report = ImportReport(entity=spec.entity, format=fmt, total=0, inserted=0, failed=0)
+    seen: set = set()
+    batch: list[tuple[int, BaseModel]] = []
+
+    try:
+        async for row, data, error in _iter_records(request, fmt):
+            report.total += 1
+            if error is None:
+                try:
+                    batch.append((row, spec.schema.model_validate(data)))
+                except ValidationError as exc:
+                    error = _validation_message(exc)
+            if error is not None:
+                _add_error(report, row, error)
+
+            if len(batch) >= settings.IMPORT_BATCH_SIZE:
+                await _import_batch(db, spec, batch, seen, report)
+                batch = []
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Body must be UTF-8 encoded",
+        )
+
+    if batch:
+        await _import_batch(db, spec, batch, seen, report)
+    report.errors.sort(key=lambda err: err.row)
+    return report
+
+
+# --- Chequeos por entidad (en lote: una consulta por lote, no por fila) ---
+
+def _check_users(db: Session, batch, seen: set):
+    emails = [item.email for _, item in batch]
+    taken = set(db.scalars(select(User.email).where(User.email.in_(emails))))
+    role_ids = set(db.scalars(select(Role.id)))
+
+    valid, errors = [], []
+    for row, item in batch:
+        if item.email in taken or item.email in seen:
+            errors.append((row, "Email already registered"))
+        elif item.role_id not in role_ids:
+            errors.append((row, "Invalid role_id"))
+        else:
+            seen.add(item.email)
+            valid.append((row, item))
+    return valid, errors
+
+
+def _check_patients(db: Session, batch, seen: set):
+    user_ids = [item.user_id for _, item in batch]
+    users = set(db.scalars(select(User.id).where(User.id.in_(user_ids))))
+    taken = set(db.scalars(select(Patient.user_id).where(Patient.user_id.in_(user_ids))))
+
+    valid, errors = [], []
+    for row, item in batch:
+        if item.user_id not in users:
+            errors.append((row, "User not found"))
+        elif item.user_id in taken or item.user_id in seen:
+            errors.append((row, "This user already has a patient profile"))
+        else:
+            seen.add(item.user_id)
+            valid.append((row, item))
+    return valid, errors
+
+
+def _check_doctors(db: Session, batch, seen: set):
+    user_ids = [item.user_id for _, item in batch]
+    roles = dict(
+        db.execute(
+            select(User.id, Role.name)
+            .join(Role, Role.id == User.role_id)
+            .where(User.id.in_(user_ids))
+        ).all()
+    )
+    taken = set(db.scalars(select(Doctor.user_id).where(Doctor.user_id.in_(user_ids))))
+
+    valid, errors = [], []
+    for row, item in batch:
+        if item.user_id not in roles:
+            errors.append((row, "User not found"))
+        elif item.user_id in taken or item.user_id in seen:
+            errors.append((row, "This user already has a doctor profile"))
+        elif roles[item.user_id] != "doctor":
+            errors.append((row, "User must have role 'doctor' to create a doctor profile"))
+        else:
+            seen.add(item.user_id)
+            valid.append((row, item))
+    return valid, errors
+
+
+def _busy_for_batch(db: Session, doctor_ids: set, starts: list[int]) -> dict:
+    """
+    Citas 'scheduled' de los doctores del lote alrededor de sus horarios:
+    doctor_id -> [(inicio, appointment_id)] ordenada. Los lotes anteriores
+    ya están confirmados, así que también aparecen aquí.
+    """
+    rows = db.execute(
+        select(Appointment.doctor_id, Appointment.id, Appointment.scheduled_at).where(
+            Appointment.doctor_id.in_(doctor_ids),
+            Appointment.status == literal_column("'scheduled'"),
+            Appointment.scheduled_at > from_epoch(min(starts) - SLOT_SECONDS),
+            Appointment.scheduled_at < from_epoch(max(starts) + SLOT_SECONDS),
+        )
+    )
+    busy: dict[int, list] = {}
+    for doctor_id, appointment_id, scheduled_at in rows:
+        busy.setdefault(doctor_id, []).append((to_epoch(scheduled_at), appointment_id))
+    for entries in busy.values():
+        entries.sort()
+    return busy
+
+
+def _check_appointments(db: Session, batch, seen: set):
+    patient_ids = {item.patient_id for _, item in batch}
+    doctor_ids = {item.doctor_id for _, item in batch}
+    patients = set(db.scalars(select(Patient.id).where(Patient.id.in_(patient_ids))))
+    doctors = set(db.scalars(select(Doctor.id).where(Doctor.id.in_(doctor_ids))))
+    starts = [to_epoch(item.scheduled_at) for _, item in batch]
+    busy = _busy_for_batch(db, doctor_ids, starts)
+
+    valid, errors = [], []
+    for (row, item), start in zip(batch, starts):
+        if item.patient_id not in patients:
+            errors.append((row, "Invalid patient_id"))
+        elif item.doctor_id not in doctors:
+            errors.append((row, "Invalid doctor_id"))
+        else:
+            entries = busy.setdefault(item.doctor_id, [])
+            conflict = first_overlap(entries, start)
+            if conflict is None:
+                # Las filas válidas del lote ocupan su turno con id = -fila
+                bisect.insort(entries, (start, -row))
+                valid.append((row, item))
+            elif conflict < 0:
+                errors.append((row, f"Overlaps row {-conflict} of this import"))
+            else:
+                errors.append((row, CONFLICT_DETAIL.format(conflict)))
+    return valid, errors
+
+
+def _recheck_appointments(db: Session, rows: list[tuple[int, dict]], ids: list[int]):
+    """
+    Igual que _commit_booking, pero por lote: con las filas ya insertadas
+    se toma el lock de cada doctor (ordenados por id, para que dos
+    importaciones no se bloqueen en cruz) y se vuelve a buscar
+    solapamientos, ahora sí contra lo que otras reservas confirmaron entre
+    el chequeo y el INSERT.
+    """
+    doctor_ids = sorted({values["doctor_id"] for _, values in rows})
+    for doctor_id in doctor_ids:
+        lock = booking.lock_doctor_stmt(doctor_id)
+        if lock is not None:
+            db.execute(lock)
+
+    starts = [to_epoch(values["scheduled_at"]) for _, values in rows]
+    busy = _busy_for_batch(db, set(doctor_ids), starts)
+    own = set(ids)
+
+    errors = []
+    for (row, values), start in zip(rows, starts):
+        entries = busy.get(values["doctor_id"], [])
+        # Las filas del lote no se solapan entre sí (ya lo vio el chequeo)
+        i = bisect.bisect_right(entries, (start - SLOT_SECONDS, sys.maxsize))
+        while i < len(entries) and entries[i][0] < start + SLOT_SECONDS:
+            if entries[i][1] not in own:
+                errors.append((row, CONFLICT_DETAIL.format(entries[i][1])))
+                break
+            i += 1
+    return errors
+
+
+def _profiles_created(db: Session, values: list[dict]) -> None:
+    user_ids = [v["user_id"] for v in values]
+    for user_id in user_ids:
+        principal_cache.invalidate(user_id)
+    # Los tokens "scoped" previos no llevan el id de perfil nuevo
+    if settings.JWT_SCOPED_CLAIMS:
+        token_denylist.revoke_users(db, user_ids)
+
+
+def _patients_created(db: Session, values: list[dict]) -> None:
+    _profiles_created(db, values)
+    patient_search_cache.clear()
+
+
+def _appointments_created(db: Session, values: list[dict]) -> None:
+    # executemany no devuelve ids: esos doctores se recargan al buscar turnos
+    doctor_ids = {v["doctor_id"] for v in values}
+    busy_index.invalidate(doctor_ids)
+    # Un solo aviso por lote: quien lo recibe vuelve a pedir su listado
+    event_bus.publish(
+        "appointment.imported",
+        {"count": len(values)},
+        doctor_ids=doctor_ids,
+        patient_ids={v["patient_id"] for v in values},
+    )
+
+
+def _patient_stats_keys(values: dict) -> list[tuple]:
+    return stats_service.new_patient_keys()
+
+
+def _appointment_stats_keys(values: dict) -> list[tuple]:
+    # El status no viene en la importación: se inserta el default
+    return stats_service.appointment_keys(values["doctor_id"], values["scheduled_at"], "scheduled")
+
+
+USERS = ImportSpec(
+    entity="users",
+    schema=UserCreate,
+    model=User,
+    check=_check_users,
+    hash_passwords=True,
+)
+PATIENTS = ImportSpec(
+    entity="patients",
+    schema=PatientCreate,
+    model=Patient,
+    check=_check_patients,
+    after_insert=_patients_created,
+    stats_keys=_patient_stats_keys,
+)
+DOCTORS = ImportSpec(
+    entity="doctors",
+    schema=DoctorCreate,
+    model=Doctor,
+    check=_check_doctors,
+    after_insert=_profiles_created,
+)
+APPOINTMENTS = ImportSpec(
+    entity="appointments",
+    schema=AppointmentCreate,
+    model=Appointment,
+    check=_check_appointments,
+    after_insert=_appointments_created,
+    stats_keys=_appointment_stats_keys,
+    recheck=_recheck_appointments,
+)
@@ -2,10 +2,84 @@
 
 from typing import List, Optional
 
+from fastapi import HTTPException, status
+from sqlalchemy import Numeric, String, and_, cast, func, literal, or_, select, union_all
 from sqlalchemy.orm import Session
 
-from app.models import Patient
+from app.core.config import settings
+from app.core.db import fulltext
+from app.core.pagination import apply_keyset
+from app.core.principal import Principal, principal_cache
+from app.core.search_cache import patient_search_cache
+from app.core.token_denylist import token_denylist
+from app.models import Patient, User
 from app.schemas.patient import PatientCreate, PatientUpdate
+from app.services import stats_service
+
+
+# Orden estable para paginar por cursor (keyset)
+PATIENT_ORDER = (Patient.id,)
+
+# Máximo de palabras que se toman de la consulta de búsqueda
+SEARCH_MAX_TOKENS = 5
+
+
+# --- Reglas compartidas por los routers sync y async ---
+
+def check_new_patient(existing: Optional[Patient]) -> None:
+    # Evitar duplicados por user_id
+    if existing:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="This user already has a patient profile",
+        )
+
+
+def require_patient(patient: Optional[Patient]) -> Patient:
+    if not patient:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Patient not found",
+        )
+    return patient
+
+
+def require_profile(patient: Optional[Patient]) -> Patient:
+    if not patient:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Patient profile not found for this user",
+        )
+    return patient
+
+
+def check_can_view(principal: Principal, patient: Patient) -> None:
+    """
+    Reglas:
+      - admin / doctor: cualquier paciente (más adelante podemos restringir
+        al doctor a "sus" pacientes).
+      - patient: solo su propio registro.
+    """
+    role_name = principal.role_name
+
+    if role_name == "patient":
+        if patient.user_id != principal.id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You cannot access another patient's data",
+            )
+    elif role_name not in ("admin", "doctor"):
+        # Rol desconocido (por si acaso)
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Insufficient permissions",
+        )
+
+
+def patient_changed(user_id: int) -> None:
+    """Cachés en memoria que dependen del perfil (ya confirmado)."""
+    principal_cache.invalidate(user_id)
+    patient_search_cache.clear()
 
 
 def create_patient(db: Session, patient_in: PatientCreate) -> Patient:
@@ -18,8 +92,13 @@ def create_patient(db: Session, patient_in: PatientCreate) -> Patient:
         birth_date=patient_in.birth_date,
     )
     db.add(patient)
+    # Altas por semana: los pacientes no guardan fecha de alta, se cuenta ahora
+    stats_service.record(db, stats_service.changes(after=stats_service.new_patient_keys()))
     db.commit()
-    db.refresh(patient)
+    patient_changed(patient.user_id)
+    # Los tokens "scoped" previos no llevan el id de perfil nuevo
+    if settings.JWT_SCOPED_CLAIMS:
+        token_denylist.revoke_user(db, patient.user_id)
     return patient
 
 
@@ -35,8 +114,161 @@ def list_patients(
     db: Session,
     skip: int = 0,
     limit: int = 20,
+    after: tuple | None = None,
 ) -> List[Patient]:
-    return db.query(Patient).offset(skip).limit(limit).all()
+    query = apply_keyset(db.query(Patient), PATIENT_ORDER, after)
+    return query.offset(skip).limit(limit).all()
+
+
+# --- Búsqueda / autocompletado ---
+
+SEARCH_COLUMNS = (
+    Patient.id,
+    Patient.user_id,
+    Patient.document_type,
+    Patient.document_number,
+    Patient.phone,
+    Patient.address,
+    Patient.birth_date,
+    User.first_name,
+    User.last_name,
+    User.email,
+)
+_SEARCH_KEYS = [column.key for column in SEARCH_COLUMNS]
+
+
+def search_tokens(query: str) -> list[str]:
+    return query.lower().split()[:SEARCH_MAX_TOKENS]
+
+
+def _starts_with(expr, prefix: str):
+    # Rango en lugar de LIKE: usa el índice sobre lower(col) en cualquier motor
+    return and_(expr >= prefix, expr < prefix + "\uffff")
+
+
+def search_patients_stmt(tokens: list[str], limit: int):
+    """
+    Cada palabra debe ser prefijo del documento, teléfono, apellido o
+    nombre. Un OR entre columnas de dos tablas no puede usar índices, así
+    que se arma una rama por columna (la palabra más larga recorre el
+    índice de esa columna, en orden, hasta juntar `limit` filas) y se
+    unen con UNION ALL. Con pg_trgm se agrega una rama de coincidencias
+    aproximadas del nombre completo o del documento (errores de tipeo).
+
+    Devuelve filas con priority / sort_key / tie para rank_search_rows().
+    """
+    driver = max(tokens, key=len)
+    document = func.lower(Patient.document_number)
+    first_name = func.lower(User.first_name)
+    last_name = func.lower(User.last_name)
+    fields = (document, Patient.phone, last_name, first_name)
+    every_token = and_(*(or_(*(_starts_with(f, t) for f in fields)) for t in tokens))
+
+    # (prioridad, columna indexada, desempate en el orden del índice)
+    branches = [
+        (0, document, Patient.id),
+        (1, Patient.phone, Patient.id),
+        (2, last_name, User.id),
+        (3, first_name, User.id),
+    ]
+    selects = [
+        select(
+            *SEARCH_COLUMNS,
+            literal(priority).label("priority"),
+            key.label("sort_key"),
+            tie.label("tie"),
+        )
+        .join(User, User.id == Patient.user_id)
+        .where(_starts_with(key, driver), every_token)
+        .order_by(key, tie)
+        .limit(limit)
+        for priority, key, tie in branches
+    ]
+
+    if fulltext.trigram:
+        text_query = " ".join(tokens)
+        full_name = func.lower(
+            func.coalesce(User.first_name, "") + " " + func.coalesce(User.last_name, "")
+        )
+        similarity = func.greatest(
+            func.similarity(full_name, text_query),
+            func.similarity(document, text_query),
+        )
+        selects.append(
+            select(
+                *SEARCH_COLUMNS,
+                literal(len(branches)).label("priority"),
+                # Texto de ancho fijo: ordena igual que el número
+                cast(func.round(cast(1 - similarity, Numeric), 4), String).label("sort_key"),
+                Patient.id.label("tie"),
+            )
+            .join(User, User.id == Patient.user_id)
+            .where(or_(full_name.op("%")(text_query), document.op("%")(text_query)))
+            .order_by(similarity.desc(), Patient.id)
+            .limit(limit)
+        )
+
+    # SQLite no admite ORDER BY / LIMIT dentro de cada parte de un UNION
+    return union_all(*(select(branch.subquery().c) for branch in selects))
+
+
+def rank_search_rows(rows, limit: int) -> list[dict]:
+    """
+    Ordena por (prioridad de la columna que coincidió, valor, id), deja
+    una fila por paciente y recorta a `limit`.
+    """
+    ranked = sorted(rows, key=lambda row: (row["priority"], row["sort_key"] or "", row["tie"]))
+    seen, result = set(), []
+    for row in ranked:
+        if row["id"] in seen:
+            continue
+        seen.add(row["id"])
+        result.append({key: row[key] for key in _SEARCH_KEYS})
+        if len(result) == limit:
+            break
+    return result
+
+
+def refine_search_rows(rows: list[dict], tokens: list[str]) -> list[dict]:
+    """
+    Mismas reglas que search_patients_stmt (sin pg_trgm), en memoria,
+    sobre el resultado completo de un prefijo de la consulta.
+    """
+    driver = max(tokens, key=len)
+    candidates = []
+    for row in rows:
+        values = [
+            (row["document_number"] or "").lower(),
+            row["phone"] or "",
+            (row["last_name"] or "").lower(),
+            (row["first_name"] or "").lower(),
+        ]
+        if not all(any(v.startswith(t) for v in values) for t in tokens):
+            continue
+        for priority, value in enumerate(values):
+            if value.startswith(driver):
+                tie = row["id"] if priority < 2 else row["user_id"]
+                candidates.append({**row, "priority": priority, "sort_key": value, "tie": tie})
+                break
+    return rank_search_rows(candidates, len(candidates))
+
+
+def cached_search(tokens: list[str], limit: int) -> list[dict] | None:
+    # Con pg_trgm los resultados aproximados no se pueden refinar por prefijo
+    refine = None if fulltext.trigram else (lambda rows: refine_search_rows(rows, tokens))
+    return patient_search_cache.get(" ".join(tokens), limit, refine)
+
+
+def search_patients(db: Session, query: str, limit: int = 10) -> List[dict]:
+    tokens = search_tokens(query)
+    if not tokens:
+        return []
+    rows = cached_search(tokens, limit)
+    if rows is None:
+        result = db.execute(search_patients_stmt(tokens, limit)).mappings()
+        rows = rank_search_rows(result, limit)
+        patient_search_cache.set(" ".join(tokens), limit, rows)
+    return rows
 
 
 def update_patient(
@@ -50,10 +282,14 @@ def update_patient(
 
     db.add(patient)
     db.commit()
-    db.refresh(patient)
+    patient_changed(patient.user_id)
     return patient
 
 
 def delete_patient(db: Session, patient: Patient) -> None:
+    user_id = patient.user_id
     db.delete(patient)
     db.commit()
+    patient_changed(user_id)
+    if settings.JWT_SCOPED_CLAIMS:
+        token_denylist.revoke_user(db, user_id)
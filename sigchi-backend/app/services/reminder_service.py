@@ -0,0 +1,161 @@
+# app/services/reminder_service.py
+
+import time
+from datetime import datetime
+
+from sqlalchemy import insert, literal_column, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.availability import from_epoch, to_epoch
+from app.core.config import settings
+from app.core.db.database import engine
+from app.core.reminders import Notifier, ReminderScheduler, load_notifier
+from app.models import Appointment, Patient, ReminderDelivery, User
+
+
+_CLAIM_DIALECTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+# Se resuelve al primer envío
+_notifier: Notifier | None = None
+
+
+def get_notifier() -> Notifier:
+    global _notifier
+    if _notifier is None:
+        _notifier = load_notifier(settings.REMINDER_NOTIFIER)
+    return _notifier
+
+
+# --- Carga de la ventana ---
+
+def pending_stmt(start: datetime, end: datetime):
+    """
+    Citas 'scheduled' con scheduled_at en [start, end): rango sobre
+    ix_appointments_scheduled, sin recorrer la tabla.
+    """
+    return select(Appointment.id, Appointment.scheduled_at).where(
+        Appointment.scheduled_at >= start,
+        Appointment.scheduled_at < end,
+        Appointment.status == literal_column("'scheduled'"),
+    )
+
+
+def changes_stmt(since: datetime):
+    return select(
+        Appointment.id,
+        Appointment.scheduled_at,
+        Appointment.status,
+    ).where(Appointment.updated_at >= since)
+
+
+def refresh(db: Session, scheduler: ReminderScheduler) -> None:
+    """
+    Extiende la ventana cargada si se está quedando corta y aplica las
+    citas que cambiaron en otros workers.
+    """
+    now = time.time()
+    window = scheduler.window_to_load(now)
+    if window is not None:
+        start, end = window
+        rows = db.execute(pending_stmt(*scheduler.scheduled_range(start, end))).all()
+        scheduler.load(rows, start, end, now)
+
+    since = scheduler.changes_since()
+    if since is not None:
+        scheduler.apply_changes(db.execute(changes_stmt(since)).all(), now)
+
+
+# --- Envío ---
+
+def due_stmt(appointment_ids):
+    """Estado actual de las citas cuyos recordatorios vencieron, con el paciente."""
+    return (
+        select(
+            Appointment.id,
+            Appointment.scheduled_at,
+            Appointment.status,
+            Appointment.doctor_id,
+            Appointment.patient_id,
+            User.email,
+            User.first_name,
+            User.last_name,
+        )
+        .join(Patient, Patient.id == Appointment.patient_id)
+        .join(User, User.id == Patient.user_id)
+        .where(Appointment.id.in_(appointment_ids))
+    )
+
+
+def claim(db: Session, appointment_id: int, offset_minutes: int, scheduled_at: datetime) -> bool:
+    """
+    Registra el envío en la transacción en curso. False si ya lo
+    registró otro worker (o un arranque anterior).
+    """
+    values = {
+        "appointment_id": appointment_id,
+        "offset_minutes": offset_minutes,
+        "scheduled_at": scheduled_at,
+    }
+    dialect_insert = _CLAIM_DIALECTS.get(engine.dialect.name)
+    if dialect_insert is not None:
+        stmt = dialect_insert(ReminderDelivery).values(**values).on_conflict_do_nothing()
+        return db.execute(stmt).rowcount == 1
+    try:
+        with db.begin_nested():
+            db.execute(insert(ReminderDelivery).values(**values))
+        return True
+    except IntegrityError:
+        return False
+
+
+def send_due(db: Session, due: list, notifier: Notifier | None = None) -> int:
+    """
+    due: ((appointment_id, offset_minutes), scheduled_at epoch) que devolvió
+    ReminderScheduler.advance(). Cada recordatorio se vuelve a validar
+    contra la base de datos (la cita pudo cancelarse o moverse desde otro
+    worker) y se registra antes de enviarlo. Devuelve cuántos se enviaron.
+    """
+    if not due:
+        return 0
+    notifier = notifier or get_notifier()
+    rows = {row.id: row for row in db.execute(due_stmt({key[0] for key, _ in due}))}
+    oldest = time.time() - settings.REMINDER_GRACE_MINUTES * 60
+
+    reminders = []
+    for (appointment_id, offset_minutes), at in sorted(due):
+        row = rows.get(appointment_id)
+        if row is None or row.status != "scheduled" or to_epoch(row.scheduled_at) != at:
+            continue
+        if at - offset_minutes * 60 < oldest:
+            continue
+        if not claim(db, appointment_id, offset_minutes, row.scheduled_at):
+            continue
+        reminders.append(
+            {
+                "appointment_id": appointment_id,
+                "offset_minutes": offset_minutes,
+                "scheduled_at": from_epoch(at),
+                "doctor_id": row.doctor_id,
+                "patient_id": row.patient_id,
+                "email": row.email,
+                "first_name": row.first_name,
+                "last_name": row.last_name,
+            }
+        )
+    # Primero se confirma el registro: ante una caída a mitad de camino
+    # se pierde un recordatorio, pero nunca se envía dos veces
+    db.commit()
+
+    sent = 0
+    for reminder in reminders:
+        try:
+            notifier.send(reminder)
+            sent += 1
+        except Exception as exc:  # un destino caído no frena a los demás
+            print(f"Error enviando recordatorio {reminder['appointment_id']}: {exc}")
+    return sent
@@ -0,0 +1,258 @@
+# app/services/stats_service.py
+
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, delete, func, insert, or_, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.availability import to_clinic_date
+from app.core.config import settings
+from app.core.db.database import engine
+from app.models import Appointment, ClinicalHistory, StatCounter
+
+
+# Métricas del dashboard (columna metric de stat_counters)
+APPOINTMENTS_BY_DAY = "appointments_day"          # bucket: fecha local, con status
+APPOINTMENTS_BY_DOCTOR = "appointments_doctor"    # bucket: doctor_id, con status
+HISTORIES_BY_DOCTOR = "histories_doctor"          # bucket: doctor_id
+NEW_PATIENTS_BY_WEEK = "patients_week"            # bucket: lunes de la semana
+
+# Las que rebuild_stats() puede recalcular desde las tablas. Los pacientes
+# no guardan fecha de alta: patients_week solo se cuenta al crearlos
+REBUILT_METRICS = (APPOINTMENTS_BY_DAY, APPOINTMENTS_BY_DOCTOR, HISTORIES_BY_DOCTOR)
+
+REBUILD_BATCH_SIZE = 10000
+
+_UPSERT_DIALECTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+# --- Claves de cada fila ---
+
+def appointment_keys(doctor_id: int, scheduled_at: datetime, status_value: str) -> list[tuple]:
+    # La misma fecha para los deltas (scheduled_at con zona, de la petición)
+    # y para rebuild_stats (el de la base; en SQLite sin zona): las dos se
+    # pasan a UTC (ver UTCDateTime) y de ahí a la zona de la clínica
+    return [
+        (APPOINTMENTS_BY_DAY, to_clinic_date(scheduled_at).isoformat(), status_value),
+        (APPOINTMENTS_BY_DOCTOR, str(doctor_id), status_value),
+    ]
+
+
+def history_keys(doctor_id: int) -> list[tuple]:
+    return [(HISTORIES_BY_DOCTOR, str(doctor_id), "")]
+
+
+def week_start(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+def new_patient_keys(created_at: datetime | None = None) -> list[tuple]:
+    day = to_clinic_date(created_at or datetime.now(timezone.utc))
+    return [(NEW_PATIENTS_BY_WEEK, week_start(day).isoformat(), "")]
+
+
+def changes(before: Iterable[tuple] = (), after: Iterable[tuple] = ()) -> dict[tuple, int]:
+    """
+    Delta de contadores al pasar de las claves `before` a `after` (alta:
+    solo after, baja: solo before). Las que no cambian se descartan.
+    """
+    deltas = Counter(after)
+    deltas.subtract(before)
+    return {key: delta for key, delta in deltas.items() if delta}
+
+
+# --- Escritura incremental ---
+
+def upsert_stmt(deltas: dict[tuple, int]):
+    """
+    Un solo INSERT ... ON CONFLICT DO UPDATE count = count + delta para
+    todas las claves, o None si el motor no lo soporta. Las filas van
+    ordenadas: dos transacciones que tocan los mismos contadores los
+    bloquean en el mismo orden y no se interbloquean.
+    """
+    dialect_insert = _UPSERT_DIALECTS.get(engine.dialect.name)
+    if dialect_insert is None:
+        return None
+    stmt = dialect_insert(StatCounter).values(
+        [
+            {"metric": metric, "bucket": bucket, "status": status_value, "count": delta}
+            for (metric, bucket, status_value), delta in sorted(deltas.items())
+        ]
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[StatCounter.metric, StatCounter.bucket, StatCounter.status],
+        set_={"count": StatCounter.count + stmt.excluded["count"]},
+    )
+
+
+def increment_stmt(key: tuple, delta: int):
+    metric, bucket, status_value = key
+    return (
+        update(StatCounter)
+        .where(
+            StatCounter.metric == metric,
+            StatCounter.bucket == bucket,
+            StatCounter.status == status_value,
+        )
+        .values(count=StatCounter.count + delta)
+    )
+
+
+def insert_counter_stmt(key: tuple, delta: int):
+    metric, bucket, status_value = key
+    return insert(StatCounter).values(metric=metric, bucket=bucket, status=status_value, count=delta)
+
+
+def record(db: Session, deltas: dict[tuple, int]) -> None:
+    """
+    Aplica los deltas en la transacción en curso: se confirman (o se
+    descartan) junto con la escritura que los produjo.
+    """
+    if not deltas:
+        return
+    stmt = upsert_stmt(deltas)
+    if stmt is not None:
+        db.execute(stmt)
+        return
+    for key, delta in sorted(deltas.items()):
+        if db.execute(increment_stmt(key, delta)).rowcount == 0:
+            db.execute(insert_counter_stmt(key, delta))
+
+
+# --- Lectura del dashboard ---
+
+def stats_window(date_from: date | None, date_to: date | None) -> tuple[date, date]:
+    """Por defecto, los STATS_DEFAULT_DAYS días anteriores y posteriores a hoy."""
+    today = to_clinic_date(datetime.now(timezone.utc))
+    date_from = date_from or today - timedelta(days=settings.STATS_DEFAULT_DAYS)
+    date_to = date_to or today + timedelta(days=settings.STATS_DEFAULT_DAYS)
+    days = (date_to - date_from).days + 1
+    if days < 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'to' must not be before 'from'",
+        )
+    if days > settings.STATS_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range cannot exceed {settings.STATS_MAX_DAYS} days",
+        )
+    return date_from, date_to
+
+
+def dashboard_stmt(date_from: date, date_to: date, weeks: int):
+    """
+    Contadores del dashboard: rangos sobre la clave primaria (metric,
+    bucket, status). Las filas leídas dependen del número de doctores y
+    del rango pedido, no del tamaño de citas / historias / pacientes.
+    """
+    first_week = week_start(date_to) - timedelta(weeks=weeks - 1)
+    return select(StatCounter.metric, StatCounter.bucket, StatCounter.status, StatCounter.count).where(
+        or_(
+            and_(
+                StatCounter.metric == APPOINTMENTS_BY_DAY,
+                StatCounter.bucket >= date_from.isoformat(),
+                StatCounter.bucket <= date_to.isoformat(),
+            ),
+            StatCounter.metric == APPOINTMENTS_BY_DOCTOR,
+            StatCounter.metric == HISTORIES_BY_DOCTOR,
+            and_(
+                StatCounter.metric == NEW_PATIENTS_BY_WEEK,
+                StatCounter.bucket >= first_week.isoformat(),
+                StatCounter.bucket <= date_to.isoformat(),
+            ),
+        ),
+        StatCounter.count != 0,
+    )
+
+
+def build_dashboard(rows, date_from: date, date_to: date) -> dict:
+    by_day: dict[str, dict[str, int]] = {}
+    by_doctor: dict[int, dict[str, int]] = {}
+    by_status: Counter = Counter()
+    histories: dict[int, int] = {}
+    weeks: dict[str, int] = {}
+
+    for metric, bucket, status_value, count in rows:
+        if metric == APPOINTMENTS_BY_DAY:
+            by_day.setdefault(bucket, {})[status_value] = count
+        elif metric == APPOINTMENTS_BY_DOCTOR:
+            by_doctor.setdefault(int(bucket), {})[status_value] = count
+            # El total por estado es la suma por doctor (sin una fila global
+            # que todas las reservas tendrían que bloquear)
+            by_status[status_value] += count
+        elif metric == HISTORIES_BY_DOCTOR:
+            histories[int(bucket)] = count
+        elif metric == NEW_PATIENTS_BY_WEEK:
+            weeks[bucket] = count
+
+    return {
+        "date_from": date_from,
+        "date_to": date_to,
+        "appointments_by_status": dict(by_status),
+        "appointments_by_day": [
+            {"date": date.fromisoformat(day), "total": sum(counts.values()), "by_status": counts}
+            for day, counts in sorted(by_day.items())
+        ],
+        "appointments_by_doctor": [
+            {"doctor_id": doctor_id, "total": sum(counts.values()), "by_status": counts}
+            for doctor_id, counts in sorted(by_doctor.items())
+        ],
+        "histories_by_doctor": [
+            {"doctor_id": doctor_id, "count": count}
+            for doctor_id, count in sorted(histories.items())
+        ],
+        "new_patients_by_week": [
+            {"week_start": date.fromisoformat(week), "count": count}
+            for week, count in sorted(weeks.items())
+        ],
+    }
+
+
+def get_dashboard(db: Session, date_from: date, date_to: date, weeks: int) -> dict:
+    rows = db.execute(dashboard_stmt(date_from, date_to, weeks)).all()
+    return build_dashboard(rows, date_from, date_to)
+
+
+# --- Reconstrucción (backfill) ---
+
+def rebuild_stats(db: Session) -> dict:
+    """
+    Recalcula desde cero las métricas de citas e historias. Se hace en una
+    sola transacción que bloquea las escrituras concurrentes de citas e
+    historias mientras dura, así ningún delta se pierde ni se cuenta doble.
+    """
+    if engine.dialect.name == "postgresql":
+        db.execute(text("LOCK TABLE appointments, clinical_histories IN SHARE MODE"))
+    # En SQLite el DELETE toma el lock de escritura de la base
+    db.execute(delete(StatCounter).where(StatCounter.metric.in_(REBUILT_METRICS)))
+
+    counts: Counter = Counter()
+    rows = db.execute(
+        select(Appointment.doctor_id, Appointment.scheduled_at, Appointment.status)
+        .execution_options(yield_per=REBUILD_BATCH_SIZE)
+    )
+    for doctor_id, scheduled_at, status_value in rows:
+        counts.update(appointment_keys(doctor_id, scheduled_at, status_value))
+
+    for doctor_id, count in db.execute(
+        select(ClinicalHistory.doctor_id, func.count()).group_by(ClinicalHistory.doctor_id)
+    ):
+        counts[history_keys(doctor_id)[0]] += count
+
+    values = [
+        {"metric": metric, "bucket": bucket, "status": status_value, "count": count}
+        for (metric, bucket, status_value), count in counts.items()
+    ]
+    for start in range(0, len(values), REBUILD_BATCH_SIZE):
+        db.execute(insert(StatCounter), values[start:start + REBUILD_BATCH_SIZE])
+    db.commit()
+    return {"metrics": list(REBUILT_METRICS), "counters": len(values)}
+
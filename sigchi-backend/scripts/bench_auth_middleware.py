@@ -0,0 +1,87 @@
+"""
+Latencia (p50 / p99) de rutas que pasan por AuthHTMLMiddleware: una que no
+es vista protegida (pasa directo), un endpoint de la API autenticado y una
+vista HTML protegida. SQLite temporal, peticiones secuenciales.
+
+    python scripts/bench_auth_middleware.py [--requests 3000] [--tree RUTA]
+
+--tree corre la medición sobre otro checkout del backend (p.ej. un
+`git worktree` de un commit anterior) para comparar antes / después.
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+URLS = ("/favicon.ico", "/api/users/me", "/admin")
+
+
+async def _run(requests: int) -> None:
+    import httpx
+
+    from app.main import app
+
+    for handler in app.router.on_startup:
+        result = handler()
+        if asyncio.iscoroutine(result):
+            await result
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.post(
+            "/api/auth/token", data={"username": "admin@example.com", "password": "admin_password"}
+        )
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        for url in URLS:
+            for _ in range(200):
+                await client.get(url, headers=headers)
+            latencies = []
+            for _ in range(requests):
+                started = time.perf_counter()
+                await client.get(url, headers=headers)
+                latencies.append(time.perf_counter() - started)
+            latencies.sort()
+            p50 = latencies[len(latencies) // 2] * 1e6
+            p99 = latencies[int(len(latencies) * 0.99)] * 1e6
+            print(f"{url:16s} p50={p50:7.0f}us p99={p99:7.0f}us")
+
+    for handler in app.router.on_shutdown:
+        result = handler()
+        if asyncio.iscoroutine(result):
+            await result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--tree", type=Path, default=BACKEND_DIR)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        sys.path.insert(0, os.getcwd())
+        asyncio.run(_run(args.requests))
+        return
+
+    # En otro proceso: la app (y su engine) se importa desde args.tree
+    with tempfile.TemporaryDirectory(prefix="sigchi-bench-") as tmp:
+        env = dict(
+            os.environ,
+            DATABASE_URL=f"sqlite:///{Path(tmp) / 'bench.db'}",
+            REMINDERS_ENABLED="false",
+            REMINDER_LOG_FILE=str(Path(tmp) / "reminders.log"),
+        )
+        subprocess.run(
+            [sys.executable, __file__, "--child", "--requests", str(args.requests)],
+            env=env, cwd=args.tree.resolve(), check=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Throughput de escritura de citas: create_appointment y update_appointment
+en secuencia, con la serialización de la respuesta, sobre un SQLite
+temporal. Cuenta también las sentencias SQL por escritura.
+
+    python scripts/bench_booking_writes.py [--bookings 3000] [--tree RUTA]
+
+--tree corre la medición sobre otro checkout del backend (p.ej. un
+`git worktree` de un commit anterior) para comparar antes / después.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+UPDATES = 1000
+
+
+def _run(bookings: int) -> None:
+    from sqlalchemy import event
+
+    from app.core.db.database import Base, SessionLocal, engine
+    from app.core.db.models import Doctor, Patient, Role, User
+    from app.schemas.appointment import AppointmentCreate, AppointmentResponse, AppointmentUpdate
+    from app.services import appointment_service
+
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    role = Role(name="bench")
+    db.add(role)
+    db.flush()
+    users = [User(email=f"bench-{i}@x.com", hashed_password="x", role_id=role.id) for i in range(2)]
+    db.add_all(users)
+    db.flush()
+    doctor, patient = Doctor(user_id=users[0].id), Patient(user_id=users[1].id)
+    db.add_all([doctor, patient])
+    db.commit()
+
+    statements = 0
+
+    def count(*args):
+        nonlocal statements
+        statements += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    start = datetime(2030, 1, 1, tzinfo=timezone.utc)
+    started = time.perf_counter()
+    for i in range(bookings):
+        appointment = appointment_service.create_appointment(db, AppointmentCreate(
+            patient_id=patient.id,
+            doctor_id=doctor.id,
+            scheduled_at=start + timedelta(hours=i),
+            reason="bench",
+        ))
+        AppointmentResponse.model_validate(appointment, from_attributes=True)
+    elapsed = time.perf_counter() - started
+    print(f"create: {bookings / elapsed:6.0f}/s  {statements / bookings:.2f} sentencias por cita")
+
+    ids = [appointment.id for appointment in appointment_service.list_appointments(db, limit=UPDATES)]
+    db.expunge_all()
+    appointments = [appointment_service.get_appointment(db, appointment_id) for appointment_id in ids]
+    statements = 0
+    started = time.perf_counter()
+    for i, appointment in enumerate(appointments):
+        appointment = appointment_service.update_appointment(
+            db, appointment, AppointmentUpdate(notes=f"nota {i}")
+        )
+        AppointmentResponse.model_validate(appointment, from_attributes=True)
+    elapsed = time.perf_counter() - started
+    print(f"update: {len(ids) / elapsed:6.0f}/s  {statements / len(ids):.2f} sentencias por cambio")
+    event.remove(engine, "before_cursor_execute", count)
+    db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bookings", type=int, default=3000)
+    parser.add_argument("--tree", type=Path, default=BACKEND_DIR)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        sys.path.insert(0, os.getcwd())
+        _run(args.bookings)
+        return
+
+    # En otro proceso: la app (y su engine) se importa desde args.tree
+    with tempfile.TemporaryDirectory(prefix="sigchi-bench-") as tmp:
+        env = dict(
+            os.environ,
+            DATABASE_URL=f"sqlite:///{Path(tmp) / 'bench.db'}",
+            REMINDERS_ENABLED="false",
+            REMINDER_LOG_FILE=str(Path(tmp) / "reminders.log"),
+        )
+        subprocess.run(
+            [sys.executable, __file__, "--child", "--bookings", str(args.bookings)],
+            env=env, cwd=args.tree.resolve(), check=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Compara el throughput del listado de citas con el stack sync (threadpool)
+y con el async (DB_ASYNC=1), sobre una base SQLite temporal.
+
+    python scripts/bench_db_modes.py [--requests 2000] [--concurrency 64]
+
+Cada modo corre en un proceso aparte: DB_ASYNC se lee al importar la app.
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+APPOINTMENTS = 500
+
+
+async def _run(requests: int, concurrency: int) -> float:
+    import httpx
+
+    from app.core.db.database import SessionLocal
+    from app.core.db.models import Appointment, Doctor, Patient, Role, User
+    from app.main import app
+
+    for handler in app.router.on_startup:
+        result = handler()
+        if asyncio.iscoroutine(result):
+            await result
+
+    db = SessionLocal()
+    roles = {name: Role(name=name) for name in ("doctor", "patient")}
+    db.add_all(roles.values())
+    db.flush()
+    doctor_user = User(email="bench-doc@x.com", hashed_password="x", role_id=roles["doctor"].id)
+    patient_user = User(email="bench-pat@x.com", hashed_password="x", role_id=roles["patient"].id)
+    db.add_all([doctor_user, patient_user])
+    db.flush()
+    doctor, patient = Doctor(user_id=doctor_user.id), Patient(user_id=patient_user.id)
+    db.add_all([doctor, patient])
+    db.flush()
+    start = datetime(2030, 1, 1, tzinfo=timezone.utc)
+    db.add_all([
+        Appointment(doctor_id=doctor.id, patient_id=patient.id, scheduled_at=start + timedelta(minutes=30 * i))
+        for i in range(APPOINTMENTS)
+    ])
+    db.commit()
+    db.close()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.post(
+            "/api/auth/token", data={"username": "admin@example.com", "password": "admin_password"}
+        )
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(i: int) -> None:
+            async with semaphore:
+                response = await client.get(
+                    "/api/appointments/", params={"skip": i % 400, "limit": 50}, headers=headers
+                )
+                assert response.status_code == 200, response.text
+
+        # Calentamiento: conexiones del pool, principal en cache
+        await asyncio.gather(*(one(i) for i in range(100)))
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    for handler in app.router.on_shutdown:
+        result = handler()
+        if asyncio.iscoroutine(result):
+            await result
+    return requests / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--mode", choices=("0", "1"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode is not None:
+        # Proceso hijo: un solo modo
+        sys.path.insert(0, str(BACKEND_DIR))
+        print(f"{asyncio.run(_run(args.requests, args.concurrency)):.0f}")
+        return
+
+    for mode in ("0", "1"):
+        with tempfile.TemporaryDirectory(prefix="sigchi-bench-") as tmp:
+            env = dict(
+                os.environ,
+                DB_ASYNC=mode,
+                DATABASE_URL=f"sqlite:///{Path(tmp) / 'bench.db'}",
+                REMINDERS_ENABLED="false",
+                REMINDER_LOG_FILE=str(Path(tmp) / "reminders.log"),
+            )
+            env.pop("ASYNC_DATABASE_URL", None)
+            output = subprocess.run(
+                [sys.executable, __file__, "--mode", mode,
+                 "--requests", str(args.requests), "--concurrency", str(args.concurrency)],
+                env=env, cwd=BACKEND_DIR, check=True, capture_output=True, text=True,
+            ).stdout
+        print(f"DB_ASYNC={mode}: {output.strip().splitlines()[-1]} req/s")
+
+
+if __name__ == "__main__":
+    main()
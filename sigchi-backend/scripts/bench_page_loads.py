@@ -0,0 +1,126 @@
+"""
+Bytes y latencia por carga de cada vista HTML: primera carga (navegador
+con gzip, br) y recarga con el ETag de la anterior (If-None-Match).
+SQLite temporal, peticiones secuenciales.
+
+    python scripts/bench_page_loads.py [--requests 1000] [--tree RUTA]
+
+--tree corre la medición sobre otro checkout del backend (p.ej. un
+`git worktree` de un commit anterior) para comparar antes / después.
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+PAGES = ("/login", "/admin", "/doctor", "/patient")
+ACCEPT_ENCODING = "gzip, deflate, br"
+
+
+async def _load(client, url: str, headers: dict):
+    """(bytes del cuerpo tal como viaja, comprimido o no; respuesta)."""
+    async with client.stream("GET", url, headers=headers) as response:
+        size = 0
+        async for chunk in response.aiter_raw():
+            size += len(chunk)
+    return size, response
+
+
+async def _measure(client, url: str, headers: dict, requests: int) -> tuple[int, float]:
+    """(bytes por carga, p50 en us) de `requests` peticiones iguales."""
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        size, _ = await _load(client, url, headers)
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return size, latencies[len(latencies) // 2] * 1e6
+
+
+async def _run(requests: int) -> None:
+    import httpx
+
+    from app.core.db.database import SessionLocal
+    from app.core.db.models import Role
+    from app.main import app
+
+    for handler in app.router.on_startup:
+        result = handler()
+        if asyncio.iscoroutine(result):
+            await result
+
+    db = SessionLocal()
+    roles = [Role(name=name) for name in ("doctor", "patient")]
+    db.add_all(roles)
+    db.commit()
+    role_ids = {role.name: role.id for role in roles}
+    db.close()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def login(email: str, password: str) -> dict:
+            response = await client.post("/api/auth/token", data={"username": email, "password": password})
+            return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        admin = await login("admin@example.com", "admin_password")
+        # Cada vista con un usuario de su rol
+        headers_by_page = {"/login": {}, "/admin": admin}
+        for name, role_id in role_ids.items():
+            email = f"bench-{name}@x.com"
+            await client.post(
+                "/api/users/", json={"email": email, "password": "secret1", "role_id": role_id}, headers=admin
+            )
+            headers_by_page[f"/{name}"] = await login(email, "secret1")
+
+        print(f"{'vista':10s} {'primera carga':>22s} {'recarga (ETag)':>24s}")
+        for url in PAGES:
+            headers = {**headers_by_page[url], "Accept-Encoding": ACCEPT_ENCODING}
+            _, first = await _load(client, url, headers)
+            size, p50 = await _measure(client, url, headers, requests)
+            revalidate = dict(headers)
+            if "etag" in first.headers:
+                revalidate["If-None-Match"] = first.headers["etag"]
+            size_304, p50_304 = await _measure(client, url, revalidate, requests)
+            print(f"{url:10s} {size:8d} B {p50:8.0f} us   {size_304:8d} B {p50_304:8.0f} us")
+
+    for handler in app.router.on_shutdown:
+        result = handler()
+        if asyncio.iscoroutine(result):
+            await result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--tree", type=Path, default=BACKEND_DIR)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        sys.path.insert(0, os.getcwd())
+        asyncio.run(_run(args.requests))
+        return
+
+    # En otro proceso: la app (y su engine) se importa desde args.tree
+    with tempfile.TemporaryDirectory(prefix="sigchi-bench-") as tmp:
+        env = dict(
+            os.environ,
+            DATABASE_URL=f"sqlite:///{Path(tmp) / 'bench.db'}",
+            REMINDERS_ENABLED="false",
+            REMINDER_LOG_FILE=str(Path(tmp) / "reminders.log"),
+        )
+        subprocess.run(
+            [sys.executable, __file__, "--child", "--requests", str(args.requests)],
+            env=env, cwd=args.tree.resolve(), check=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# tests/conftest.py
+
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+from sqlalchemy import event
+
+# Los módulos de app.core.db crean el engine al importarse: sin esto
+# apuntarían al Postgres de docker-compose. En archivo (no en memoria)
+# para que los hilos del TestClient vean la misma base
+_TEST_DIR = Path(tempfile.mkdtemp(prefix="sigchi-tests-"))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_TEST_DIR / 'sigchi.db'}")
+os.environ.setdefault("REMINDER_LOG_FILE", str(_TEST_DIR / "reminders.log"))
+os.environ.setdefault("REMINDERS_ENABLED", "false")
+# Sin syncs periódicos de la denylist en medio de una prueba
+os.environ.setdefault("TOKEN_DENYLIST_SYNC_SECONDS", "3600")
+
+ADMIN_EMAIL = "admin@example.com"
+ADMIN_PASSWORD = "admin_password"
+
+
+@pytest.fixture(scope="session")
+def client():
+    """TestClient de la app (arranque completo), con los roles doctor y patient."""
+    from fastapi.testclient import TestClient
+
+    from app.core.db.database import SessionLocal
+    from app.main import app
+    from app.models import Role
+
+    with TestClient(app) as test_client:
+        db = SessionLocal()
+        for name in ("doctor", "patient"):
+            if db.query(Role).filter(Role.name == name).first() is None:
+                db.add(Role(name=name))
+        db.commit()
+        db.close()
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def login(client):
+    def login(email: str, password: str) -> dict:
+        response = client.post("/api/auth/token", data={"username": email, "password": password})
+        assert response.status_code == 200, response.text
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    return login
+
+
+@pytest.fixture(scope="session")
+def admin_headers(login):
+    return login(ADMIN_EMAIL, ADMIN_PASSWORD)
+
+
+@pytest.fixture
+def count_queries():
+    """
+    Cuenta las consultas que llegan a la base de la app:
+
+        with count_queries() as statements:
+            client.get(...)
+        assert len(statements) == 2
+    """
+    from app.core.db.database import async_engine, engine
+
+    engines = [engine] + ([async_engine.sync_engine] if async_engine is not None else [])
+
+    @contextmanager
+    def counting():
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        for target in engines:
+            event.listen(target, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            for target in engines:
+                event.remove(target, "before_cursor_execute", record)
+
+    return counting
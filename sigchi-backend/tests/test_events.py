@@ -0,0 +1,36 @@
+# tests/test_events.py
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from app.core.config import settings
+from app.routers import events
+from conftest import ADMIN_EMAIL, ADMIN_PASSWORD
+
+
+def _token(headers: dict) -> str:
+    return headers["Authorization"].split()[1]
+
+
+def test_revoked_token_closes_the_socket(client, login, monkeypatch):
+    monkeypatch.setattr(settings, "TOKEN_DENYLIST_SYNC_SECONDS", 0.05)
+    # Token propio: el de admin_headers lo usan las demás pruebas
+    headers = login(ADMIN_EMAIL, ADMIN_PASSWORD)
+
+    with client.websocket_connect(f"/api/events/ws?token={_token(headers)}") as websocket:
+        assert client.post("/api/auth/logout", headers=headers).status_code == 204
+        with pytest.raises(WebSocketDisconnect) as closed:
+            websocket.receive_text()
+    assert closed.value.code == 1008
+
+
+def test_sender_failure_is_logged(client, admin_headers, monkeypatch, capsys):
+    async def failing_sender(websocket, subscription):
+        raise RuntimeError("send failed")
+
+    monkeypatch.setattr(events, "_send_events", failing_sender)
+    with client.websocket_connect(f"/api/events/ws?token={_token(admin_headers)}") as websocket:
+        with pytest.raises(WebSocketDisconnect) as closed:
+            websocket.receive_text()
+    assert closed.value.code == 1011
+    assert "RuntimeError('send failed')" in capsys.readouterr().out
@@ -0,0 +1,45 @@
+# tests/test_password_hasher.py
+
+import asyncio
+import os
+import signal
+
+from app.core.hashing import PasswordHasher, verify_password
+
+
+def _kill_workers(hasher: PasswordHasher) -> None:
+    for process in list(hasher._executor._processes.values()):
+        os.kill(process.pid, signal.SIGKILL)
+        process.join()
+
+
+def test_broken_pool_is_rebuilt():
+    hasher = PasswordHasher(workers=1, max_pending=4)
+    hasher.start()
+    try:
+        hashed = asyncio.run(hasher.hash("secret1"))
+        broken = hasher._executor
+        _kill_workers(hasher)
+
+        # El trabajo que encuentra el pool roto se reintenta en uno nuevo
+        assert asyncio.run(hasher.verify("secret1", hashed)) is True
+        assert hasher._executor is not broken
+        assert hasher.restarts == 1
+        assert verify_password("secret1", asyncio.run(hasher.hash("secret1")))
+    finally:
+        hasher.shutdown()
+
+
+def test_falls_back_in_process_when_the_pool_keeps_breaking(monkeypatch):
+    hasher = PasswordHasher(workers=1, max_pending=4)
+    hasher.start()
+    try:
+        hashed = asyncio.run(hasher.hash("secret1"))
+        _kill_workers(hasher)
+        # Sin poder levantar otro pool: se verifica en este proceso
+        monkeypatch.setattr(hasher, "start", lambda: None)
+        assert asyncio.run(hasher.verify("secret1", hashed)) is True
+        assert hasher._executor is None
+        assert hasher.stats()["pending"] == 0
+    finally:
+        hasher.shutdown()
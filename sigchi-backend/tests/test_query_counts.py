@@ -0,0 +1,96 @@
+# tests/test_query_counts.py
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.db.database import SessionLocal
+from app.core.hashing import get_password_hash
+from app.models import Appointment, ClinicalHistory, Doctor, Patient, Role, User
+
+
+ROWS = 50
+PASSWORD = "secret1"
+
+
+@pytest.fixture(scope="module")
+def dataset(client, login):
+    """
+    ROWS doctores, y ROWS citas e historias de un mismo doctor y paciente:
+    cada listado tiene al menos ROWS filas en cualquier alcance.
+    """
+    db = SessionLocal()
+    roles = {role.name: role.id for role in db.query(Role).all()}
+    users = [
+        User(email=f"count-doc-{i}@x.com", hashed_password="x", role_id=roles["doctor"])
+        for i in range(ROWS)
+    ]
+    users[0].hashed_password = get_password_hash(PASSWORD)
+    patient_user = User(
+        email="count-pat@x.com",
+        hashed_password=get_password_hash(PASSWORD),
+        role_id=roles["patient"],
+    )
+    db.add_all(users + [patient_user])
+    db.flush()
+    doctors = [Doctor(user_id=user.id, specialty="x") for user in users]
+    patient = Patient(user_id=patient_user.id)
+    db.add_all(doctors + [patient])
+    db.flush()
+
+    start = datetime(2032, 1, 5, 13, 0, tzinfo=timezone.utc)
+    for i in range(ROWS):
+        when = start + timedelta(hours=i)
+        db.add(Appointment(
+            doctor_id=doctors[0].id, patient_id=patient.id, scheduled_at=when, status="scheduled",
+        ))
+        db.add(ClinicalHistory(doctor_id=doctors[0].id, patient_id=patient.id, visit_date=when))
+    db.commit()
+    patient_id = patient.id
+    db.close()
+
+    return {
+        "patient_id": patient_id,
+        "doctor": login(users[0].email, PASSWORD),
+        "patient": login(patient_user.email, PASSWORD),
+    }
+
+
+def _queries(client, count_queries, url: str, headers: dict, limit: int) -> int:
+    response = client.get(url, params={"limit": limit}, headers=headers)
+    assert response.status_code == 200, response.text
+    with count_queries() as statements:
+        response = client.get(url, params={"limit": limit}, headers=headers)
+    assert response.status_code == 200, response.text
+    assert len(response.json()) == limit
+    return len(statements)
+
+
+def _assert_constant(client, count_queries, url: str, headers: dict) -> None:
+    # La primera petición (fuera del conteo) deja el principal en cache
+    one = _queries(client, count_queries, url, headers, 1)
+    many = _queries(client, count_queries, url, headers, ROWS)
+    assert one == many, f"{url}: {one} consultas con 1 fila, {many} con {ROWS}"
+
+
+def test_doctor_list_query_count_is_constant(client, count_queries, admin_headers, dataset):
+    _assert_constant(client, count_queries, "/api/doctors/", admin_headers)
+
+
+@pytest.mark.parametrize("role", ["admin", "doctor", "patient"])
+def test_appointment_list_query_count_is_constant(
+    client, count_queries, admin_headers, dataset, role
+):
+    headers = admin_headers if role == "admin" else dataset[role]
+    _assert_constant(client, count_queries, "/api/appointments/", headers)
+
+
+@pytest.mark.parametrize("role", ["admin", "doctor", "patient"])
+def test_history_list_query_count_is_constant(
+    client, count_queries, admin_headers, dataset, role
+):
+    headers = admin_headers if role == "admin" else dataset[role]
+    _assert_constant(client, count_queries, "/api/histories/", headers)
+    _assert_constant(
+        client, count_queries, f"/api/histories/patient/{dataset['patient_id']}", headers
+    )
@@ -0,0 +1,218 @@
+# tests/test_query_plans.py
+
+import json
+import os
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import Session
+
+from app.core.db.database import Base
+from app.models import Appointment, ClinicalHistory, Doctor, Patient, Role, User
+from app.services import appointment_service, clinical_history_service
+
+
+# Datos de prueba: suficientes para que un recorrido completo sea la
+# opción cara (el planificador de SQLite usa las estadísticas de ANALYZE)
+DOCTORS = 200
+PATIENTS = 2000
+APPOINTMENTS = 60000
+HISTORIES = 30000
+
+START = datetime(2030, 1, 1, tzinfo=timezone.utc)
+
+# Índice que tiene que usar cada listado, según el filtro del rol
+APPOINTMENT_INDEXES = {
+    "admin": "ix_appointments_scheduled",
+    "doctor": "ix_appointments_doctor_scheduled",
+    "patient": "ix_appointments_patient_scheduled",
+}
+HISTORY_INDEXES = {
+    "admin": "ix_clinical_histories_visit",
+    "doctor": "ix_clinical_histories_doctor_visit",
+    "patient": "ix_clinical_histories_patient_visit",
+}
+
+
+def _seed(engine) -> tuple[int, int]:
+    """Carga el conjunto de datos; devuelve (doctor_id, patient_id) con filas."""
+    rng = random.Random(10)
+    with Session(engine) as db:
+        role = db.query(Role).filter(Role.name == "plan-test").first()
+        if role is None:
+            role = Role(name="plan-test")
+            db.add(role)
+            db.flush()
+        # Únicos entre corridas (la base de Postgres puede reutilizarse)
+        run = uuid.uuid4().hex[:8]
+        user_ids = db.execute(
+            insert(User).returning(User.id),
+            [
+                {"email": f"plan-{run}-{i}@x.com", "hashed_password": "x", "role_id": role.id}
+                for i in range(DOCTORS + PATIENTS)
+            ],
+        ).scalars().all()
+        doctor_ids = db.execute(
+            insert(Doctor).returning(Doctor.id),
+            [{"user_id": user_id} for user_id in user_ids[:DOCTORS]],
+        ).scalars().all()
+        patient_ids = db.execute(
+            insert(Patient).returning(Patient.id),
+            [{"user_id": user_id} for user_id in user_ids[DOCTORS:]],
+        ).scalars().all()
+
+        def when() -> datetime:
+            return START + timedelta(minutes=30 * rng.randrange(200000))
+
+        db.execute(
+            insert(Appointment),
+            [
+                {
+                    "doctor_id": rng.choice(doctor_ids),
+                    "patient_id": rng.choice(patient_ids),
+                    "scheduled_at": when(),
+                    "status": rng.choice(("scheduled", "completed", "cancelled")),
+                }
+                for _ in range(APPOINTMENTS)
+            ],
+        )
+        db.execute(
+            insert(ClinicalHistory),
+            [
+                {
+                    "doctor_id": rng.choice(doctor_ids),
+                    "patient_id": rng.choice(patient_ids),
+                    "visit_date": when(),
+                }
+                for _ in range(HISTORIES)
+            ],
+        )
+        db.commit()
+        return doctor_ids[0], patient_ids[0]
+
+
+def _run_and_capture(engine, fn) -> list[tuple[str, object]]:
+    """(sql, parámetros) de cada consulta que ejecuta fn(db)."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        with Session(engine) as db:
+            fn(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert statements
+    return statements
+
+
+def _scopes(doctor_id: int, patient_id: int) -> dict:
+    return {"admin": {}, "doctor": {"doctor_id": doctor_id}, "patient": {"patient_id": patient_id}}
+
+
+def _list_queries(doctor_id: int, patient_id: int):
+    """
+    (nombre, índice esperado, fn) de las consultas de los listados por
+    rol: ETag de la página y página, sin cursor y con cursor.
+    """
+    after_appointment = (START + timedelta(days=365), 0)
+    after_history = (START + timedelta(days=365), 0)
+    for role, scope in _scopes(doctor_id, patient_id).items():
+        for after in (None, after_appointment):
+            yield (
+                f"appointments-{role}-{'cursor' if after else 'offset'}",
+                APPOINTMENT_INDEXES[role],
+                lambda db, scope=scope, after=after: (
+                    appointment_service.get_page_etag(db, 0, 20, after, **scope),
+                    appointment_service.list_appointments(db, limit=20, after=after, **scope),
+                ),
+            )
+        for after in (None, after_history):
+            yield (
+                f"histories-{role}-{'cursor' if after else 'offset'}",
+                HISTORY_INDEXES[role],
+                lambda db, scope=scope, after=after: (
+                    clinical_history_service.get_page_version(db, 0, 20, after, **scope),
+                    clinical_history_service.list_histories(db, limit=20, after=after, **scope),
+                ),
+            )
+    yield (
+        "appointments-overlap",
+        "ix_appointments_doctor_pending",
+        lambda db: appointment_service.find_conflict(db, doctor_id, START + timedelta(days=30)),
+    )
+
+
+# --- SQLite ---
+
+@pytest.fixture(scope="module")
+def sqlite_dataset(tmp_path_factory):
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('plans') / 'plans.db'}")
+    Base.metadata.create_all(engine)
+    doctor_id, patient_id = _seed(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+    return engine, doctor_id, patient_id
+
+
+def _sqlite_plan(engine, statement: str, parameters) -> list[str]:
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    return [row[-1] for row in rows]
+
+
+@pytest.mark.parametrize("name", [name for name, _, _ in _list_queries(0, 0)])
+def test_sqlite_list_queries_use_their_index(sqlite_dataset, name):
+    engine, doctor_id, patient_id = sqlite_dataset
+    _, index, fn = next(q for q in _list_queries(doctor_id, patient_id) if q[0] == name)
+
+    for statement, parameters in _run_and_capture(engine, fn):
+        plan = _sqlite_plan(engine, statement, parameters)
+        assert any(f"USING INDEX {index}" in step or f"USING COVERING INDEX {index}" in step
+                   for step in plan), plan
+        # Ni recorridos de la tabla ni ordenar en un B-tree temporal. Sin
+        # filtro (admin) el plan es "SCAN ... USING INDEX": recorre el
+        # índice en orden y se detiene en el LIMIT
+        assert not any(step.startswith("SCAN") and "INDEX" not in step for step in plan), plan
+        assert not any("TEMP B-TREE" in step for step in plan), plan
+
+
+# --- PostgreSQL ---
+
+@pytest.fixture(scope="module")
+def postgres_dataset():
+    url = os.environ.get("TEST_POSTGRES_URL")
+    if not url:
+        pytest.skip("TEST_POSTGRES_URL no definida")
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    doctor_id, patient_id = _seed(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE appointments")
+        conn.exec_driver_sql("ANALYZE clinical_histories")
+    return engine, doctor_id, patient_id
+
+
+def _postgres_nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from _postgres_nodes(child)
+
+
+@pytest.mark.parametrize("name", [name for name, _, _ in _list_queries(0, 0)])
+def test_postgres_list_queries_use_their_index(postgres_dataset, name):
+    engine, doctor_id, patient_id = postgres_dataset
+    _, index, fn = next(q for q in _list_queries(doctor_id, patient_id) if q[0] == name)
+
+    for statement, parameters in _run_and_capture(engine, fn):
+        with engine.connect() as conn:
+            raw = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+        plan = raw if isinstance(raw, list) else json.loads(raw)
+        nodes = list(_postgres_nodes(plan[0]["Plan"]))
+        assert not any(node["Node Type"] == "Seq Scan" for node in nodes), plan
+        assert any(node.get("Index Name") == index for node in nodes), plan
@@ -0,0 +1,92 @@
+# tests/test_read_replicas.py
+
+import itertools
+import sqlite3
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, event
+
+from app.core.db.database import SessionLocal, engine, write_tracker
+from app.core.pagination import encode_cursor
+from app.models import Role
+
+
+@pytest.fixture
+def replica(client, admin_headers, tmp_path, monkeypatch):
+    """
+    Una segunda base SQLite como réplica del primario (la de la app),
+    copiada al inicio; sync() la vuelve a copiar, como si la replicación
+    la alcanzara. Los GET de la app van a ella salvo en la ventana
+    read-your-writes.
+    """
+    path = tmp_path / "replica.db"
+    replica_engine = create_engine(f"sqlite:///{path}")
+
+    def sync() -> None:
+        replica_engine.dispose()
+        source = engine.raw_connection()
+        target = sqlite3.connect(path)
+        try:
+            source.driver_connection.backup(target)
+        finally:
+            target.close()
+            source.close()
+
+    sync()
+    monkeypatch.setattr(write_tracker, "_last_write", {})
+    SessionLocal.configure(replica_cycle=itertools.cycle([replica_engine]))
+    try:
+        yield replica_engine, sync
+    finally:
+        SessionLocal.configure(replica_cycle=None)
+        replica_engine.dispose()
+
+
+def _create_user(client, headers: dict) -> int:
+    db = SessionLocal()
+    role_id = db.query(Role.id).filter(Role.name == "patient").scalar()
+    db.close()
+    email = f"replica-{uuid.uuid4().hex[:8]}@x.com"
+    response = client.post(
+        "/api/users/", json={"email": email, "password": "secret1", "role_id": role_id}, headers=headers
+    )
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def _get_user(client, headers: dict, user_id: int) -> list:
+    response = client.get(
+        "/api/users/", params={"cursor": encode_cursor(user_id - 1), "limit": 1}, headers=headers
+    )
+    assert response.status_code == 200, response.text
+    return [user["id"] for user in response.json()]
+
+
+def test_read_after_write_goes_to_the_primary(client, admin_headers, replica, monkeypatch):
+    replica_engine, sync = replica
+    replica_reads = []
+    event.listen(replica_engine, "before_cursor_execute", lambda *args: replica_reads.append(args[2]))
+
+    user_id = _create_user(client, admin_headers)
+
+    # Dentro de la ventana: el GET del mismo usuario lee del primario
+    assert _get_user(client, admin_headers, user_id) == [user_id]
+    assert replica_reads == []
+
+    # Vencida la ventana va a la réplica, que todavía no tiene la fila
+    monkeypatch.setattr(write_tracker, "window_seconds", 0)
+    assert _get_user(client, admin_headers, user_id) == []
+    assert replica_reads
+
+    sync()
+    assert _get_user(client, admin_headers, user_id) == [user_id]
+
+
+def test_writes_never_go_to_the_replica(client, admin_headers, replica):
+    replica_engine, _ = replica
+    replica_reads = []
+    event.listen(replica_engine, "before_cursor_execute", lambda *args: replica_reads.append(args[2]))
+
+    _create_user(client, admin_headers)
+    assert replica_reads == []
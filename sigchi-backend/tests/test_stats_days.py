@@ -0,0 +1,74 @@
+# tests/test_stats_days.py
+
+import uuid
+from datetime import datetime, timezone
+
+from app.core.db.database import SessionLocal
+from app.models import Appointment, Doctor, Patient, Role, StatCounter, User
+from app.services.stats_service import APPOINTMENTS_BY_DAY
+
+
+DAYS = ("2034-03-01", "2034-03-02")
+
+
+def _seed_doctor_and_patient() -> tuple[int, int]:
+    db = SessionLocal()
+    roles = {role.name: role.id for role in db.query(Role).all()}
+    run = uuid.uuid4().hex[:8]
+    users = [
+        User(email=f"stats-{name}-{run}@x.com", hashed_password="x", role_id=roles[name])
+        for name in ("doctor", "patient")
+    ]
+    db.add_all(users)
+    db.flush()
+    doctor, patient = Doctor(user_id=users[0].id), Patient(user_id=users[1].id)
+    db.add_all([doctor, patient])
+    db.commit()
+    ids = doctor.id, patient.id
+    db.close()
+    return ids
+
+
+def _day_counts() -> dict:
+    db = SessionLocal()
+    try:
+        rows = db.query(StatCounter.bucket, StatCounter.count).filter(
+            StatCounter.metric == APPOINTMENTS_BY_DAY, StatCounter.bucket.in_(DAYS)
+        )
+        return {bucket: count for bucket, count in rows if count}
+    finally:
+        db.close()
+
+
+def test_incremental_and_rebuilt_day_buckets_agree(client, admin_headers):
+    doctor_id, patient_id = _seed_doctor_and_patient()
+    # Alrededor de la medianoche de la clínica (America/Bogota, -05:00),
+    # con offset: en UTC las dos caen el 2 de marzo
+    for scheduled_at in ("2034-03-01T23:00:00-05:00", "2034-03-02T00:30:00-05:00"):
+        response = client.post(
+            "/api/appointments/",
+            json={"patient_id": patient_id, "doctor_id": doctor_id, "scheduled_at": scheduled_at},
+            headers=admin_headers,
+        )
+        assert response.status_code == 201, response.text
+
+    incremental = _day_counts()
+    assert incremental == {"2034-03-01": 1, "2034-03-02": 1}
+
+    assert client.post("/api/stats/rebuild", headers=admin_headers).status_code == 200
+    assert _day_counts() == incremental
+
+
+def test_scheduled_at_is_stored_in_utc(client, admin_headers):
+    doctor_id, patient_id = _seed_doctor_and_patient()
+    payload = {"patient_id": patient_id, "doctor_id": doctor_id, "scheduled_at": "2034-04-01T00:30:00-05:00"}
+    response = client.post("/api/appointments/", json=payload, headers=admin_headers)
+    assert response.status_code == 201, response.text
+
+    db = SessionLocal()
+    stored = db.get(Appointment, response.json()["id"]).scheduled_at
+    db.close()
+    # SQLite lo devuelve sin zona
+    if stored.tzinfo is None:
+        stored = stored.replace(tzinfo=timezone.utc)
+    assert stored == datetime(2034, 4, 1, 5, 30, tzinfo=timezone.utc)
@@ -0,0 +1,86 @@
+# tests/test_user_access.py
+
+import uuid
+
+import pytest
+
+from app.core.config import settings
+from app.core.db.database import SessionLocal
+from app.models import Role
+
+
+PASSWORD = "secret1"
+
+
+@pytest.fixture
+def role_ids(client) -> dict:
+    db = SessionLocal()
+    try:
+        return {role.name: role.id for role in db.query(Role).all()}
+    finally:
+        db.close()
+
+
+def _new_user(client, admin_headers, role_id: int) -> tuple[int, str]:
+    email = f"access-{uuid.uuid4().hex[:8]}@x.com"
+    response = client.post(
+        "/api/users/",
+        json={"email": email, "password": PASSWORD, "role_id": role_id},
+        headers=admin_headers,
+    )
+    assert response.status_code == 201, response.text
+    return response.json()["id"], email
+
+
+@pytest.mark.parametrize("scoped", [False, True])
+def test_deactivating_a_user_revokes_their_tokens(
+    client, login, admin_headers, role_ids, monkeypatch, scoped
+):
+    monkeypatch.setattr(settings, "JWT_SCOPED_CLAIMS", scoped)
+    user_id, email = _new_user(client, admin_headers, role_ids["patient"])
+    headers = login(email, PASSWORD)
+    assert client.get("/api/users/me", headers=headers).status_code == 200
+
+    response = client.patch(f"/api/users/{user_id}", json={"is_active": False}, headers=admin_headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["is_active"] is False
+
+    assert client.get("/api/users/me", headers=headers).status_code == 401
+    response = client.post("/api/auth/token", data={"username": email, "password": PASSWORD})
+    assert response.status_code == 400
+
+
+def test_role_change_revokes_scoped_tokens(client, login, admin_headers, role_ids, monkeypatch):
+    monkeypatch.setattr(settings, "JWT_SCOPED_CLAIMS", True)
+    user_id, email = _new_user(client, admin_headers, role_ids["patient"])
+    headers = login(email, PASSWORD)
+
+    response = client.patch(
+        f"/api/users/{user_id}", json={"role_id": role_ids["doctor"]}, headers=admin_headers
+    )
+    assert response.status_code == 200, response.text
+
+    # El token firmado decía "patient": ya no vale
+    assert client.get("/api/users/me", headers=headers).status_code == 401
+    assert client.get("/api/users/me", headers=login(email, PASSWORD)).json()["role_id"] == (
+        role_ids["doctor"]
+    )
+
+
+def test_role_change_without_scoped_claims_is_seen_on_the_next_request(
+    client, login, admin_headers, role_ids
+):
+    user_id, email = _new_user(client, admin_headers, role_ids["patient"])
+    headers = login(email, PASSWORD)
+    assert client.get("/api/users/me", headers=headers).json()["role_id"] == role_ids["patient"]
+
+    client.patch(f"/api/users/{user_id}", json={"role_id": role_ids["doctor"]}, headers=admin_headers)
+
+    # Sin claims firmados el principal se vuelve a cargar: el token sigue valiendo
+    assert client.get("/api/users/me", headers=headers).json()["role_id"] == role_ids["doctor"]
+
+
+def test_update_user_validates_input(client, admin_headers):
+    assert client.patch("/api/users/999999", json={"is_active": False}, headers=admin_headers).status_code == 404
+    response = client.patch("/api/users/1", json={"role_id": 999999}, headers=admin_headers)
+    assert response.status_code == 400 and response.json()["detail"] == "Invalid role_id"